@@ -1,85 +1,676 @@
-from fastapi import FastAPI, Form, File, UploadFile, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse
-import tempfile
+from fastapi import FastAPI, Form, File, UploadFile, HTTPException, Request
+from fastapi.responses import Response, JSONResponse, StreamingResponse, FileResponse, PlainTextResponse, HTMLResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import base64
+import csv
+import hashlib
+import json
+import io
+import logging
 import os
-import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Optional
-from main import generate_meet_pdf
+from main import generate_meet_pdf_timed, generate_meet_snapshot, generate_snapshot_pdf_timed, generate_snapshot_cards, load_config, config_registry, warm_up, TIMES_DB
+from timesDB import TimesDatabase
+from heatSheetCache import HeatSheetCache, cacheKey
+from leagueConfig import ConfigError
+from seeding import METHODS
+from liveResults import ResultHub
+from metrics import defaultRegistry, serverTiming, PROFILE_MODES
+from meetStore import MeetStore, renderPageHtml
+from batch import parseSharedRoster, meetJobs, buildBatchMeet, zipBatch, batchTimings
 
 app = FastAPI(title="Meet Management API", description="API for generating heat sheet PDFs")
 
-def cleanup_temp_dir(dir_path: str):
-    """Removes a temporary directory and all its contents."""
-    if os.path.exists(dir_path):
-        shutil.rmtree(dir_path)
+# Worker pool settings, configurable through the environment
+MAX_WORKERS = int(os.environ.get("MEET_WORKERS", os.cpu_count() or 1))
+MAX_QUEUED_JOBS = int(os.environ.get("MEET_MAX_QUEUED_JOBS", MAX_WORKERS * 2))
+JOB_TIMEOUT = float(os.environ.get("MEET_JOB_TIMEOUT", 120))
+RETRY_AFTER = int(os.environ.get("MEET_RETRY_AFTER", 10))
+CACHE_MAX_BYTES = int(os.environ.get("MEET_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.environ.get("MEET_MAX_UPLOAD_BYTES", 16 * 1024 * 1024))
+MAX_REQUEST_BYTES = int(os.environ.get("MEET_MAX_REQUEST_BYTES", MAX_UPLOAD_BYTES * 4))
+LIVE_HISTORY = int(os.environ.get("MEET_LIVE_HISTORY", 2048))
+LIVE_CLIENT_BUFFER = int(os.environ.get("MEET_LIVE_CLIENT_BUFFER", 256))
+LIVE_TOKEN = os.environ.get("MEET_LIVE_TOKEN")
+# Profiling is opt-in: requests may only ask for a profile when this directory is set
+PROFILE_DIR = os.environ.get("MEET_PROFILE_DIR")
+MEET_STORE_DIR = os.environ.get("MEET_STORE_DIR", "Published Meets")
+# Published meets never change, so their pages may be cached at the edge for this long
+PUBLISHED_MAX_AGE = int(os.environ.get("MEET_PUBLISHED_MAX_AGE", 86400))
+# Warm this process and every worker once the server is listening, see /ready
+WARM_UP = os.environ.get("MEET_WARM_UP", "1") != "0"
+
+_pool = None
+_activeJobs = 0 # Jobs running or waiting in the pool, only touched from the event loop
+_warmUp = {"status": "warming"} # Readiness reported by /ready
+heat_sheet_cache = HeatSheetCache(CACHE_MAX_BYTES)
+result_hub = ResultHub(LIVE_HISTORY, LIVE_CLIENT_BUFFER)
+metrics = defaultRegistry()
+meet_store = MeetStore(MEET_STORE_DIR)
+logger = logging.getLogger("meet.api")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Returns the PDF generation process pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _pool
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """Rejects bodies over MAX_REQUEST_BYTES from Content-Length, before any of the body is read."""
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > MAX_REQUEST_BYTES:
+        return JSONResponse(status_code=413, content={"detail": f"Request body is larger than {MAX_REQUEST_BYTES} bytes"})
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Records each request's latency under its route template, so paths with IDs share one series."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        labels = {"route": route.path if route is not None else "unmatched", "method": request.method, "status": status}
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start, **labels)
+        metrics.increment("http_requests_total", **labels)
+
+
+@app.on_event("shutdown")
+def shutdown_pool():
+    """Stops the worker processes when the server shuts down."""
+    _reset_pool()
+
+
+@app.on_event("startup")
+async def start_live_heartbeat():
+    """Keeps idle live result streams open with one shared heartbeat timer."""
+    app.state.live_heartbeat = asyncio.create_task(result_hub.runHeartbeat())
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warms the server in the background, so it starts answering (and /health passes) at once."""
+    global _warmUp
+    if WARM_UP:
+        app.state.warm_up = asyncio.create_task(warm_up_server())
+    else:
+        _warmUp = {"status": "ready"}
+
+
+async def warm_up_server() -> None:
+    """
+    Takes the first request's one-time costs off it: warms this process, so the workers forked
+    from it start with reportlab loaded, then runs warm_up once in each worker of the pool.
+    A failed warm-up still marks the server ready, requests then pay the cold start themselves.
+    """
+    global _warmUp
+    start = time.perf_counter()
+    try:
+        timings = await run_in_threadpool(warm_up)
+        pool = get_pool()
+        await asyncio.gather(*(asyncio.wrap_future(pool.submit(warm_up)) for worker in range(MAX_WORKERS)))
+        _warmUp = {"status": "ready", "seconds": round(time.perf_counter() - start, 3),
+                   "stages": {stage: round(seconds, 3) for stage, seconds in timings["stages"].items()}}
+        logger.info("Warmed up in %.2f s", _warmUp["seconds"])
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        _warmUp = {"status": "ready", "error": str(e)}
+
+
+def _job_finished() -> None:
+    """Frees an admission slot once a worker is actually done with a job."""
+    global _activeJobs
+    _activeJobs -= 1
+
+
+def _reset_pool() -> None:
+    """Drops a pool whose worker died (e.g. out of memory) so the next job starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def check_capacity(numJobs: int) -> None:
+    """Raises 503 with Retry-After unless numJobs more jobs fit in the pool and its queue."""
+    if _activeJobs + numJobs > MAX_WORKERS + MAX_QUEUED_JOBS:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy generating other heat sheets, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER)}
+        )
+
+
+async def run_job(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) in the process pool with admission control.
+    Raises 503 with Retry-After when every worker and queue slot is taken, and 504 when
+    the job does not finish within JOB_TIMEOUT of being admitted (time spent waiting for a
+    free worker counts). A queued job that times out is cancelled, a running one keeps its
+    slot until the worker finishes it, so runaway meets can't oversubscribe the container.
+    """
+    global _activeJobs
+    check_capacity(1)
+
+    try:
+        future = get_pool().submit(func, *args, **kwargs)
+    except BrokenProcessPool:
+        _reset_pool()
+        future = get_pool().submit(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    _activeJobs += 1
+    future.add_done_callback(lambda f: loop.call_soon_threadsafe(_job_finished))
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=JOB_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Heat sheet generation took longer than {JOB_TIMEOUT:g} seconds")
+    except BrokenProcessPool:
+        _reset_pool()
+        raise HTTPException(
+            status_code=503,
+            detail="Heat sheet worker stopped unexpectedly, please retry",
+            headers={"Retry-After": str(RETRY_AFTER)}
+        )
+
+
+@app.get("/health")
+async def health():
+    """Liveness check, answered from the event loop even while workers are busy."""
+    return {"status": "ok", "active_jobs": _activeJobs, "max_workers": MAX_WORKERS}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness check for startup probes: 503 while the server warms up, 200 once heat sheets
+    no longer pay for loading the PDF renderers and league config.
+    """
+    if _warmUp["status"] != "ready":
+        return JSONResponse(status_code=503, content=_warmUp)
+    return _warmUp
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request latency, build stage, PDF size and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profiles/{name}")
+async def get_profile(name: str):
+    """Downloads a profile captured for a request, named by the X-Profile header of its response."""
+    path = os.path.join(PROFILE_DIR, os.path.basename(name)) if PROFILE_DIR else None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"No profile named '{name}'")
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+@app.get("/leagues")
+async def list_leagues():
+    """Names of the leagues this server has configs for."""
+    return {"leagues": config_registry.leagues()}
+
+
+def get_league_config(league: Optional[str]):
+    """Returns a league's compiled config, or raises 404/400 for unknown or invalid leagues."""
+    try:
+        return load_config(league)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown league '{league}'")
+    except ConfigError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def times_version() -> Optional[str]:
+    """Version of the seed times database, part of the cache key so new results invalidate PDFs.
+    Queries SQLite, so handlers call it through run_in_threadpool to keep the event loop free."""
+    if not TIMES_DB:
+        return None
+    timesDatabase = TimesDatabase(TIMES_DB, readOnly=True)
+    try:
+        return timesDatabase.version()
+    finally:
+        timesDatabase.close()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and size of the heat sheet cache."""
+    return heat_sheet_cache.stats()
+
+
+class UploadTooLarge(Exception):
+    """Raised while reading an uploaded file that is over MAX_UPLOAD_BYTES."""
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Reads an uploaded file's bytes on demand, hashing and counting them as they pass through.
+    Raises UploadTooLarge as soon as more than limit bytes have been read.
+    """
+
+    def __init__(self, file, limit: int):
+        self._file = file
+        self._limit = limit
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._file.read(len(buffer))
+        self.size += len(data)
+        if self.size > self._limit:
+            raise UploadTooLarge()
+        self.sha256.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def parse_csv_file(file, limit: int) -> tuple:
+    """
+    Decodes and splits a .csv file object into rows a block at a time, so its raw bytes and
+    decoded text are never held whole. The parsed rows are: the file's hash has to be known for
+    the cache lookup before any build starts, and the rows are then pickled to a pool worker,
+    so they cannot be fed to the importer lazily. Memory is bounded by MAX_UPLOAD_BYTES.
+    Returns the rows (header included) and the sha256 of the bytes.
+    """
+    reader = HashingReader(file, limit)
+    text = io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8-sig", newline="")
+    rows = list(csv.reader(text))
+    return rows, reader.sha256.hexdigest()
+
+
+async def read_csv_upload(upload: UploadFile) -> tuple:
+    """
+    Parses an uploaded .csv file straight from the request's spooled upload, off the event loop.
+    Returns the rows (header included) and the sha256 hex digest of the uploaded bytes.
+    Raises 413 for files over MAX_UPLOAD_BYTES, checked from the part's size before reading when known.
+    """
+    too_large = HTTPException(status_code=413, detail=f"{upload.filename} is larger than {MAX_UPLOAD_BYTES} bytes")
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise too_large
+    await upload.seek(0)
+    try:
+        return await run_in_threadpool(parse_csv_file, upload.file, MAX_UPLOAD_BYTES)
+    except UploadTooLarge:
+        raise too_large
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"{upload.filename} is not a UTF-8 .csv file")
+
+async def read_entry_uploads(swimmers: List[UploadFile], relays: List[UploadFile]) -> tuple:
+    """
+    Parses the uploaded swimmer and relay .csv files, skipping other files.
+    Returns the swimmer rows, their hashes, the relay rows and their hashes, in upload order.
+    """
+    parsed = []
+    for uploads in (swimmers, relays or []):
+        files = []
+        hashes = []
+        for f in uploads:
+            if not f.filename.endswith('.csv'):
+                continue
+            rows, digest = await read_csv_upload(f)
+            files.append(rows)
+            hashes.append(digest)
+        parsed.extend((files, hashes))
+    return tuple(parsed)
 
 @app.post("/generate")
 async def generate_heat_sheet(
-    background_tasks: BackgroundTasks,
     meet_name: str = Form(...),
     num_lanes: int = Form(6),
     empty_lanes: bool = Form(False),
     swimmers: List[UploadFile] = File(...),
-    relays: Optional[List[UploadFile]] = File(None)
+    relays: List[UploadFile] = File([]),
+    league: Optional[str] = Form(None),
+    seeding: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None)
 ):
-    # Create a base temporary directory for this request
-    temp_dir = tempfile.mkdtemp(prefix="meet_management_")
-    
-    # Subdirectories for organized temp files
-    data_dir = os.path.join(temp_dir, "data")
-    event_out_dir = os.path.join(temp_dir, "event_outputs")
-    pdf_out_dir = os.path.join(temp_dir, "pdf_outputs")
-    
-    os.makedirs(data_dir, exist_ok=True)
-    os.makedirs(event_out_dir, exist_ok=True)
-    os.makedirs(pdf_out_dir, exist_ok=True)
-    
-    # Schedule cleanup to run after response is sent
-    background_tasks.add_task(cleanup_temp_dir, temp_dir)
-    
+    """
+    Builds a heat sheet PDF from uploaded entry files.
+    The response's Server-Timing header lists how long each stage took, X-PDF-Pages and
+    X-PDF-Bytes describe the PDF. When MEET_PROFILE_DIR is set, profile ('cprofile' or
+    'tracemalloc') profiles this request's build, skipping the cache, and X-Profile names the
+    report, downloadable from /profiles/{name}.
+    """
+    if seeding is not None and seeding not in METHODS:
+        raise HTTPException(status_code=400, detail=f"seeding must be one of {', '.join(METHODS)}")
+    if profile is not None:
+        if not PROFILE_DIR:
+            raise HTTPException(status_code=403, detail="Profiling is disabled, set MEET_PROFILE_DIR to enable it")
+        if profile not in PROFILE_MODES:
+            raise HTTPException(status_code=400, detail=f"profile must be one of {', '.join(PROFILE_MODES)}")
+    start = time.perf_counter()
     try:
-        swimmer_files = []
-        relay_files = []
-        
-        # Save swimmer files
-        for f in swimmers:
-            if not f.filename.endswith('.csv'):
-                continue
-            file_path = os.path.join(data_dir, f.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(f.file, buffer)
-            swimmer_files.append(file_path)
-            
-        # Save relay files
-        if relays:
-            for f in relays:
-                if not f.filename.endswith('.csv'):
-                    continue
-                file_path = os.path.join(data_dir, f.filename)
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(f.file, buffer)
-                relay_files.append(file_path)
-                
-        # Call core logic
-        pdf_path = generate_meet_pdf(
-            meetName=meet_name,
-            numLanes=num_lanes,
-            emptyLanes=empty_lanes,
-            swimmer_files=swimmer_files,
-            relay_files=relay_files,
-            temp_dir=event_out_dir,
-            pdf_out_dir=pdf_out_dir
-        )
-        
-        # Return the generated PDF
-        return FileResponse(
-            path=pdf_path,
-            filename=f"{meet_name}.pdf",
-            media_type="application/pdf"
+        swimmer_files, swimmer_hashes, relay_files, relay_hashes = await read_entry_uploads(swimmers, relays)
+
+        # Identical uploads get the same key, and the key seeds the heats so they match too
+        config = get_league_config(league)
+        key = cacheKey(swimmer_hashes, relay_hashes, config.digest, num_lanes, empty_lanes, meet_name, await run_in_threadpool(times_version), seeding)
+        pdf_bytes = heat_sheet_cache.get(key) if profile is None else None
+        cache_status = "HIT"
+        headers = {"Content-Disposition": f'attachment; filename="{meet_name}.pdf"'}
+        if pdf_bytes is None:
+            cache_status = "MISS" if profile is None else "BYPASS"
+            profile_path = None
+            if profile is not None:
+                profile_name = f"{key[:16]}-{int(time.time())}.{'prof' if profile == 'cprofile' else 'txt'}"
+                profile_path = os.path.join(PROFILE_DIR, profile_name)
+                headers["X-Profile"] = profile_name
+            # Call core logic in a worker process, building the PDF into memory
+            pdf_bytes, timings = await run_job(
+                generate_meet_pdf_timed,
+                meet_name,
+                num_lanes,
+                empty_lanes,
+                swimmer_files,
+                relay_files,
+                key,
+                config.league,
+                seeding=seeding,
+                profile=profile,
+                profile_path=profile_path
+            )
+            if profile is None:
+                heat_sheet_cache.put(key, pdf_bytes)
+            metrics.observeTimings(timings)
+            headers["Server-Timing"] = serverTiming(timings)
+            headers["X-PDF-Pages"] = str(timings["pdf_pages"])
+            logger.info("Generated %s: %s", meet_name, json.dumps(timings, separators=(",", ":")))
+        metrics.increment("heat_sheet_cache_total", result=cache_status.lower())
+        headers["X-Cache"] = cache_status
+        headers["X-PDF-Bytes"] = str(len(pdf_bytes))
+        elapsed = f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+        headers["Server-Timing"] = f"{headers['Server-Timing']}, {elapsed}" if "Server-Timing" in headers else elapsed
+
+        # Return the generated PDF straight from the buffer
+        return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/meets")
+async def publish_meet(
+    meet_name: str = Form(...),
+    num_lanes: int = Form(6),
+    empty_lanes: bool = Form(False),
+    swimmers: List[UploadFile] = File(...),
+    relays: List[UploadFile] = File([]),
+    league: Optional[str] = Form(None),
+    seeding: Optional[str] = Form(None)
+):
+    """
+    Computes a meet from uploaded entry files and publishes it for the event pages.
+    Takes the same fields as /generate, and the same uploads give the same heats as its PDF.
+    Returns the meet's ID, the URLs of its first JSON and HTML pages and of its heat sheet.
+    """
+    if seeding is not None and seeding not in METHODS:
+        raise HTTPException(status_code=400, detail=f"seeding must be one of {', '.join(METHODS)}")
+    try:
+        swimmer_files, swimmer_hashes, relay_files, relay_hashes = await read_entry_uploads(swimmers, relays)
+        config = get_league_config(league)
+        key = cacheKey(swimmer_hashes, relay_hashes, config.digest, num_lanes, empty_lanes, meet_name, await run_in_threadpool(times_version), seeding)
+        meet_id = key[:24]
+        if not meet_store.exists(meet_id):
+            snapshot = await run_job(
+                generate_meet_snapshot,
+                meet_name,
+                num_lanes,
+                empty_lanes,
+                swimmer_files,
+                relay_files,
+                key,
+                config.league,
+                seeding=seeding,
+                meet_id=meet_id
+            )
+            await run_in_threadpool(meet_store.save, meet_id, snapshot)
+        return {"meet_id": meet_id, "json": f"/meets/{meet_id}/events", "html": f"/meets/{meet_id}/events.html",
+                "pdf": f"/meets/{meet_id}/pdf"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def published_page(request: Request, meet_id: str, cursor: Optional[int], limit: int):
+    """
+    Loads a page of a published meet, or returns a 304 response when the client's copy is current.
+    Raises 404 for unknown meets and 400 for a bad limit.
+    """
+    etag = f'"{meet_id}-{cursor}-{limit}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PUBLISHED_MAX_AGE}, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return None, Response(status_code=304, headers=headers)
+    try:
+        return meet_store.page(meet_id, cursor, limit), headers
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No published meet '{meet_id}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/meets/{meet_id}/events")
+async def meet_events(request: Request, meet_id: str, cursor: Optional[int] = None, limit: int = 1):
+    """
+    A page of a published meet's events as JSON, starting at event number cursor.
+    The next and prev fields are the cursors of the neighbouring pages.
+    """
+    page, headers = await run_in_threadpool(published_page, request, meet_id, cursor, limit)
+    if page is None:
+        return headers
+    body = json.dumps(page, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/meets/{meet_id}/events.html")
+async def meet_events_html(request: Request, meet_id: str, cursor: Optional[int] = None, limit: int = 1):
+    """A page of a published meet's events as a small HTML view with previous and next links."""
+    page, headers = await run_in_threadpool(published_page, request, meet_id, cursor, limit)
+    if page is None:
+        return headers
+    link = lambda target: f"/meets/{meet_id}/events.html?cursor={target}&limit={limit}"
+    return HTMLResponse(renderPageHtml(page, link), headers=headers)
+
+
+@app.get("/meets/{meet_id}/pdf")
+async def meet_pdf(request: Request, meet_id: str):
+    """
+    The heat sheet of a published meet, rendered from its snapshot with exactly the heats
+    it was published with. Workers map the snapshot instead of recomputing the meet.
+    """
+    etag = f'"{meet_id}-pdf"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PUBLISHED_MAX_AGE}, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    try:
+        path = meet_store.path(meet_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No published meet '{meet_id}'")
+
+    key = f"meet:{meet_id}"
+    pdf_bytes = heat_sheet_cache.get(key)
+    cache_status = "HIT"
+    if pdf_bytes is None:
+        cache_status = "MISS"
+        pdf_bytes, timings = await run_job(generate_snapshot_pdf_timed, path)
+        heat_sheet_cache.put(key, pdf_bytes)
+        metrics.observeTimings(timings)
+        headers["Server-Timing"] = serverTiming(timings)
+        headers["X-PDF-Pages"] = str(timings["pdf_pages"])
+    metrics.increment("heat_sheet_cache_total", result=cache_status.lower())
+    headers["X-Cache"] = cache_status
+    headers["Content-Disposition"] = f'attachment; filename="{meet_id}.pdf"'
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+@app.get("/meets/{meet_id}/cards/{kind}")
+async def meet_cards(meet_id: str, kind: str):
+    """
+    Lane timer cards ('timer') or swimmer entry cards ('entry') for a published meet.
+    Cards are streamed to a file next to the snapshot by a pool worker the first time they
+    are asked for, and served from it afterwards.
+    """
+    try:
+        path = meet_store.path(meet_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No published meet '{meet_id}'")
+
+    from cards import CARD_KINDS # already loaded by warm_up, see main.warm_up
+    if kind not in CARD_KINDS:
+        raise HTTPException(status_code=404, detail=f"Card kind must be one of {', '.join(CARD_KINDS)}")
+
+    cards_path = os.path.join(MEET_STORE_DIR, f"{meet_id}-{kind}-cards.pdf")
+    if not os.path.isfile(cards_path):
+        # Every build writes its own temporary file, concurrent builds of the same cards each
+        # replace the file with a complete PDF
+        descriptor, partial_path = tempfile.mkstemp(dir=MEET_STORE_DIR, suffix=".tmp")
+        os.close(descriptor)
+        try:
+            await run_job(generate_snapshot_cards, path, kind, partial_path)
+            os.replace(partial_path, cards_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    headers = {"Cache-Control": f"public, max-age={PUBLISHED_MAX_AGE}, immutable"}
+    return FileResponse(cards_path, media_type="application/pdf", filename=f"{meet_id}-{kind}-cards.pdf", headers=headers)
+
+
+@app.post("/generate/batch")
+async def generate_batch(
+    meets: str = Form(...),
+    shared_swimmers: List[UploadFile] = File([]),
+    shared_relays: List[UploadFile] = File([]),
+    entries: List[UploadFile] = File([]),
+    league: Optional[str] = Form(None),
+    format: str = Form("zip")
+):
+    """
+    Builds heat sheets for several meets from one shared roster upload.
+    meets is a JSON list of '{name, lanes, empty_lanes, teams, swimmer_files, relay_files, seed}'
+    where swimmer_files and relay_files name files uploaded as entries.
+    Returns a zip of PDFs with timings.json, or JSON with base64 PDFs when format is 'json'.
+    """
+    try:
+        definitions = json.loads(meets)
+        if not isinstance(definitions, list) or not definitions:
+            raise ValueError("meets must be a non-empty JSON list")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid meets: {e}")
+
+    config = get_league_config(league)
+    check_capacity(len(definitions))
+
+    try:
+        shared_swimmer_files = [(await read_csv_upload(f))[0] for f in shared_swimmers if f.filename.endswith('.csv')]
+        shared_relay_files = [(await read_csv_upload(f))[0] for f in shared_relays if f.filename.endswith('.csv')]
+        entry_rows = {}
+        for f in entries:
+            rows, digest = await read_csv_upload(f)
+            entry_rows[f.filename] = rows
+
+        # Swap entry file names for their parsed rows, a file may be shared by several meets
+        for definition in definitions:
+            for field in ("swimmer_files", "relay_files"):
+                names = definition.get(field, [])
+                missing = [name for name in names if name not in entry_rows]
+                if missing:
+                    raise HTTPException(status_code=400, detail=f"Meet '{definition.get('name')}' references missing entry files {missing}")
+                definition[field] = [entry_rows[name] for name in names]
+
+        start = asyncio.get_running_loop().time()
+        roster = await run_in_threadpool(parseSharedRoster, shared_swimmer_files, shared_relay_files, config)
+        jobs = await run_in_threadpool(meetJobs, definitions, roster, config)
+        tasks = [asyncio.ensure_future(run_job(buildBatchMeet, *args)) for args in jobs]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # One meet failed (503/504), stop waiting for the others and free their queue slots
+            for task in tasks:
+                task.cancel()
+            raise
+        batch = {
+            "meets": results,
+            "parse_seconds": roster["seconds"],
+            "total_seconds": asyncio.get_running_loop().time() - start
+        }
+
+        if format == "json":
+            timings = batchTimings(batch)
+            for summary, result in zip(timings["meets"], results):
+                summary["pdf"] = base64.b64encode(result["pdf"]).decode("ascii")
+            return timings
+
+        return Response(
+            content=zipBatch(batch),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="heat_sheets.zip"'}
         )
-        
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        # If an error occurs, cleanup still runs via background task? 
-        # Actually, if we return an exception, background tasks might not run depending on middleware.
-        # But FastAPI does run background tasks on unhandled exceptions in some versions, or we can just let it raise.
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/live/results")
+async def publish_results(request: Request):
+    """
+    Broadcasts a heat's results to every live spectator.
+    The body is a JSON delta such as '{event, heat, results: [{lane, name, team, time, place}]}'.
+    Requires the X-Live-Token header when MEET_LIVE_TOKEN is set.
+    """
+    if LIVE_TOKEN and request.headers.get("x-live-token") != LIVE_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid live results token")
+    try:
+        delta = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Results must be a JSON object")
+    if not isinstance(delta, dict):
+        raise HTTPException(status_code=400, detail="Results must be a JSON object")
+    return {"sequence": result_hub.publish(delta)}
+
+
+@app.get("/live/stream")
+async def stream_results(request: Request, since: Optional[int] = None):
+    """
+    Server-Sent Events stream of result deltas as they are published.
+    Reconnecting clients resume after the Last-Event-ID header (or since) without reloading the meet.
+    """
+    last_id = request.headers.get("last-event-id")
+    if last_id is not None and last_id.isdigit():
+        since = int(last_id)
+    return StreamingResponse(
+        result_hub.stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/live/stats")
+async def live_stats():
+    """Connected spectators and fan-out cost of the live results hub."""
+    return result_hub.stats()
@@ -0,0 +1,223 @@
+# Builds heat sheets for several meets at once from one shared roster load
+# Last modified 10/18/2026
+
+import io, json, os, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+from meet import Meet, openRows
+from main import load_config, applyTimes, PDF_RENDERER
+from ingest import loadEntries
+import test
+
+
+def readRows(source) -> list:
+    """
+    Parses a .csv path, open text stream or iterable of rows into a list of rows, header excluded
+    """
+    with openRows(source) as rows:
+        return [row for row in rows if row]
+
+
+def parseSharedRoster(swimmer_files : list, relay_files : list, config) -> dict:
+    """
+    Parses roster files shared by every meet in a batch once
+    Swimmer files may be in any format ingest.loadEntries detects
+
+    Returns:
+        dict: '{"swimmers": rows, "relays": rows, "seconds": parse time}'
+    """
+    start = time.perf_counter()
+    swimmerRows = loadEntries(swimmer_files, config)["swimmers"]
+    relayRows = []
+    for source in relay_files:
+        relayRows.extend(readRows(source))
+    return {"swimmers": swimmerRows, "relays": relayRows, "seconds": time.perf_counter() - start}
+
+
+def _teamFilter(teams, config) -> set:
+    """
+    Returns the team IDs a meet is limited to, or None for every team
+    Teams may be given by ID or by name, see CompiledConfig.teamID
+    """
+    if not teams:
+        return None
+    return {config.teamID(team) for team in teams}
+
+
+def checkMeetName(name) -> str:
+    """
+    Returns a meet name if it is safe to use as a file name in a batch's zip
+
+    Raises:
+        ValueError: If the name is empty, '.' or '..', or contains a path separator
+    """
+    if not isinstance(name, str) or name.strip() in ("", ".", "..") or "/" in name or "\\" in name:
+        raise ValueError(f"Invalid meet name {name!r}, names can't be empty, '.', '..' or contain '/' or '\\'")
+    return name
+
+
+def meetJobArgs(definition : dict, roster : dict, config, seed = None) -> tuple:
+    """
+    Selects a meet's entries from the shared roster and returns the arguments for buildBatchMeet
+
+    Args:
+        definition (dict): Formatted as '{name, lanes, empty_lanes, teams, swimmer_files, relay_files}'
+            where teams (IDs or names) limits the shared roster and the files add entries for this meet only
+        roster (dict): Output of parseSharedRoster
+        config (CompiledConfig): League config used to map relay team names to IDs and read entry files
+        seed (optional): Seed for repeatable heats, the definition's own 'seed' takes precedence
+
+    Raises:
+        ValueError: If the meet's name can't be used as a file name, see checkMeetName
+    """
+    checkMeetName(definition.get("name"))
+    teamIDs = _teamFilter(definition.get("teams"), config)
+    if teamIDs is None:
+        swimmerRows = list(roster["swimmers"])
+        relayRows = list(roster["relays"])
+    else:
+        swimmerRows = [row for row in roster["swimmers"] if len(row) > 4 and config.teamID(row[4]) in teamIDs]
+        relayRows = [row for row in roster["relays"] if config.teamID(row[0]) in teamIDs]
+
+    swimmerRows.extend(loadEntries(definition.get("swimmer_files", []), config)["swimmers"])
+    for source in definition.get("relay_files", []):
+        relayRows.extend(readRows(source))
+
+    return (
+        definition["name"],
+        int(definition.get("lanes", 6)),
+        bool(definition.get("empty_lanes", False)),
+        swimmerRows,
+        relayRows,
+        definition.get("seed", seed),
+        config.league,
+    )
+
+
+def meetJobs(definitions : list, roster : dict, config, seed = None) -> list:
+    """
+    Returns the buildBatchMeet arguments of every meet in a batch, see meetJobArgs
+    """
+    return [meetJobArgs(definition, roster, config, seed) for definition in definitions]
+
+
+def buildBatchMeet(meetName : str, numLanes : int, emptyLanes : bool, swimmerRows : list, relayRows : list, seed = None, league : str = None) -> dict:
+    """
+    Builds one meet of a batch from already parsed rows, meant to run in a worker process
+
+    Returns:
+        dict: '{name, pdf, swimmers, timings}' with the PDF bytes and per-stage seconds
+    """
+    timings = {}
+    start = time.perf_counter()
+    meetObject = Meet(meetName, load_config(league), numLanes, emptyLanes, seed=seed)
+    meetObject.importRelayRows(relayRows)
+    meetObject.importSwimmerRows(swimmerRows)
+    timings["import"] = time.perf_counter() - start
+
+    stageStart = time.perf_counter()
+    meetObject.generateEvents()
+    applyTimes(meetObject)
+    timings["events"] = time.perf_counter() - stageStart
+
+    from pdfGen import buildHeatSheetBytes # loads reportlab, see main.warm_up
+    stageStart = time.perf_counter()
+    pdf = buildHeatSheetBytes(meetName, meetObject.getRenderModels(), renderer=PDF_RENDERER)
+    timings["render"] = time.perf_counter() - stageStart
+    timings["total"] = time.perf_counter() - start
+
+    return {"name": meetName, "pdf": pdf, "swimmers": len(swimmerRows), "timings": timings}
+
+
+def generateMeetBatch(definitions : list, shared_swimmer_files : list = None, shared_relay_files : list = None,
+                      league : str = None, maxWorkers : int = None, seed = None) -> dict:
+    """
+    Builds heat sheets for several meets concurrently across worker processes
+    Shared roster files are parsed once and each meet receives only its teams' rows
+
+    Args:
+        definitions (list): Meet definitions, see meetJobArgs
+        shared_swimmer_files (list): Swimmer .csv paths or streams shared by every meet
+        shared_relay_files (list): Relay .csv paths or streams shared by every meet
+        league (str): League config to use
+        maxWorkers (int): Worker processes, defaults to one per core
+        seed (optional): Seed for repeatable heats
+
+    Returns:
+        dict: '{"meets": [buildBatchMeet results in definition order], "parse_seconds", "total_seconds"}'
+    """
+    start = time.perf_counter()
+    config = load_config(league)
+    roster = parseSharedRoster(shared_swimmer_files or [], shared_relay_files or [], config)
+    jobs = meetJobs(definitions, roster, config, seed)
+
+    with ProcessPoolExecutor(max_workers=maxWorkers) as pool:
+        futures = [pool.submit(buildBatchMeet, *args) for args in jobs]
+        results = [future.result() for future in futures]
+
+    return {"meets": results, "parse_seconds": roster["seconds"], "total_seconds": time.perf_counter() - start}
+
+
+def zipBatch(batch : dict) -> bytes:
+    """
+    Packs a batch's PDFs into a zip along with a timings.json summary
+    Meets sharing a name are numbered, 'Pool.pdf', 'Pool (2).pdf' and so on
+    """
+    buffer = io.BytesIO()
+    used = {"timings.json"}
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in batch["meets"]:
+            name = checkMeetName(result["name"])
+            fileName = f"{name}.pdf"
+            copy = 1
+            while fileName.lower() in used:
+                copy += 1
+                fileName = f"{name} ({copy}).pdf"
+            used.add(fileName.lower())
+            archive.writestr(fileName, result["pdf"])
+        archive.writestr("timings.json", json.dumps(batchTimings(batch), indent=2))
+    return buffer.getvalue()
+
+
+def batchTimings(batch : dict) -> dict:
+    """
+    Returns a batch's timings without the PDF bytes
+    """
+    return {
+        "parse_seconds": batch.get("parse_seconds"),
+        "total_seconds": batch.get("total_seconds"),
+        "meets": [{"name": r["name"], "swimmers": r["swimmers"], "pdf_bytes": len(r["pdf"]), "timings": r["timings"]}
+                  for r in batch["meets"]],
+    }
+
+
+def testBatch():
+    header = ["First", "Last", "Age", "Gender", "Team", "Event 1", "Event 2", "Event 3", "Free Relay", "Medley Relay"]
+    swimmers = [header,
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "", "", "no", "no"],
+        ["Cat", "Cedar", "9", "f", "eff", "free", "fly", "", "no", "no"],
+        ["Dot", "Dale", "10", "f", "Islands", "back", "", "", "no", "no"], # team given by name
+    ]
+    relays = [["Team", "Age Group", "Gender", "Stroke", "Relay", "Swimmer 1", "Swimmer 2", "Swimmer 3", "Swimmer 4"],
+              ["Islands", "9 & 10", "girls", "free", "A", "Ann Ash", "b", "c", "d"]]
+    meets = [
+        {"name": "Pool A", "teams": ["eff"], "seed": 1},
+        {"name": "Pool B", "lanes": 8, "teams": ["Islands", "lib"], "seed": 1},
+        {"name": "Pool B", "teams": ["ISL "], "seed": 1},
+    ]
+    batch = generateMeetBatch(meets, [swimmers], [relays], maxWorkers=1)
+    test.testEqual([(r["name"], r["swimmers"]) for r in batch["meets"]], [("Pool A", 1), ("Pool B", 3), ("Pool B", 2)])
+    with zipfile.ZipFile(io.BytesIO(zipBatch(batch))) as archive:
+        test.testEqual(archive.namelist(), ["Pool A.pdf", "Pool B.pdf", "Pool B (2).pdf", "timings.json"])
+        test.testEqual(archive.read("Pool B (2).pdf"), batch["meets"][2]["pdf"])
+        test.testEqual(json.loads(archive.read("timings.json"))["meets"][0]["pdf_bytes"], len(batch["meets"][0]["pdf"]))
+    for name in ("../x", "a\\b", ".."):
+        try:
+            meetJobArgs({"name": name}, {"swimmers": [], "relays": []}, load_config())
+            test.testEqual(name, "rejected")
+        except ValueError:
+            test.testEqual(True, True)
+
+
+if __name__ == "__main__":
+    testBatch()
@@ -0,0 +1,550 @@
+# Performance benchmarks for meet generation
+# Last modified 10/18/2026
+
+import asyncio, contextlib, io, json, os, platform, random, statistics, subprocess, sys, tempfile, time, tracemalloc
+from datetime import datetime, timezone
+from swimmer import Swimmer
+from meet import Meet
+from pdfGen import generateHeatSheet, buildHeatSheetBytes, RENDERERS
+from syntheticLeague import generateLeague, leagueConfig, writeLeague
+from sectionedPdf import buildSectionedHeatSheetBytes, meetSections
+from meetSnapshot import MeetSnapshot, packMeet
+from cards import CARD_KINDS, writeCards
+from combineEvents import OPTIMAL, combinationReport
+from timesDB import TimesDatabase, swimmerKey
+from liveResults import ResultHub
+
+STROKES = ["free", "breast", "im", "back", "fly"]
+TEAMS = ["eff", "hab", "isl", "wc", "lib"]
+PIPELINE_SCALES = ((5, 40), (10, 150), (20, 400)) # (teams, swimmers per team)
+PIPELINE_STAGES = ("importFile", "generateEvents", "combineSmallEvents", "generateTxtFiles", "generateHeatSheet")
+STARTUP_MODULES = ("main", "api") # the CLI's and the server's entry points
+DEFERRED_MODULES = ("reportlab", "pypdf", "pdfGen", "cards", "sectionedPdf") # loaded on first render, not at startup
+
+
+class _DictSwimmer:
+    """
+    The original dict-backed swimmer layout, kept only as a benchmark baseline
+    """
+
+    def __init__(self, swimID : str, infoLine : list):
+        self.userID_ = swimID
+        self.firstName_ = infoLine[0].title()
+        self.lastName_ = infoLine[1].title()
+        self.age_ = infoLine[2]
+        self.gender_ = infoLine[3][0].lower()
+        self.team_ = infoLine[4]
+        self.event1_ = infoLine[5].lower().strip()
+        self.event2_ = infoLine[6].lower().strip()
+        self.event3_ = infoLine[7].lower().strip()
+        self.medley_ = infoLine[8]
+        self.free_ = infoLine[9]
+
+
+def _swimmerRow(rng : random.Random, index : int) -> list:
+    """
+    Returns one entry row in the template format with fresh strings, like csv.reader produces
+    """
+    events = rng.sample(STROKES, 3)
+    return [f"first{index}", f"last{index}", str(rng.randint(5, 15)), rng.choice(["m", "f"]),
+            rng.choice(TEAMS), *events, rng.choice(["yes", "no"]), rng.choice(["yes", "no"])]
+
+
+def _measureStore(swimmerClass, numSwimmers : int, seed : int) -> tuple:
+    """
+    Builds numSwimmers swimmers from freshly parsed rows
+
+    Returns:
+        tuple: (bytes retained per swimmer, milliseconds per 1,000 swimmers constructed)
+    """
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = []
+    for i in range(numSwimmers):
+        store.append(swimmerClass(f"id{i}", _swimmerRow(rng, i)))
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # Best of five timed runs over the same rows
+    rng = random.Random(seed)
+    rows = [_swimmerRow(rng, i) for i in range(numSwimmers)]
+    elapsed = None
+    for run in range(5):
+        start = time.perf_counter()
+        store = [swimmerClass(f"id{i}", row) for i, row in enumerate(rows)]
+        runTime = time.perf_counter() - start
+        if elapsed is None or runTime < elapsed:
+            elapsed = runTime
+    return retained / numSwimmers, elapsed / numSwimmers * 1000 * 1000
+
+
+def benchSwimmerStore(numSwimmers : int = 20000, seed : int = 0) -> dict:
+    """
+    Compares memory per swimmer and construction time of Swimmer against the original layout
+    """
+    oldBytes, oldTime = _measureStore(_DictSwimmer, numSwimmers, seed)
+    newBytes, newTime = _measureStore(Swimmer, numSwimmers, seed)
+    print(f"{'Layout':10} {'Bytes/swimmer':>14} {'ms/1000':>10}")
+    print(f"{'dict':10} {oldBytes:14.0f} {oldTime:10.2f}")
+    print(f"{'slots':10} {newBytes:14.0f} {newTime:10.2f}")
+    print(f"Memory per swimmer reduced {oldBytes / newBytes:.1f}x, construction time ratio {oldTime / newTime:.2f}")
+    return {
+        "swimmers": numSwimmers,
+        "dict_bytes_per_swimmer": oldBytes,
+        "slots_bytes_per_swimmer": newBytes,
+        "dict_ms_per_1000": oldTime,
+        "slots_ms_per_1000": newTime,
+    }
+
+
+def benchSeedTimes(numEntries : int = 1000, numSwimmers : int = 5000, resultsPerSwimmer : int = 40, seed : int = 0) -> dict:
+    """
+    Times the batched best time lookup for a meet against one query per entry
+    """
+    rng = random.Random(seed)
+    database = TimesDatabase()
+    swimmers = [(f"First{i} Last{i}", rng.choice(TEAMS)) for i in range(numSwimmers)]
+    database.addResults(
+        (swimmerKey(name, team), rng.choice(STROKES), rng.choice((25, 50, 100)), "SCY", rng.uniform(15, 120), None, None)
+        for name, team in swimmers for result in range(resultsPerSwimmer)
+    )
+    entries = [(*rng.choice(swimmers), rng.choice(STROKES), rng.choice(("25", "50", "100"))) for i in range(numEntries)]
+
+    start = time.perf_counter()
+    best = database.bestTimes(entries)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for entry in entries:
+        database.bestTimes([entry])
+    single = time.perf_counter() - start
+
+    print(f"{len(swimmers) * resultsPerSwimmer} results, {numEntries} entries, {len(best)} with times")
+    print(f"Batched lookup {batched * 1000:.2f} ms, one query per entry {single * 1000:.2f} ms")
+    database.close()
+    return {"results": len(swimmers) * resultsPerSwimmer, "entries": numEntries, "batched_ms": batched * 1000, "per_entry_ms": single * 1000}
+
+
+def benchLiveFanout(numClients : int = 5000, numMessages : int = 200, slowClients : int = 50, bufferSize : int = 64) -> dict:
+    """
+    Simulates spectators connected to the live results hub, a few of which never read,
+    and measures the cost of publishing each heat's results to all of them
+    """
+    async def run():
+        hub = ResultHub(bufferSize=bufferSize)
+        received = [0]
+
+        async def spectator(subscriber):
+            async for message in subscriber.messages():
+                received[0] += 1
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        readers = [asyncio.create_task(spectator(hub.subscribe())) for client in range(numClients)]
+        stalled = [hub.subscribe() for client in range(slowClients)]
+        await asyncio.sleep(0)
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        results = [{"lane": lane, "name": f"Swimmer {lane}", "team": "ISL", "time": "32.15", "place": lane} for lane in range(1, 7)]
+        start = time.perf_counter()
+        for message in range(numMessages):
+            hub.publish({"event": message // 4 + 1, "heat": message % 4 + 1, "results": results})
+            while received[0] < (message + 1) * numClients: # every reading spectator has the heat
+                await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+
+        stats = hub.stats()
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        return memory, elapsed, received[0], stats
+
+    memory, elapsed, received, stats = asyncio.run(run())
+    print(f"{numClients} spectators + {slowClients} stalled, {numMessages} heats published")
+    print(f"Fan-out {stats['fanout_ms_per_message']:.2f} ms per heat ({stats['fanout_ms_per_message'] * 1000 / (numClients + slowClients):.2f} us per client), "
+          f"{elapsed / numMessages * 1000:.2f} ms per heat including delivery")
+    print(f"{received} messages delivered, {stats['dropped']} slow spectators dropped, {memory / (numClients + slowClients):.0f} bytes per connection")
+    return {"clients": numClients, "messages": numMessages, "delivered": received, "dropped": stats["dropped"],
+            "fanout_ms_per_message": stats["fanout_ms_per_message"], "ms_per_message": elapsed / numMessages * 1000,
+            "bytes_per_client": memory / (numClients + slowClients)}
+
+
+def _syntheticMeet(numTeams : int, swimmersPerTeam : int, seed : int = 0) -> Meet:
+    """
+    Returns a generated meet for a synthetic league
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"), "r") as f:
+        config = leagueConfig(json.load(f), numTeams)
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        files = writeLeague(generateLeague(config, numTeams, swimmersPerTeam, seed), directory)
+        meetObject = Meet("Benchmark Meet", config, seed=seed)
+        for path in files["swimmer_files"]:
+            meetObject.importFile(path)
+        for path in files["relay_files"]:
+            meetObject.importRelays(path)
+        meetObject.generateEvents()
+    return meetObject
+
+
+def benchRenderers(numTeams : int = 12, swimmersPerTeam : int = 330, repeats : int = 3, seed : int = 0) -> dict:
+    """
+    Times each PDF renderer on the same synthetic meet, about 100 pages at the default size
+    """
+    models = _syntheticMeet(numTeams, swimmersPerTeam, seed).getRenderModels()
+
+    results = {}
+    for renderer in RENDERERS:
+        best = None
+        for run in range(repeats):
+            start = time.perf_counter()
+            pdf = buildHeatSheetBytes("Benchmark Meet", models, renderer=renderer)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None or elapsed < best else best
+        results[renderer] = {"ms": best * 1000, "bytes": len(pdf)}
+        print(f"{renderer:10} {best * 1000:8.0f} ms {len(pdf):10} bytes")
+    first, second = RENDERERS
+    print(f"{second} renderer is {results[first]['ms'] / results[second]['ms']:.1f}x faster")
+    return results
+
+
+def benchSections(numTeams : int = 12, swimmersPerTeam : int = 330, workerCounts = (1, 2, 4, 8), seed : int = 0) -> dict:
+    """
+    Times sectioned rendering with different numbers of worker processes against one pass
+    """
+    meetObject = _syntheticMeet(numTeams, swimmersPerTeam, seed)
+    sections = meetSections(meetObject)
+    start = time.perf_counter()
+    buildHeatSheetBytes("Benchmark Meet", meetObject.getRenderModels())
+    results = {"single_pass_ms": (time.perf_counter() - start) * 1000, "sections": len(sections), "workers": {}}
+    print(f"{len(sections)} sections, single pass {results['single_pass_ms']:.0f} ms on {os.cpu_count()} cores")
+    for workers in workerCounts:
+        start = time.perf_counter()
+        buildSectionedHeatSheetBytes("Benchmark Meet", sections, workers)
+        elapsed = (time.perf_counter() - start) * 1000
+        results["workers"][workers] = elapsed
+        print(f"{workers:2} workers {elapsed:8.0f} ms")
+    return results
+
+
+def benchSnapshot(numTeams : int = 12, swimmersPerTeam : int = 330, repeats : int = 20, seed : int = 0) -> dict:
+    """
+    Times opening a meet snapshot and rebuilding its render models, and the Python memory an
+    opened snapshot holds, against recomputing the meet and against a JSON copy of its models
+    """
+    start = time.perf_counter()
+    meetObject = _syntheticMeet(numTeams, swimmersPerTeam, seed)
+    models = meetObject.getRenderModels()
+    results = {"recompute_ms": (time.perf_counter() - start) * 1000}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "meet.meet")
+        with open(path, "wb") as f:
+            f.write(packMeet(meetObject, "benchmark"))
+        jsonText = json.dumps(models, separators=(",", ":"))
+        results["snapshot_bytes"] = os.path.getsize(path)
+        results["json_bytes"] = len(jsonText)
+
+        opened = []
+        for i in range(repeats):
+            start = time.perf_counter()
+            opened.append(MeetSnapshot(path))
+            results.setdefault("open_ms", []).append((time.perf_counter() - start) * 1000)
+        results["open_ms"] = statistics.median(results["open_ms"])
+        start = time.perf_counter()
+        rebuilt = opened[0].getRenderModels()
+        results["models_ms"] = (time.perf_counter() - start) * 1000
+        if rebuilt != models:
+            raise AssertionError("Snapshot render models differ from the meet's")
+
+        tracemalloc.start()
+        snapshot = MeetSnapshot(path)
+        results["snapshot_memory_bytes"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        parsed = json.loads(jsonText)
+        results["json_memory_bytes"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        json.loads(jsonText)
+        results["json_load_ms"] = (time.perf_counter() - start) * 1000
+
+    print(f"{len(models)} events, snapshot {results['snapshot_bytes'] / 1024:.0f} KiB, JSON {results['json_bytes'] / 1024:.0f} KiB")
+    print(f"recompute {results['recompute_ms']:.0f} ms, JSON load {results['json_load_ms']:.1f} ms, "
+          f"snapshot open {results['open_ms']:.3f} ms, render models from snapshot {results['models_ms']:.0f} ms")
+    print(f"held per worker: snapshot {results['snapshot_memory_bytes'] / 1024:.1f} KiB, JSON {results['json_memory_bytes'] / 1024:.0f} KiB")
+    return results
+
+
+def benchCards(scales = ((3, 330), (12, 330)), seed : int = 0) -> dict:
+    """
+    Times streaming each kind of card and the memory it peaks at, which should stay flat as
+    the meet grows
+    """
+    results = {}
+    for numTeams, swimmersPerTeam in scales:
+        meetObject = _syntheticMeet(numTeams, swimmersPerTeam, seed)
+        meetObject.organizeHeats() # so heats kept by the meet are not counted as card memory
+        for kind in CARD_KINDS:
+            with tempfile.TemporaryDirectory() as directory:
+                tracemalloc.start()
+                start = time.perf_counter()
+                pages = writeCards(kind, "Benchmark Meet", meetObject, os.path.join(directory, "cards.pdf"))
+                elapsed = (time.perf_counter() - start) * 1000
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results[(numTeams, kind)] = {"pages": pages, "ms": elapsed, "peak_bytes": peak}
+            print(f"{numTeams:3} teams {kind:6} cards {pages:6} pages {elapsed:8.0f} ms, peak {peak / 1024:6.0f} KiB")
+    return results
+
+
+def benchCombine(scales = ((3, 40), (5, 40), (12, 330)), numLanes = (6, 8), seed : int = 0) -> dict:
+    """
+    Times the optimal combine solver on synthetic meets and reports the heats and estimated
+    pool minutes it saves over the original pairs
+    """
+    results = {}
+    for numTeams, swimmersPerTeam in scales:
+        meetObject = _syntheticMeet(numTeams, swimmersPerTeam, seed)
+        items = meetObject._combineItems()
+        rules = dict(meetObject.getConfig().combineRules, strategy=OPTIMAL)
+        for lanes in numLanes:
+            for keepOrder in (True, False):
+                start = time.perf_counter()
+                report = combinationReport(items, lanes, dict(rules, keep_order=keepOrder))
+                elapsed = (time.perf_counter() - start) * 1000
+                results[(numTeams, lanes, keepOrder)] = dict(report, ms=elapsed)
+                print(f"{numTeams:3} teams {lanes} lanes {'in order ' if keepOrder else 'any order'} "
+                      f"heats {report['heats_pairs']:4} -> {report['heats_optimal']:4}, "
+                      f"saves {report['heats_saved']:3} heats {report['minutes_saved']:6.1f} min, {elapsed:6.2f} ms")
+    return results
+
+
+def _gitCommit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _runPipeline(config : dict, files : dict, directory : str) -> dict:
+    """
+    Runs the heat sheet pipeline once on a written league, timing each stage on its own
+
+    Returns:
+        dict: Stage name -> seconds, plus the meet's entry and event counts
+    """
+    timings = {}
+    meetObject = Meet("Benchmark Meet", config, seed=0)
+    with contextlib.redirect_stdout(io.StringIO()): # the stages print a line per event
+        start = time.perf_counter()
+        for path in files["swimmer_files"]:
+            meetObject.importFile(path)
+        for path in files["relay_files"]:
+            meetObject.importRelays(path)
+        timings["importFile"] = time.perf_counter() - start
+
+        # generateEvents ends with its own combining pass, which is idempotent so it is timed again alone
+        start = time.perf_counter()
+        meetObject.generateEvents()
+        timings["generateEvents"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        meetObject._combineSmallEvents()
+        timings["combineSmallEvents"] = time.perf_counter() - start
+
+        txtDir = os.path.join(directory, "Event Outputs")
+        start = time.perf_counter()
+        meetObject.generateTxtFiles(output_dir=txtDir)
+        timings["generateTxtFiles"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generateHeatSheet("Benchmark Meet", input_dir=txtDir, output_dir=os.path.join(directory, "pdf Outputs"))
+        timings["generateHeatSheet"] = time.perf_counter() - start
+
+    numbers = meetObject.getEventNumbers()
+    timings["entries"] = sum(len(meetObject.getEvent(number).getSwimmers()) for number in numbers)
+    timings["events"] = len(numbers)
+    return timings
+
+
+def benchPipeline(scales = PIPELINE_SCALES, repeats : int = 3, output : str = None, seed : int = 0) -> dict:
+    """
+    Times importFile, generateEvents, _combineSmallEvents, generateTxtFiles and generateHeatSheet
+    separately on synthetic leagues of several sizes
+
+    Args:
+        scales: '(teams, swimmers per team)' pairs
+        repeats (int): Runs per scale, each on a fresh meet, the best and median are kept
+        output (str): .json file the results are written to for compareBenchmarks, if given
+        seed (int): Seed of the synthetic leagues
+
+    Returns:
+        dict: '{commit, python, platform, created, repeats, scales: [{teams, swimmers_per_team, entries, events, stages: {stage: {best_ms, median_ms}}}]}'
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"), "r") as f:
+        baseConfig = json.load(f)
+
+    results = {
+        "commit": _gitCommit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeats": repeats,
+        "scales": [],
+    }
+    print(f"{'Teams':>5} {'Swimmers':>8} {'Entries':>7} " + " ".join(f"{stage:>18}" for stage in PIPELINE_STAGES))
+    for numTeams, swimmersPerTeam in scales:
+        config = leagueConfig(baseConfig, numTeams)
+        with tempfile.TemporaryDirectory() as directory:
+            files = writeLeague(generateLeague(config, numTeams, swimmersPerTeam, seed), os.path.join(directory, "league"))
+            runs = []
+            for run in range(repeats):
+                runDir = os.path.join(directory, f"run{run}")
+                runs.append(_runPipeline(config, files, runDir))
+
+        stages = {}
+        for stage in PIPELINE_STAGES:
+            seconds = [timings[stage] for timings in runs]
+            stages[stage] = {"best_ms": min(seconds) * 1000, "median_ms": statistics.median(seconds) * 1000}
+        results["scales"].append({"teams": numTeams, "swimmers_per_team": swimmersPerTeam,
+                                  "entries": runs[0]["entries"], "events": runs[0]["events"], "stages": stages})
+        print(f"{numTeams:5} {numTeams * swimmersPerTeam:8} {runs[0]['entries']:7} "
+              + " ".join(f"{stages[stage]['median_ms']:15.1f} ms" for stage in PIPELINE_STAGES))
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    return results
+
+
+def _startupRun(module : str) -> dict:
+    """
+    Imports module in a fresh interpreter, returning its import time, the process's whole
+    run time and which DEFERRED_MODULES the import loaded
+    """
+    code = (f"import json, sys, time\nstart = time.perf_counter()\nimport {module}\n"
+            f"print(json.dumps({{'ms': (time.perf_counter() - start) * 1000, "
+            f"'loaded': [name for name in {DEFERRED_MODULES!r} if name in sys.modules]}}))")
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    run = json.loads(completed.stdout.strip().splitlines()[-1])
+    run["process_ms"] = (time.perf_counter() - start) * 1000
+    return run
+
+
+def benchStartup(baseline : str = None, repeats : int = 7, threshold : float = 0.25) -> list:
+    """
+    Times importing each of STARTUP_MODULES in fresh interpreters, as a container or the
+    packaged CLI starts, and checks startup has not regressed
+
+    Args:
+        baseline (str): .json file of earlier results, compared against when it exists and
+            written with these results when it does not
+        repeats (int): Fresh interpreters per module, the median is compared
+        threshold (float): Relative slowdown of a median import time reported as a regression
+
+    Returns:
+        list: Failures, empty if startup is within budget. Importing any of DEFERRED_MODULES
+        at startup always fails
+    """
+    results = {"commit": _gitCommit(), "python": platform.python_version(), "modules": {}}
+    failures = []
+    for module in STARTUP_MODULES:
+        runs = [_startupRun(module) for run in range(repeats)]
+        timing = {"median_ms": statistics.median(run["ms"] for run in runs),
+                  "best_ms": min(run["ms"] for run in runs),
+                  "process_ms": statistics.median(run["process_ms"] for run in runs)}
+        results["modules"][module] = timing
+        print(f"import {module:6} median {timing['median_ms']:7.1f} ms, best {timing['best_ms']:7.1f} ms, "
+              f"process {timing['process_ms']:7.1f} ms")
+        if runs[0]["loaded"]:
+            failures.append(f"import {module} loads {', '.join(runs[0]['loaded'])}, which should wait for the first render")
+
+    if baseline and os.path.exists(baseline):
+        with open(baseline, "r") as f:
+            old = json.load(f)
+        print(f"Comparing {old.get('commit')} -> {results['commit']}")
+        for module, timing in results["modules"].items():
+            if module not in old["modules"]:
+                continue
+            before, after = old["modules"][module]["median_ms"], timing["median_ms"]
+            change = (after - before) / before if before else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            print(f"import {module:6} {before:7.1f} ms -> {after:7.1f} ms {change:+7.1%}{flag}")
+            if flag:
+                failures.append(f"import {module} took {after:.1f} ms, {change:+.0%} on {before:.1f} ms")
+    elif baseline:
+        with open(baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {baseline}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return failures
+
+
+def compareBenchmarks(oldResults, newResults, threshold : float = 0.10) -> list:
+    """
+    Compares two benchPipeline results stage by stage on their median times
+
+    Args:
+        oldResults: Baseline results, a dict or a .json file written by benchPipeline
+        newResults: Results to check, a dict or a .json file
+        threshold (float): Relative slowdown reported as a regression
+
+    Returns:
+        list: Regressions as '(teams, swimmers per team, stage, old ms, new ms)'
+    """
+    def load(results):
+        if isinstance(results, dict):
+            return results
+        with open(results, "r") as f:
+            return json.load(f)
+
+    oldResults, newResults = load(oldResults), load(newResults)
+    oldScales = {(scale["teams"], scale["swimmers_per_team"]): scale["stages"] for scale in oldResults["scales"]}
+    print(f"Comparing {oldResults.get('commit')} -> {newResults.get('commit')}")
+    regressions = []
+    for scale in newResults["scales"]:
+        key = (scale["teams"], scale["swimmers_per_team"])
+        if key not in oldScales:
+            continue
+        for stage, timing in scale["stages"].items():
+            if stage not in oldScales[key]:
+                continue
+            old, new = oldScales[key][stage]["median_ms"], timing["median_ms"]
+            change = (new - old) / old if old else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            print(f"{key[0]:3} x {key[1]:<4} {stage:20} {old:10.1f} ms -> {new:10.1f} ms {change:+7.1%}{flag}")
+            if flag:
+                regressions.append((*key, stage, old, new))
+    return regressions
+
+
+if __name__ == "__main__":
+    # python benchmark.py pipeline [results.json] | compare old.json new.json | renderers | sections | snapshot | cards
+    #                   | combine | startup [baseline.json]
+    if len(sys.argv) > 1 and sys.argv[1] == "renderers":
+        benchRenderers()
+    elif len(sys.argv) > 1 and sys.argv[1] == "sections":
+        benchSections()
+    elif len(sys.argv) > 1 and sys.argv[1] == "snapshot":
+        benchSnapshot()
+    elif len(sys.argv) > 1 and sys.argv[1] == "cards":
+        benchCards()
+    elif len(sys.argv) > 1 and sys.argv[1] == "combine":
+        benchCombine()
+    elif len(sys.argv) > 1 and sys.argv[1] == "startup":
+        sys.exit(1 if benchStartup(sys.argv[2] if len(sys.argv) > 2 else None) else 0)
+    elif len(sys.argv) > 1 and sys.argv[1] == "pipeline":
+        benchPipeline(output=sys.argv[2] if len(sys.argv) > 2 else None)
+    elif len(sys.argv) > 3 and sys.argv[1] == "compare":
+        sys.exit(1 if compareBenchmarks(sys.argv[2], sys.argv[3]) else 0)
+    else:
+        benchSwimmerStore()
+        benchSeedTimes()
+        benchLiveFanout()
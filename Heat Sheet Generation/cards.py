@@ -0,0 +1,385 @@
+# Streams lane timer cards and swimmer entry cards for a meet, one page at a time
+# Last modified 10/18/2026
+
+import zlib
+from array import array
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from pdfGen import _pdfString
+import test
+
+TIMER = "timer"
+ENTRY = "entry"
+CARD_KINDS = (TIMER, ENTRY)
+
+REGULAR = "Helvetica"
+BOLD = "Helvetica-Bold"
+_FONTS = {REGULAR: "F1", BOLD: "F2"} # font -> resource name used by every page and form
+
+# Timer cards are a quarter of a letter page, entry cards a tenth
+TIMER_CARD = (letter[0] / 2, letter[1] / 2)
+ENTRY_CARD = (letter[0] / 2, letter[1] / 5)
+MARGIN = 14
+
+
+def _num(*values) -> str:
+    """
+    Formats coordinates for PDF operators, to a hundredth of a point
+    """
+    return " ".join(f"{round(value, 2):g}" for value in values)
+
+
+def _fit(text : str, font : str, size : float, width : float) -> str:
+    """
+    Truncates text with a trailing '-', as the heat sheet does, until it fits in width
+    """
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(f"{text}-", font, size) > width:
+        text = text[:-1]
+    return f"{text}-"
+
+
+def _text(x : float, y : float, text : str, font : str = REGULAR, size : float = 9, width : float = None, align : str = "left") -> str:
+    """
+    Returns the PDF operators drawing one string, fitted to width and aligned on x
+    """
+    if width is not None:
+        text = _fit(text, font, size, width)
+    if align != "left":
+        textWidth = stringWidth(text, font, size)
+        x -= textWidth if align == "right" else textWidth / 2
+    return f"BT /{_FONTS[font]} {_num(size)} Tf 1 0 0 1 {_num(x, y)} Tm {_pdfString(text)} Tj ET"
+
+
+def _line(x1 : float, y1 : float, x2 : float, y2 : float) -> str:
+    return f"{_num(x1, y1)} m {_num(x2, y2)} l S"
+
+
+def _cutBorder(width : float, height : float) -> list:
+    return ["q 0.5 w 0.6 G [3 3] 0 d", f"{_num(0.5, 0.5, width - 1, height - 1)} re S", "Q"]
+
+
+class StreamingPdf:
+    """
+    Writes a PDF of text and reusable form objects straight to its output: each page is
+    compressed and written as soon as it is finished, so only an array of object offsets grows
+    with the page count. Forms are written once and drawn on any page by name
+    """
+
+    def __init__(self, output, pageSize : tuple = letter) -> None:
+        """
+        Args:
+            output: Writable binary buffer
+            pageSize (tuple): '(width, height)' of every page in points
+        """
+        self._output = output
+        self._pageSize = pageSize
+        self._offsets = array("Q", [0] * 4) # byte offset of each object by number, 0 is unused
+        self._position = 0
+        # 1 catalog, 2 page tree and 3 shared resources are written by close
+        self._pages = array("Q")
+        self._forms = {} # form name -> object number
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        fonts = []
+        for font, name in _FONTS.items():
+            number = self._object(f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>".encode("ascii"))
+            fonts.append(f"/{name} {number} 0 R")
+        self._fontResources = f"/Font << {' '.join(fonts)} >>"
+
+
+    def _write(self, data : bytes) -> None:
+        self._output.write(data)
+        self._position += len(data)
+
+
+    def _object(self, body : bytes, number : int = None) -> int:
+        if number is None:
+            number = len(self._offsets)
+            self._offsets.append(self._position)
+        else:
+            self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        return number
+
+
+    def _stream(self, dictionary : str, code : list) -> bytes:
+        data = zlib.compress("\n".join(code).encode("latin-1"))
+        return f"<< {dictionary} /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode("ascii") + data + b"\nendstream"
+
+
+    def addForm(self, name : str, width : float, height : float, code : list) -> None:
+        """
+        Writes a form object from PDF operators drawn in a width by height box
+        """
+        dictionary = f"/Type /XObject /Subtype /Form /BBox [{_num(0, 0, width, height)}] /Resources << {self._fontResources} >>"
+        self._forms[name] = self._object(self._stream(dictionary, code))
+
+
+    def addPage(self, code : list) -> None:
+        """
+        Writes one page from PDF operators, forms are drawn with '/name Do'
+        """
+        contents = self._object(self._stream("", code))
+        page = f"<< /Type /Page /Parent 2 0 R /Resources 3 0 R /Contents {contents} 0 R >>"
+        self._pages.append(self._object(page.encode("ascii")))
+
+
+    def close(self) -> int:
+        """
+        Writes the page tree, resources and cross reference table
+
+        Returns:
+            int: Number of pages written
+        """
+        forms = " ".join(f"/{name} {number} 0 R" for name, number in self._forms.items())
+        self._object(f"<< {self._fontResources} /XObject << {forms} >> >>".encode("ascii"), 3)
+        kids = " ".join(f"{number} 0 R" for number in self._pages) # about 8 bytes a page
+        self._object(f"<< /Type /Pages /Count {len(self._pages)} /MediaBox [0 0 {_num(*self._pageSize)}] /Kids [{kids}] >>".encode("ascii"), 2)
+        self._object(b"<< /Type /Catalog /Pages 2 0 R >>", 1)
+
+        start = self._position
+        size = len(self._offsets)
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for first in range(1, size, 1024):
+            self._write(b"".join(b"%010d 00000 n \n" % offset for offset in self._offsets[first:first + 1024]))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, start))
+        return len(self._pages)
+
+
+def _timerCardForm(meetName : str) -> list:
+    """
+    The fixed part of a lane timer card: meet name, labels and lines to write times on
+    """
+    width, height = TIMER_CARD
+    right = width - MARGIN
+    code = _cutBorder(width, height)
+    code.append(_text(width / 2, height - 30, meetName, BOLD, 11, right - MARGIN, "center"))
+    code.append("0.5 w")
+    code.append(_line(MARGIN, height - 40, right, height - 40))
+    code.append(_text(MARGIN, height - 54, "EVENT", size=7))
+    code.append(_text(110, height - 54, "HEAT", size=7))
+    code.append(_text(220, height - 54, "LANE", size=7))
+    code.append(_line(MARGIN, height - 112, right, height - 112))
+    code.append(_text(MARGIN, height - 126, "NAME", size=7))
+    code.append(_text(MARGIN, height - 162, "TEAM", size=7))
+    code.append(_text(150, height - 162, "AGE", size=7))
+    code.append(_text(220, height - 162, "SEED", size=7))
+    code.append(_line(MARGIN, height - 224, right, height - 224))
+    for number, y in enumerate((height - 252, height - 282, height - 312), start=1):
+        code.append(_text(MARGIN, y, f"TIMER {number}", BOLD, 9))
+        code.append(_line(90, y - 3, right, y - 3))
+    code.append(_text(MARGIN, height - 342, "OFFICIAL TIME", BOLD, 9))
+    code.append(_line(90, height - 345, right, height - 345))
+    code.append(_text(MARGIN, height - 370, "PLACE", BOLD, 9))
+    code.append(_line(56, height - 373, 140, height - 373))
+    code.append(_text(160, height - 370, "DQ", BOLD, 9))
+    code.append(_line(180, height - 373, right, height - 373))
+    return code
+
+
+def _timerCard(model : dict, heatIndex : int, lane : dict) -> list:
+    """
+    The variable text of one timer card
+    """
+    width, height = TIMER_CARD
+    right = width - MARGIN
+    code = [
+        _text(MARGIN, height - 80, str(model["number"]), BOLD, 20),
+        _text(110, height - 80, f"{heatIndex + 1} of {len(model['heats'])}", BOLD, 20),
+        _text(220, height - 84, str(lane["lane"]), BOLD, 28),
+        _text(MARGIN, height - 100, model["title"].split(" - ", 1)[-1], size=9, width=right - MARGIN),
+        _text(MARGIN, height - 144, lane["name"], BOLD, 14, right - MARGIN),
+        _text(MARGIN, height - 178, lane["team"], size=11, width=130),
+        _text(150, height - 178, lane["age"], size=11),
+        _text(220, height - 178, lane["seed"], size=11),
+    ]
+    for leg, swimmer in enumerate(lane["relaySwimmers"][:4]):
+        x = MARGIN if leg % 2 == 0 else width / 2
+        code.append(_text(x, height - 198 - 14 * (leg // 2), f"{leg + 1}) {swimmer}", size=9, width=width / 2 - MARGIN))
+    return code
+
+
+def _entryCardForm() -> list:
+    """
+    The fixed part of a swimmer entry card: labels and lines for the final time and place
+    """
+    width, height = ENTRY_CARD
+    right = width - MARGIN
+    code = _cutBorder(width, height)
+    code.append("0.5 w")
+    code.append(_line(MARGIN, height - 48, right, height - 48))
+    code.append(_text(MARGIN, height - 62, "HEAT", size=7))
+    code.append(_text(90, height - 62, "LANE", size=7))
+    code.append(_text(160, height - 62, "SEED TIME", size=7))
+    code.append(_line(MARGIN, height - 92, right, height - 92))
+    code.append(_text(MARGIN, height - 112, "FINAL TIME", BOLD, 8))
+    code.append(_line(70, height - 115, 200, height - 115))
+    code.append(_text(210, height - 112, "PLACE", BOLD, 8))
+    code.append(_line(240, height - 115, right, height - 115))
+    return code
+
+
+def _entryCard(model : dict, heatIndex : int, lane : dict) -> list:
+    """
+    The variable text of one entry card
+    """
+    width, height = ENTRY_CARD
+    right = width - MARGIN
+    details = f"{lane['team']}  Age {lane['age']}" if lane["age"] else lane["team"]
+    code = [
+        _text(right, height - 24, details, size=9, align="right"),
+        _text(MARGIN, height - 24, lane["name"], BOLD, 12, right - MARGIN - stringWidth(details, REGULAR, 9) - 8),
+        _text(MARGIN, height - 40, model["title"], size=9, width=right - MARGIN),
+        _text(MARGIN, height - 80, f"{heatIndex + 1} of {len(model['heats'])}", BOLD, 14),
+        _text(90, height - 80, str(lane["lane"]), BOLD, 14),
+        _text(160, height - 80, lane["seed"], BOLD, 14),
+    ]
+    if lane["relaySwimmers"]:
+        legs = "  ".join(f"{leg}) {swimmer}" for leg, swimmer in enumerate(lane["relaySwimmers"], start=1))
+        code.append(_text(MARGIN, height - 136, legs, size=7, width=right - MARGIN))
+    return code
+
+
+def _entries(events, lane : int = None):
+    """
+    Yields '(render model, heat index, lane)' for every occupied lane, in event, heat and lane
+    order, only for one lane number if lane is given
+
+    Args:
+        events: Meet or MeetSnapshot, anything with iterRenderModels
+    """
+    for model in events.iterRenderModels():
+        for heatIndex, heat in enumerate(model["heats"]):
+            for entry in heat["lanes"]:
+                if entry["name"] is not None and (lane is None or entry["lane"] == lane):
+                    yield model, heatIndex, entry
+
+
+def _writeCards(cards, cardSize : tuple, formName : str, formCode : list, target) -> int:
+    """
+    Lays cards out in a grid filling letter pages row by row and streams the pages to target
+
+    Args:
+        cards: Iterable of each card's variable text as PDF operators in card coordinates
+        cardSize (tuple): '(width, height)' of a card, letter pages hold as many as fit
+        formName (str): Name of the form holding the card's fixed layout
+        formCode (list): PDF operators drawing the form
+        target: File path or writable binary buffer the PDF is written to
+
+    Returns:
+        int: Number of pages written
+    """
+    width, height = cardSize
+    columns = int(letter[0] // width)
+    rows = int(letter[1] // height)
+    output = open(target, "wb") if isinstance(target, str) else target
+    try:
+        pdf = StreamingPdf(output)
+        pdf.addForm(formName, width, height, formCode)
+        page = []
+        slot = 0
+        for card in cards:
+            row, column = divmod(slot, columns)
+            x = column * width
+            y = letter[1] - (row + 1) * height
+            page.append(f"q 1 0 0 1 {_num(x, y)} cm /{formName} Do")
+            page.extend(card)
+            page.append("Q")
+            slot += 1
+            if slot == columns * rows:
+                pdf.addPage(page)
+                page = []
+                slot = 0
+        if page:
+            pdf.addPage(page)
+        return pdf.close()
+    finally:
+        if output is not target:
+            output.close()
+
+
+def writeTimerCards(meetName : str, events, target, byLane : bool = True) -> int:
+    """
+    Writes a lane timer card for every occupied lane of every heat, four to a page
+
+    Args:
+        meetName (str): Name of the meet, printed on every card
+        events: Meet or MeetSnapshot, anything with iterRenderModels
+        target: File path or writable binary buffer the PDF is written to
+        byLane (bool): Groups the cards into one stack per lane in event and heat order, as
+            they are handed to each lane's timers, rather than in heat sheet order
+
+    Returns:
+        int: Number of pages written
+    """
+    if byLane:
+        lanes = sorted({lane["lane"] for model, heatIndex, lane in _entries(events)})
+        cards = (_timerCard(*entry) for lane in lanes for entry in _entries(events, lane))
+    else:
+        cards = (_timerCard(*entry) for entry in _entries(events))
+    return _writeCards(cards, TIMER_CARD, "TimerCard", _timerCardForm(meetName), target)
+
+
+def writeEntryCards(events, target) -> int:
+    """
+    Writes an entry card for every swimmer and relay team in every event, in heat sheet order,
+    ten to a page
+
+    Args:
+        events: Meet or MeetSnapshot, anything with iterRenderModels
+        target: File path or writable binary buffer the PDF is written to
+
+    Returns:
+        int: Number of pages written
+    """
+    cards = (_entryCard(*entry) for entry in _entries(events))
+    return _writeCards(cards, ENTRY_CARD, "EntryCard", _entryCardForm(), target)
+
+
+def writeCards(kind : str, meetName : str, events, target) -> int:
+    """
+    Writes TIMER or ENTRY cards, see writeTimerCards and writeEntryCards
+
+    Raises:
+        ValueError: If kind is not one of CARD_KINDS
+    """
+    if kind == TIMER:
+        return writeTimerCards(meetName, events, target)
+    if kind == ENTRY:
+        return writeEntryCards(events, target)
+    raise ValueError(f"Card kind must be one of {', '.join(CARD_KINDS)}")
+
+
+def testCards():
+    import io, json
+    from meet import Meet
+    from pypdf import PdfReader
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "yes"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "", "", "no", "no"],
+        ["Cat", "Cedar", "9", "f", "eff", "free", "", "", "no", "no"],
+    ])
+    meetObject.importRelayRows([["Islands", "9 & 10", "girls", "free", "A", "Ann Ash", "b", "c", "d"]])
+    meetObject.generateEvents()
+    test.testEqual(_fit("Bartholomew Featherstonehaugh", BOLD, 14, 100).endswith("-"), True)
+
+    buffer = io.BytesIO()
+    test.testEqual(writeTimerCards("Test Meet", meetObject, buffer, byLane=False), 2) # 5 cards
+    reader = PdfReader(io.BytesIO(buffer.getvalue()))
+    test.testEqual(len(reader.pages), 2)
+    text = reader.pages[0].extract_text()
+    test.testEqual("TIMER 1" in text and "Ann Ash" in text and "Test Meet" in text, True)
+
+    buffer = io.BytesIO()
+    test.testEqual(writeEntryCards(meetObject, buffer), 1)
+    text = PdfReader(io.BytesIO(buffer.getvalue())).pages[0].extract_text()
+    test.testEqual(text.count("FINAL TIME"), 5)
+    test.testEqual("1) Ann Ash" in text, True)
+
+
+if __name__ == "__main__":
+    testCards()
@@ -0,0 +1,221 @@
+# Chooses which small events share a heat, keeping the pool's heat count as low as possible
+# Last modified 10/18/2026
+
+from seeding import heatSizes
+import test
+
+PAIRS = "pairs"     # the original rule: girls and boys of the same event, one buffer lane apart
+OPTIMAL = "optimal" # fewest heats under the league's combine rules
+STRATEGIES = (PAIRS, OPTIMAL)
+# Config names of the event fields that can be required to match for events to share a heat
+SHARE_FIELDS = {"age_group": "ageGroup", "gender": "gender", "stroke": "stroke", "distance": "distance"}
+DEFAULT_RULES = {
+    "strategy": PAIRS,
+    "buffer_lanes": 1,                  # empty lanes between events sharing a heat
+    "share_by": ["stroke", "distance"], # relays never share a heat with individual events
+    "keep_order": True,                 # only consecutive events share a heat
+    "max_events": 3,
+    "heat_seconds_base": 30,            # estimated time of a heat: base + per yard of its distance
+    "heat_seconds_per_yard": 1.2,
+}
+
+
+def combineItem(plan : dict, entries : int, rules : dict) -> dict:
+    """
+    Returns the solver's view of one event
+
+    Args:
+        plan (dict): The event's entry in CompiledConfig.eventPlan
+        entries (int): Swimmers or relay teams entered in the event
+        rules (dict): DEFAULT_RULES with the league's 'events.combine' settings applied
+
+    Returns:
+        dict: '{number, entries, key, distance}', events may share a heat only if their keys match
+    """
+    key = tuple(plan[SHARE_FIELDS[field]] for field in rules["share_by"]) + (plan["relay"],)
+    return {"number": plan["number"], "entries": entries, "key": key, "distance": int(plan["distance"])}
+
+
+def _heats(item : dict, numLanes : int) -> int:
+    return len(heatSizes(item["entries"], numLanes))
+
+
+def pairGroups(items : list, numLanes : int) -> list:
+    """
+    Returns the groups the original rule combines: events 2n-1 and 2n, when both have entries
+    and fit in one heat with a lane between them
+
+    Returns:
+        list: Lists of event numbers sharing a heat
+    """
+    entries = {item["number"]: item["entries"] for item in items}
+    groups = []
+    for number in range(1, max(entries, default=0), 2):
+        first, second = entries.get(number, 0), entries.get(number + 1, 0)
+        if first and second and first + second <= numLanes - 1:
+            groups.append([number, number + 1])
+    return groups
+
+
+def _orderedGroups(items : list, numLanes : int, bufferLanes : int, maxEvents : int) -> list:
+    """
+    Splits the swum events, in order, into runs sharing a heat with the fewest heats overall
+    best[end] is the fewest heats for the first end events, each run ending at end is tried
+    until it stops fitting, so the whole meet is solved in O(events * maxEvents)
+    """
+    best = [0] * (len(items) + 1)
+    runLength = [1] * (len(items) + 1)
+    for end in range(1, len(items) + 1):
+        last = items[end - 1]
+        best[end] = best[end - 1] + _heats(last, numLanes)
+        width = -bufferLanes
+        for size in range(1, min(maxEvents, end) + 1):
+            item = items[end - size]
+            width += item["entries"] + bufferLanes
+            if item["key"] != last["key"] or width > numLanes:
+                break
+            if size > 1 and best[end - size] + 1 < best[end]:
+                best[end] = best[end - size] + 1
+                runLength[end] = size
+
+    groups = []
+    end = len(items)
+    while end > 0:
+        if runLength[end] > 1:
+            groups.append([item["number"] for item in items[end - runLength[end]:end]])
+        end -= runLength[end]
+    return groups[::-1]
+
+
+def _packedGroups(items : list, numLanes : int, bufferLanes : int, maxEvents : int) -> list:
+    """
+    First fit decreasing bin packing of each set of compatible single heat events, ignoring
+    event order. Every event takes its entries plus a buffer and every heat holds numLanes
+    plus a buffer, so the buffer only ends up between events
+    """
+    classes = {}
+    for item in items:
+        if item["entries"] <= numLanes:
+            classes.setdefault(item["key"], []).append(item)
+
+    groups = []
+    for members in classes.values():
+        bins = [] # [free lanes, event numbers]
+        for item in sorted(members, key=lambda item: (-item["entries"], item["number"])):
+            size = item["entries"] + bufferLanes
+            for heat in bins:
+                if heat[0] >= size and len(heat[1]) < maxEvents:
+                    heat[0] -= size
+                    heat[1].append(item["number"])
+                    break
+            else:
+                bins.append([numLanes + bufferLanes - size, [item["number"]]])
+        groups += [sorted(numbers) for free, numbers in bins if len(numbers) > 1]
+    return sorted(groups)
+
+
+def _heatsRemoved(groups : list) -> int:
+    return sum(len(group) - 1 for group in groups)
+
+
+def optimalGroups(items : list, numLanes : int, rules : dict) -> list:
+    """
+    Returns the groups of events sharing a heat that leave the fewest heats, under the rules'
+    buffer lanes, share_by, keep_order and max_events. Only events swum in a single heat are
+    combined, since every heat of a combined event starts in the same lane
+
+    Args:
+        items (list): combineItem of every event, in event order
+        numLanes (int): Lanes in the pool
+        rules (dict): See DEFAULT_RULES
+
+    Returns:
+        list: Lists of event numbers sharing a heat, in event order
+    """
+    swum = [item for item in items if item["entries"]]
+    ordered = _orderedGroups(swum, numLanes, rules["buffer_lanes"], rules["max_events"])
+    if rules["keep_order"]:
+        return ordered
+    # First fit decreasing is not exact, the best run of consecutive events is kept if it wins
+    packed = _packedGroups(swum, numLanes, rules["buffer_lanes"], rules["max_events"])
+    return packed if _heatsRemoved(packed) >= _heatsRemoved(ordered) else ordered
+
+
+def groupStartLanes(entries : list, numLanes : int, bufferLanes : int = 1) -> list:
+    """
+    Returns the first lane of each event sharing a heat, centering the heat as a whole
+
+    Args:
+        entries (list): Entries of each event in the heat, in event order
+    """
+    total = sum(entries) + bufferLanes * (len(entries) - 1)
+    lane = numLanes // 2 - (total - 1) // 2
+    starts = []
+    for count in entries:
+        starts.append(lane)
+        lane += count + bufferLanes
+    return starts
+
+
+def _poolSeconds(items : list, groups : list, numLanes : int, rules : dict) -> tuple:
+    """
+    Returns '(heats, estimated seconds)' swum with the given groups sharing heats
+    """
+    def heatSeconds(distance):
+        return rules["heat_seconds_base"] + rules["heat_seconds_per_yard"] * distance
+
+    byNumber = {item["number"]: item for item in items}
+    grouped = {number for group in groups for number in group}
+    heats = len(groups)
+    seconds = sum(heatSeconds(max(byNumber[number]["distance"] for number in group)) for group in groups)
+    for item in items:
+        if item["number"] not in grouped:
+            count = _heats(item, numLanes)
+            heats += count
+            seconds += count * heatSeconds(item["distance"])
+    return heats, seconds
+
+
+def combinationReport(items : list, numLanes : int, rules : dict) -> dict:
+    """
+    Compares the optimal combination with the original pairs and with combining nothing
+
+    Returns:
+        dict: '{heats_uncombined, heats_pairs, heats_optimal, heats_saved, minutes_saved, groups}'
+        where the savings are the optimal combination's against the pairs and groups are the
+        optimal ones
+    """
+    groups = optimalGroups(items, numLanes, rules)
+    uncombined = _poolSeconds(items, [], numLanes, rules)
+    pairs = _poolSeconds(items, pairGroups(items, numLanes), numLanes, rules)
+    optimal = _poolSeconds(items, groups, numLanes, rules)
+    return {
+        "heats_uncombined": uncombined[0],
+        "heats_pairs": pairs[0],
+        "heats_optimal": optimal[0],
+        "heats_saved": pairs[0] - optimal[0],
+        "minutes_saved": round((pairs[1] - optimal[1]) / 60, 1),
+        "groups": groups,
+    }
+
+
+def testCombineEvents():
+    rules = dict(DEFAULT_RULES, strategy=OPTIMAL)
+    plans = [{"number": n, "ageGroup": "9 & 10" if n < 5 else "11 & 12", "gender": "girls" if n % 2 else "boys",
+              "stroke": "free", "distance": "25" if n < 5 else "50", "relay": False} for n in range(1, 9)]
+    entries = [1, 1, 1, 0, 2, 1, 3, 2]
+    items = [combineItem(plan, count, rules) for plan, count in zip(plans, entries)]
+    test.testEqual(pairGroups(items, 6), [[1, 2], [5, 6], [7, 8]])
+    test.testEqual(optimalGroups(items, 6, rules), [[1, 2, 3], [5, 6], [7, 8]])
+    test.testEqual(optimalGroups(items, 6, dict(rules, max_events=2)), [[1, 2], [5, 6], [7, 8]])
+    test.testEqual(optimalGroups(items, 6, dict(rules, share_by=["age_group", "stroke"], buffer_lanes=0)), [[1, 2, 3], [5, 6, 7]])
+    test.testEqual(optimalGroups(items, 6, dict(rules, keep_order=False)), [[1, 2, 3], [5, 7], [6, 8]])
+    test.testEqual(groupStartLanes([2, 2], 6), [1, 4])
+    test.testEqual(groupStartLanes([1, 1, 1], 8, 2), [1, 4, 7])
+
+    report = combinationReport(items, 6, rules)
+    test.testEqual((report["heats_uncombined"], report["heats_pairs"], report["heats_optimal"]), (7, 4, 3))
+    test.testEqual((report["heats_saved"], report["minutes_saved"]), (1, 1.0))
+
+if __name__ == "__main__":
+    testCombineEvents()
@@ -2,18 +2,20 @@
 # by Aiden Gray
 # Last modified 5/26/2024
 
-import test, random, sys
+import test, random
 import swimmer as swmr
+from leagueConfig import compileConfig
+from seeding import RANDOM, heatSizes, seedHeats
 
 
 class Event:
     """
     Stores event data and swimmer objects registered for event
-    Organizes heats and randomizes order of swimmers
+    Organizes heats, either randomizing order of swimmers or seeding them by time
     Data input formatted as shown in setEventData docstring
     """
 
-    def __init__(self, dataList : list, meetName : str, relayEvent : bool, config : dict, swimmerList : list = None, numLanes : int = 6, emptyLanes : bool = False) -> None:
+    def __init__(self, dataList : list, meetName : str, relayEvent : bool, config, swimmerList : list = None, numLanes : int = 6, emptyLanes : bool = False) -> None:
         """
         Initializes an Event object.
 
@@ -21,7 +23,7 @@ class Event:
             dataList (list): To be formatted as '[event number, age, stroke]'
             meetName (str): Used for filename purposes
             relayEvent (bool): Indicates a relay event
-            config (dict): Configuration dictionary containing event parameters.
+            config (dict | CompiledConfig): League configuration containing event parameters.
             swimmerList (list): List of swimmer objects registered for event or relay teams if relay event
             numLanes (int): Number of lanes to be used for seeding
             emptyLanes (bool): Indicates whether unused lanes should be displayed (True) or left off (False)
@@ -32,12 +34,17 @@ class Event:
         self._MEET_NAME = meetName
         self._RELAY = relayEvent
         self._EMPTY_LANES = emptyLanes
-        self._config = config
+        self._config = compileConfig(config)
         self.setEventData(dataList)
         self._eventSwimmers = {} # Dictionary storing Swimmer objects in the event
         self._heatArray = [] # Array of Heats (Heat is an array of swimmer objects)
+        self._heatsOrganized = False
+        self._seed = None # Seed for heat randomization, None uses the global RNG
         self._combinedStartLane = None
         self._combinedWith = None
+        self._seedTimes = {} # Swimmer ID -> best time in seconds, swimmers without one print 'NT'
+        self._seeding = RANDOM
+        self._circleHeats = 3
 
         if not relayEvent:
             self.addSwimmers(swimmerList)
@@ -73,31 +80,9 @@ class Event:
         self._age = data[1]
         self._stroke = data[2]
 
-        # Determines gender based on event number
-        GIRLS_START = self._config["events"]["girls_start_odd"]
-        if GIRLS_START and int(self._number) % 2 == 1:
-            self._gender = "girls"
-        elif not GIRLS_START and int(self._number) % 2 == 0:
-            self._gender = "girls"
-        else:
-            self._gender = "boys"
-            
-
-        # Distance logic based on config
-        if not self._RELAY:
-            threshold = self._config["events"]["distances"]["age_threshold"]
-            if int(self._age) >= threshold and self._stroke.lower().strip() != "im":
-                self._distance = self._config["events"]["distances"]["standard"]
-            elif self._stroke.lower().strip() == "im":
-                self._distance = self._config["events"]["distances"]["im"]
-            else:
-                self._distance = self._config["events"]["distances"]["short"]
-        else:
-            threshold = self._config["events"]["relay_distances"]["age_threshold"]
-            if int(self._age) < threshold:
-                self._distance = self._config["events"]["relay_distances"]["short"]
-            else:
-                self._distance = self._config["events"]["relay_distances"]["standard"]
+        # Gender is determined by event number, distance by age and stroke
+        self._gender = self._config.genderForEvent(self._number)
+        self._distance = self._config.distanceFor(self._age, self._stroke, self._RELAY)
 
 
     def addSwimmer(self, swimmer : object) -> bool:
@@ -130,11 +115,13 @@ class Event:
         """
         return self._eventSwimmers
         
-    def setCombinedLanes(self, startLane: int, combinedWith: int) -> None:
+    def setCombinedLanes(self, startLane: int, combinedWith) -> None:
         """
-        Explicitly sets the start lane for this event when combined with another event
-        and records the event number it is combined with.
+        Explicitly sets the start lane for this event when combined with other events
+        and records the event number it is combined with, or a list of numbers if several.
         """
+        if isinstance(combinedWith, (list, tuple)):
+            combinedWith = combinedWith[0] if len(combinedWith) == 1 else list(combinedWith)
         self._combinedStartLane = startLane
         self._combinedWith = combinedWith
     
@@ -148,133 +135,206 @@ class Event:
         return idList
 
 
-    def _organizeHeats(self) -> list:
+    def setSeedTimes(self, seedTimes : dict) -> None:
         """
-        Randomizes order of swimmers and returns 2D array of heats with swimmer objects
+        Sets the seed time, in seconds, printed (and seeded by) for each swimmer ID
         """
-        numSwimmers = len(self._eventSwimmers)
-        numHeats = ((numSwimmers-1) // self._NUM_LANES) + 1 #Hacky way of avoiding a full heat making an extra one
-
-        if numSwimmers > self._NUM_LANES:
-            overflowSwimmers = numSwimmers % self._NUM_LANES
-            if overflowSwimmers == 0:
-                heat1Entries = self._NUM_LANES
-                heat2Entries = self._NUM_LANES
-            elif overflowSwimmers < 3:
-                heat1Entries = 3
-                heat2Entries = self._NUM_LANES - (heat1Entries - overflowSwimmers)
-            else:
-                heat1Entries = overflowSwimmers
-                heat2Entries = self._NUM_LANES
-        else:
-            heat1Entries = numSwimmers
+        self._seedTimes = dict(seedTimes)
+        if self._seeding != RANDOM:
+            self._heatsOrganized = False
+
+
+    def getSeedTimes(self) -> dict:
+        """
+        Returns the seed time, in seconds, of each swimmer ID given one
+        """
+        return dict(self._seedTimes)
+
+
+    def setSeed(self, seed) -> None:
+        """
+        Sets the seed used to randomize heats so the same entries always produce the same heats
+        """
+        self._seed = seed
 
+
+    def setSeeding(self, method : str, circleHeats : int = 3) -> None:
+        """
+        Sets how heats are organized, see seeding.py: 'random' draws heats at random, 'standard'
+        seeds by time with the fastest heat last and 'circle' also circle seeds the top circleHeats heats
+        """
+        self._seeding = method
+        self._circleHeats = circleHeats
+
+
+    def _organizeHeats(self, seed = None) -> list:
+        """
+        Returns 2D array of heats with swimmer objects, seeded by time or in random order
+        Uses seed (or the event's seed) for a repeatable order, otherwise the global RNG
+        """
+        if seed is None:
+            seed = self._seed
+        rng = random.Random(seed) if seed is not None else random
         keyList = list(self._eventSwimmers.keys())
+
+        if self._seeding != RANDOM:
+            times = {} if self._RELAY else self._seedTimes
+            heats = seedHeats(keyList, times, self._NUM_LANES, self._seeding, self._circleHeats, None if self._RELAY else rng)
+            return [[self._eventSwimmers[key] for key in heat] for heat in heats]
+
         if not self._RELAY:
-            random.shuffle(keyList)
+            rng.shuffle(keyList)
 
         eventHeats = []
-        for heatNum in range(numHeats):
-            heat = []
-            if heatNum == 0:
-                numInHeat = heat1Entries
-            elif heatNum == 1:
-                numInHeat = heat2Entries
+        for numInHeat in heatSizes(len(keyList), self._NUM_LANES):
+            eventHeats.append([self._eventSwimmers[keyList.pop()] for i in range(numInHeat)])
+        return eventHeats
+
+
+    def getHeats(self) -> list:
+        """
+        Returns 2D array of heats with swimmer objects, organizing them on first use
+        so every render of the event shows the same heats
+        """
+        if not self._heatsOrganized:
+            self._heatArray = self._organizeHeats()
+            self._heatsOrganized = True
+        return self._heatArray
+
+
+    def getHeatIDs(self) -> list:
+        """
+        Returns the organized heats as IDs, swimmer IDs for individual events and
+        'teamID:relay name:swimmers' for relays
+        """
+        heatIDs = []
+        for heat in self.getHeats():
+            if self._RELAY:
+                heatIDs.append([f"{entry.getSwimID()}:{entry.getName()}:{'/'.join(entry.getSwimmers())}" for entry in heat])
             else:
-                numInHeat = self._NUM_LANES
+                heatIDs.append([entry.getSwimID() for entry in heat])
+        return heatIDs
 
-            if numInHeat >= 1:
-                for i in range(numInHeat):
-                    key = keyList.pop()
-                    heat.append(self._eventSwimmers[key])
+
+    def setHeats(self, heatIDs : list) -> None:
+        """
+        Restores previously organized heats of an individual event from swimmer IDs
+        Raises KeyError if an ID is not registered for the event
+        """
+        self._heatArray = [[self._eventSwimmers[swimID] for swimID in heat] for heat in heatIDs]
+        self._heatsOrganized = True
 
 
-            '''for i in range(numInHeat):
-                try:
-                    key = keyList.pop(random.randint(0,len(keyList)-1))
-                    heat.append(self._eventSwimmers[key])
-                except:
-                    print("This is the error")'''
+    def getCombinedLanes(self) -> tuple:
+        """
+        Returns '(start lane, combined event number or numbers)', both None if not combined
+        """
+        return (self._combinedStartLane, self._combinedWith)
 
-            eventHeats.append(heat)
 
-        return eventHeats
+    def isRelay(self) -> bool:
+        """
+        Returns True for relay events
+        """
+        return self._RELAY
 
 
-    def printEvent(self):
+    def getAgeGroup(self) -> str:
         """
-        Prints a clean view of the event
+        Returns the event's age group, e.g. '9 & 10'
+        """
+        return self._ageGroup
+
+
+    def _startLane(self, heat : list) -> int:
+        """
+        Returns the lane a heat's first entry swims in, centering the heat unless combined
+        """
+        if self._combinedStartLane is not None:
+            return self._combinedStartLane
+        middleLane = self._NUM_LANES // 2
+        laneModifier = (len(heat) - 1) // 2
+        return middleLane - laneModifier
+
+
+    def getLaneAssignments(self) -> list:
+        """
+        Returns one dict per heat mapping each lane to the key of the entry swimming in it
+        (the swimmer ID, or the relay's key in getSwimmers for relay events)
         """
-        CELL_WIDTH = 49
-        self._heatArray = self._organizeHeats()
+        keys = {id(entry): key for key, entry in self._eventSwimmers.items()}
+        assignments = []
+        for heat in self.getHeats():
+            startLane = self._startLane(heat)
+            assignments.append({startLane + i: keys[id(entry)] for i, entry in enumerate(heat)})
+        return assignments
 
-        eventDescription = f"<b>Event {self._number} - {self._gender.capitalize()} {self._ageGroup.title()} {self._distance} Yard {self._stroke.title()}</b>"
-        print(eventDescription)
-        print("-" * CELL_WIDTH)
-        HEADER = f'<b>{"Lane":4} {"Name":20} {"Age":3} {"Team":8} {"Seed Time":9}</b>'
-        print(HEADER)
-        print("-" * CELL_WIDTH)
+
+    def buildRenderModel(self) -> dict:
+        """
+        Builds a structured view of the event for printing or pdf generation
+
+        Returns:
+            dict: Formatted as '{number, title, combinedWith, heats}' where each heat is
+            '{label, lanes}' and each lane is '{lane, name, age, team, seed, relaySwimmers}'.
+            Empty lanes have a name of None.
+        """
+        heatArray = self.getHeats()
+        model = {
+            "number": self._number,
+            "title": f"Event {self._number} - {self._gender.capitalize()} {self._ageGroup.title()} {self._distance} Yard {self._stroke.title()}",
+            "combinedWith": self._combinedWith,
+            "heats": [],
+        }
+
+        if not heatArray and self._EMPTY_LANES:
+            lanes = [_emptyLane(lane) for lane in range(1, self._NUM_LANES + 1)]
+            model["heats"].append({"label": "Heat 1 of 1", "lanes": lanes})
 
         heatNum = 1
-        
-        if not self._heatArray and self._EMPTY_LANES:
-            print(f"<b>Heat 1 of 1</b>")
-            currentLane = 1
-            while currentLane <= self._NUM_LANES:
-                print(f"{currentLane:4}")
-                currentLane += 1
-                
-        for heat in self._heatArray:
+        for heat in heatArray:
+            label = f"Heat {heatNum} of {len(heatArray)}"
             if self._combinedWith is not None:
-                print(f"<b>Heat {heatNum} of {len(self._heatArray)} (Combined with Event {self._combinedWith})</b>")
-            else:
-                print(f"<b>Heat {heatNum} of {len(self._heatArray)}</b>")
-                
-            if self._combinedStartLane is not None:
-                startLane = self._combinedStartLane
-            else:
-                middleLane = self._NUM_LANES // 2
-                laneModifier = (len(heat) - 1) // 2
-                startLane = middleLane - laneModifier
-                
-            currentLane = 1
+                label += f" ({combinedLabel(self._combinedWith)})"
+
+            startLane = self._startLane(heat)
+
+            lanes = []
             if self._EMPTY_LANES:
-                while currentLane != startLane:
-                    print(f"{currentLane:4}")
-                    currentLane += 1
-            else:
-                currentLane = startLane
+                lanes.extend(_emptyLane(lane) for lane in range(1, startLane))
+            currentLane = startLane
             for swimmer in heat:
-                name = swimmer.getName()
-                age = swimmer.getAge()
-                team = swimmer.getTeam().upper()
-                if len(name) > 20:
-                    name = f"{name[:19]}-"
-                ln = f"{currentLane:4} {name:20} {age:3} {team:8} {'NT':9}"
-                currentLane += 1
-                print(ln)
-                
+                relaySwimmers = []
+                seedTime = "NT"
                 if self._RELAY and hasattr(swimmer, 'getSwimmers'):
-                    swimmers = swimmer.getSwimmers()
-                    if swimmers:
-                        def trunc(n):
-                            return f"{n[:14]}-" if len(n) > 15 else n
-                        
-                        s1 = trunc(swimmers[0]) if len(swimmers) > 0 else ""
-                        s2 = trunc(swimmers[1]) if len(swimmers) > 1 else ""
-                        s3 = trunc(swimmers[2]) if len(swimmers) > 2 else ""
-                        s4 = trunc(swimmers[3]) if len(swimmers) > 3 else ""
-                        
-                        if s1 or s2:
-                            print(f"      1) {s1:<15} 2) {s2:<15}")
-                        if s3 or s4:
-                            print(f"      3) {s3:<15} 4) {s4:<15}")
+                    relaySwimmers = list(swimmer.getSwimmers())
+                elif not self._RELAY and swimmer.getSwimID() in self._seedTimes:
+                    seedTime = formatSeedTime(self._seedTimes[swimmer.getSwimID()])
+                lanes.append({
+                    "lane": currentLane,
+                    "name": swimmer.getName(),
+                    "age": swimmer.getAge(),
+                    "team": swimmer.getTeam().upper(),
+                    "seed": seedTime,
+                    "relaySwimmers": relaySwimmers,
+                })
+                currentLane += 1
             if self._EMPTY_LANES:
-                while currentLane <= self._NUM_LANES:
-                    print(f"{currentLane:4}")
-                    currentLane += 1
+                lanes.extend(_emptyLane(lane) for lane in range(currentLane, self._NUM_LANES + 1))
+
+            model["heats"].append({"label": label, "lanes": lanes})
             heatNum += 1
 
+        return model
+
+
+    def printEvent(self):
+        """
+        Prints a clean view of the event
+        """
+        for line in formatEventLines(self.buildRenderModel()):
+            print(line)
+
     
     def exportEvent(self, output_dir: str = "Event Outputs/"):
         """
@@ -289,13 +349,101 @@ class Event:
 
         full_path = os.path.join(output_dir, f"{filename}{fileExt}")
 
-        temp = sys.stdout
-        sys.stdout = open(full_path, 'w')
-        self.printEvent()
-        sys.stdout = temp
+        with open(full_path, 'w') as file:
+            for line in formatEventLines(self.buildRenderModel()):
+                file.write(f"{line}\n")
         print(f"Event #{self._number} has been exported to {output_dir}")      
 
 
+def formatSeedTime(seconds : float) -> str:
+    """
+    Formats seconds as a seed time, 'ss.hh' under a minute and 'm:ss.hh' otherwise
+    """
+    hundredths = int(round(seconds * 100))
+    minutes, hundredths = divmod(hundredths, 6000)
+    if minutes:
+        return f"{minutes}:{hundredths // 100:02}.{hundredths % 100:02}"
+    return f"{hundredths // 100}.{hundredths % 100:02}"
+
+
+def combinedLabel(combinedWith) -> str:
+    """
+    Returns the note printed with a combined event, e.g. 'Combined with Event 4' or
+    'Combined with Events 4 & 5'
+    """
+    if not isinstance(combinedWith, list):
+        return f"Combined with Event {combinedWith}"
+    numbers = [str(number) for number in combinedWith]
+    return f"Combined with Events {', '.join(numbers[:-1])} & {numbers[-1]}"
+
+
+def _emptyLane(lane : int) -> dict:
+    """
+    Returns a render model entry for an unused lane
+    """
+    return {"lane": lane, "name": None, "age": "", "team": "", "seed": "", "relaySwimmers": []}
+
+
+def formatEventBlocks(model : dict) -> list:
+    """
+    Formats an event render model into heat sheet text
+
+    Args:
+        model (dict): Render model from Event.buildRenderModel
+
+    Returns:
+        list: One list of lines per heat, the first also holding the event header
+    """
+    CELL_WIDTH = 49
+    header = [
+        f"<b>{model['title']}</b>",
+        "-" * CELL_WIDTH,
+        f'<b>{"Lane":4} {"Name":20} {"Age":3} {"Team":8} {"Seed Time":9}</b>',
+        "-" * CELL_WIDTH,
+    ]
+
+    def trunc(n):
+        return f"{n[:14]}-" if len(n) > 15 else n
+
+    blocks = []
+    for heat in model["heats"]:
+        lines = [f"<b>{heat['label']}</b>"]
+        for lane in heat["lanes"]:
+            if lane["name"] is None:
+                lines.append(f"{lane['lane']:4}")
+                continue
+            name = lane["name"]
+            if len(name) > 20:
+                name = f"{name[:19]}-"
+            lines.append(f"{lane['lane']:4} {name:20} {lane['age']:3} {lane['team']:8} {lane['seed']:9}")
+
+            swimmers = lane["relaySwimmers"]
+            if swimmers:
+                s1 = trunc(swimmers[0]) if len(swimmers) > 0 else ""
+                s2 = trunc(swimmers[1]) if len(swimmers) > 1 else ""
+                s3 = trunc(swimmers[2]) if len(swimmers) > 2 else ""
+                s4 = trunc(swimmers[3]) if len(swimmers) > 3 else ""
+
+                if s1 or s2:
+                    lines.append(f"      1) {s1:<15} 2) {s2:<15}")
+                if s3 or s4:
+                    lines.append(f"      3) {s3:<15} 4) {s4:<15}")
+        blocks.append(lines)
+
+    if blocks:
+        blocks[0] = header + blocks[0]
+    else:
+        blocks.append(header)
+    return blocks
+
+
+def formatEventLines(model : dict) -> list:
+    """
+    Formats an event render model into a flat list of heat sheet lines
+    """
+    return [line for block in formatEventBlocks(model) for line in block]
+
+
 def testEvent():
     testInput1 = ["John","Doe","8","f","hab","fly","back ","Free","True","False"]
     testInput2 = ["Jane","Roe","7","f","eff","breast","back ","Free","False","False"]
@@ -0,0 +1,124 @@
+# Content-addressed cache of generated heat sheet PDFs
+# Last modified 10/18/2026
+
+import hashlib, json
+from collections import OrderedDict
+import test
+
+
+def cacheKey(swimmerHashes : list, relayHashes : list, configDigest : str, numLanes : int, emptyLanes : bool, meetName : str, timesVersion : str = None, seeding : str = None) -> str:
+    """
+    Builds the cache key for a heat sheet request
+
+    Args:
+        swimmerHashes (list): sha256 hex digest of each uploaded swimmer .csv, in upload order
+        relayHashes (list): sha256 hex digest of each uploaded relay .csv, in upload order
+        configDigest (str): Digest of the compiled league config the meet is generated with
+        numLanes (int): Number of lanes in the meet
+        emptyLanes (bool): Whether empty lanes are printed
+        meetName (str): Name of the meet
+        timesVersion (str, optional): Version of the times database seed times come from
+        seeding (str, optional): Seeding method requested for the meet
+
+    Returns:
+        str: Hex digest identifying the heat sheet these inputs produce
+    """
+    keyData = {
+        "swimmers": list(swimmerHashes),
+        "relays": list(relayHashes),
+        "config": configDigest,
+        "num_lanes": int(numLanes),
+        "empty_lanes": bool(emptyLanes),
+        "meet_name": meetName,
+    }
+    if timesVersion is not None:
+        keyData["times"] = timesVersion
+    if seeding is not None:
+        keyData["seeding"] = seeding
+    encoded = json.dumps(keyData, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class HeatSheetCache:
+    """
+    Size-bounded LRU cache of generated PDFs keyed by cacheKey
+    Least recently used PDFs are evicted once the total size passes maxBytes
+    """
+
+    def __init__(self, maxBytes : int = 64 * 1024 * 1024) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            maxBytes (int): Largest total size of cached PDFs, 0 disables caching
+        """
+        self._maxBytes = maxBytes
+        self._entries = OrderedDict() # key -> pdf bytes, oldest first
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def get(self, key : str):
+        """
+        Returns the cached PDF for key, or None on a miss
+        """
+        pdf = self._entries.get(key)
+        if pdf is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pdf
+
+
+    def put(self, key : str, pdf : bytes) -> None:
+        """
+        Stores a PDF, evicting the least recently used ones to stay under maxBytes
+        PDFs larger than the whole cache are not stored
+        """
+        if len(pdf) > self._maxBytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = pdf
+        self._size += len(pdf)
+        while self._size > self._maxBytes:
+            oldKey, oldPdf = self._entries.popitem(last=False)
+            self._size -= len(oldPdf)
+            self.evictions += 1
+
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current usage
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self._maxBytes,
+        }
+
+
+def testHeatSheetCache():
+    cache = HeatSheetCache(maxBytes=10)
+    key1 = cacheKey(["a"], [], "cfg", 6, False, "Meet")
+    key2 = cacheKey(["b"], [], "cfg", 6, False, "Meet")
+    test.testEqual(key1 == cacheKey(["a"], [], "cfg", 6, False, "Meet"), True)
+    test.testEqual(key1 == key2, False)
+
+    test.testEqual(cache.get(key1), None)
+    cache.put(key1, b"123456")
+    test.testEqual(cache.get(key1), b"123456")
+    cache.put(key2, b"7890ab")
+    test.testEqual(cache.get(key1), None)
+    test.testEqual(cache.stats()["evictions"], 1)
+    test.testEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    testHeatSheetCache()
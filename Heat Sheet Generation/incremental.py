@@ -0,0 +1,186 @@
+# Incremental heat sheet regeneration for late entries and scratches
+# Last modified 10/18/2026
+
+import json, time
+from meet import Meet
+from event import formatEventBlocks
+from main import load_config, applyTimes, PDF_RENDERER
+import test
+
+
+def captureMeet(meetObject : Meet) -> dict:
+    """
+    Returns the persisted form of a computed meet: Meet.exportState plus the formatted
+    heat sheet text of every printed event, so unchanged events never need re-rendering
+    """
+    state = meetObject.exportState()
+    for number in meetObject.getEventNumbers():
+        event = meetObject.getEvent(number)
+        if meetObject.isPrinted(event):
+            state["events"][str(number)]["blocks"] = formatEventBlocks(event.buildRenderModel())
+    return state
+
+
+def saveMeetState(state : dict, path : str) -> None:
+    """
+    Writes a captured meet to a .json file
+    """
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+
+def loadMeetState(path : str) -> dict:
+    """
+    Reads a captured meet from a .json file
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _resolveScratches(meetObject : Meet, scratches : list) -> tuple:
+    """
+    Turns scratch entries (swimmer IDs, full names, or '{name, team}' dicts) into swimmer IDs
+
+    Returns:
+        tuple: (IDs to remove, entries that matched no swimmer)
+    """
+    swimmerIDs = []
+    notFound = []
+    for entry in scratches:
+        if isinstance(entry, dict):
+            matches = meetObject.findSwimmers(entry["name"], entry.get("team"))
+        elif meetObject.getSwimmer(entry) is not None:
+            matches = [entry]
+        else:
+            matches = meetObject.findSwimmers(entry)
+        if matches:
+            swimmerIDs.extend(matches)
+        else:
+            notFound.append(entry)
+    return swimmerIDs, notFound
+
+
+def regenerateMeet(state : dict, delta : dict, config = None) -> dict:
+    """
+    Applies an entry delta to a captured meet and rebuilds the heat sheet
+    Events whose entries are unchanged keep their heats, lanes and formatted text, only
+    affected events are re-organized and re-formatted
+
+    Args:
+        state (dict): Output of captureMeet (or a previous regenerateMeet)
+        delta (dict): Any of '{"scratch": [IDs, names or {name, team}], "add": [swimmer rows],
+            "scratch_relays": [relay field dicts, see Meet.removeRelays], "add_relays": [relay rows]}'
+        config (optional): League config, loaded from the state's league if not given
+
+    Returns:
+        dict: '{pdf, state, changed_events, reused_events, scratched, not_found, added, conflicts, timings}'
+        where added counts new swimmers, rows repeating a swimmer already in the meet are not
+        added again and rows disagreeing with one are listed in conflicts (see Meet.importSwimmerRows)
+    """
+    timings = {}
+    start = time.perf_counter()
+    if config is None:
+        config = load_config(state.get("league"))
+    meetObject = Meet.fromState(state, config)
+
+    scratched, notFound = _resolveScratches(meetObject, delta.get("scratch", []))
+    meetObject.removeSwimmers(scratched)
+    for match in delta.get("scratch_relays", []):
+        meetObject.removeRelays(match)
+    addRows = [row for row in delta.get("add", []) if row]
+    imported = meetObject.importSwimmerRows(addRows)
+    meetObject.importRelayRows(delta.get("add_relays", []))
+    timings["import"] = time.perf_counter() - start
+
+    stageStart = time.perf_counter()
+    meetObject.generateEvents()
+    # Late entries are looked up in the times database, everyone else keeps their saved seed time
+    applyTimes(meetObject)
+    meetObject.restoreHeats(state)
+    timings["events"] = time.perf_counter() - stageStart
+
+    stageStart = time.perf_counter()
+    newState = meetObject.exportState()
+    # Cached text is only valid if the config that formatted it is unchanged
+    sameConfig = state.get("config_digest") == newState["config_digest"]
+    eventBlocks = []
+    changed = []
+    reused = []
+    for number in meetObject.getEventNumbers():
+        event = meetObject.getEvent(number)
+        if not meetObject.isPrinted(event):
+            continue
+        saved = state["events"].get(str(number))
+        current = newState["events"][str(number)]
+        if (sameConfig and saved is not None and "blocks" in saved
+                and saved["heats"] == current["heats"] and saved["combined"] == current["combined"]):
+            blocks = saved["blocks"]
+            reused.append(number)
+        else:
+            blocks = formatEventBlocks(event.buildRenderModel())
+            changed.append(number)
+        current["blocks"] = blocks
+        eventBlocks.append(blocks)
+    timings["format"] = time.perf_counter() - stageStart
+
+    from pdfGen import buildHeatSheetBytesFromBlocks # loads reportlab, see main.warm_up
+    stageStart = time.perf_counter()
+    pdf = buildHeatSheetBytesFromBlocks(newState["meet_name"], eventBlocks, PDF_RENDERER)
+    timings["render"] = time.perf_counter() - stageStart
+    timings["total"] = time.perf_counter() - start
+
+    return {
+        "pdf": pdf,
+        "state": newState,
+        "changed_events": changed,
+        "reused_events": reused,
+        "scratched": scratched,
+        "not_found": notFound,
+        "added": imported["added"],
+        "conflicts": imported["conflicts"],
+        "timings": timings,
+    }
+
+
+def testIncremental():
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "no", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "", "", "no", "no"],
+        ["Cat", "Cedar", "12", "f", "eff", "free", "", "", "no", "no"],
+    ])
+    meetObject.generateEvents()
+    state = json.loads(json.dumps(captureMeet(meetObject)))
+    freeEvent, backEvent, olderEvent = sorted(int(number) for number, event in state["events"].items() if "blocks" in event)
+
+    result = regenerateMeet(state, {"scratch": ["Bea Birch", "Nobody"]}, config)
+    test.testEqual((result["changed_events"], result["reused_events"]), ([freeEvent], [backEvent, olderEvent]))
+    test.testEqual(result["not_found"], ["Nobody"])
+    test.testEqual([result["state"]["events"][str(number)]["heats"] for number in (backEvent, olderEvent)],
+                   [state["events"][str(number)]["heats"] for number in (backEvent, olderEvent)])
+    test.testEqual(result["pdf"][:5], b"%PDF-")
+    test.testEqual(regenerateMeet(result["state"], {}, config)["changed_events"], [])
+
+    seeded = Meet("Test Meet", config, seed=1, seeding="standard")
+    seeded.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "", "", "no", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "", "", "no", "no"],
+        ["Dot", "Dale", "10", "f", "eff", "free", "", "", "no", "no"],
+    ])
+    seeded.generateEvents()
+    event = seeded.getEvent(freeEvent)
+    times = dict(zip(event.getSwimmerIDs(), (22.1, 20.1, 21.1)))
+    event.setSeedTimes(times)
+    scratchID = event.getSwimmerIDs()[1]
+    result = regenerateMeet(json.loads(json.dumps(captureMeet(seeded))), {"scratch": [scratchID]}, config)
+    test.testEqual(result["changed_events"], [freeEvent])
+    saved = result["state"]["events"][str(freeEvent)]
+    test.testEqual(saved["seed_times"], {swimID: seconds for swimID, seconds in times.items() if swimID != scratchID})
+    text = "".join(line for block in saved["blocks"] for line in block)
+    test.testEqual(("22.10" in text, "21.10" in text, "NT" in text), (True, True, False))
+
+
+if __name__ == "__main__":
+    testIncremental()
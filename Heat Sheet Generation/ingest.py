@@ -0,0 +1,257 @@
+# Ingestion adapters turning registration exports and Coach App event matrices into entry rows
+# Last modified 10/18/2026
+
+import test
+from itertools import compress
+from operator import itemgetter
+from meet import openTable
+from swimmer import identityKey
+
+TEMPLATE = "template"
+REGISTRATION = "registration"
+MATRIX = "matrix"
+
+# Only these columns of the 48 column registration export are ever read
+_REGISTRATION_COLUMNS = ("FirstName", "LastName", "Gender", "Age", "Branch", "Is Removed", "Status")
+_REGISTRATION_BIRTHDAY = "Birthday" # read when the export has it, see swimmer.identityKey
+_MATRIX_COLUMNS = ("Participant", "Age", "Gender")
+_MATRIX_RELAYS = ("Medley Relay", "Free Relay")
+_MARKED = ("1", "x", "yes", "true")
+_MAX_EVENTS = 3 # event slots in the entry template
+
+
+def _normalize(text : str) -> str:
+    """
+    Lowercases a header or name and collapses its whitespace (and any byte order mark)
+    """
+    return " ".join(text.replace("\ufeff", "").lower().split())
+
+
+def _nameKey(first : str, last : str) -> str:
+    """
+    Returns the name a matrix swimmer is matched to registrations by, see matrixEntries
+    """
+    return f"{_normalize(last)}, {_normalize(first)}"
+
+
+def detectFormat(header : list) -> str:
+    """
+    Returns TEMPLATE, REGISTRATION or MATRIX for a .csv header row
+
+    Raises:
+        ValueError: If the header matches none of the supported formats
+    """
+    names = {_normalize(name) for name in header}
+    if {"registration id", "firstname", "lastname", "branch"} <= names:
+        return REGISTRATION
+    if {"participant", "medley relay", "free relay"} <= names:
+        return MATRIX
+    if len(header) >= 10:
+        return TEMPLATE
+    raise ValueError(f"Unrecognized entry file header: {', '.join(header)}")
+
+
+def _columns(header : list, names : tuple) -> list:
+    """
+    Returns the positions of the named columns in a header, matched case insensitively
+
+    Raises:
+        ValueError: If any of the columns is missing
+    """
+    positions = {_normalize(name): i for i, name in enumerate(header)}
+    missing = [name for name in names if _normalize(name) not in positions]
+    if missing:
+        raise ValueError(f"Entry file is missing columns {missing}")
+    return [positions[_normalize(name)] for name in names]
+
+
+def readRegistrations(header : list, rows, config, branch : str = None) -> dict:
+    """
+    Reads the swimmers of a registration export, skipping removed and inactive registrations
+
+    Args:
+        header (list): The export's header row
+        rows: The remaining rows
+        config (CompiledConfig): League config, maps branch names to team IDs
+        branch (str, optional): Only keep registrations from this branch
+
+    Returns:
+        dict: swimmer.identityKey (name, team and birth date) -> '{first, last, age, gender,
+        team, birth_date}', birth_date empty if the export has no birthdays, so namesakes on
+        different teams or with different birthdays are kept apart
+    """
+    positions = _columns(header, _REGISTRATION_COLUMNS)
+    project = itemgetter(*positions)
+    width = max(positions) + 1
+    birthday = {_normalize(name): i for i, name in enumerate(header)}.get(_normalize(_REGISTRATION_BIRTHDAY))
+    branchKey = _normalize(branch) if branch else None
+
+    roster = {}
+    for row in rows:
+        if len(row) < width:
+            continue
+        first, last, gender, age, branchName, removed, status = project(row)
+        branchName = _normalize(branchName)
+        if branchKey is not None and branchName != branchKey:
+            continue
+        if _normalize(removed) == "yes" or _normalize(status) not in ("active", ""):
+            continue
+        team = config.teamIDs.get(branchName, "")
+        birthDate = row[birthday].strip() if birthday is not None and birthday < len(row) else ""
+        roster[identityKey(first, last, team, birthDate)] = {
+            "first": first.strip(),
+            "last": last.strip(),
+            "age": age.strip(),
+            "gender": gender.strip(),
+            "team": team,
+            "birth_date": birthDate,
+        }
+    return roster
+
+
+def matrixEntries(header : list, rows, config, roster : dict = None, team : str = None) -> dict:
+    """
+    Converts Coach App event matrix rows ('Last, First', age, gender, a 0/1 column per stroke
+    and relay) into entry template rows, followed by the swimmer's birth date when the roster
+    has it. Matrices only name their swimmers, so a name shared by several registrations is
+    narrowed down to those on team, and skipped if that still leaves more than one
+
+    Args:
+        header (list): The matrix's header row
+        rows: The remaining rows
+        config (CompiledConfig): League config, maps stroke column names to stroke codes
+        roster (dict, optional): Output of readRegistrations, supplies each swimmer's team
+        team (str, optional): Team ID for swimmers not found in the roster
+
+    Returns:
+        dict: '{"swimmers": template rows, "skipped": [(name, reason)], "warnings": [str]}'
+    """
+    project = itemgetter(*_columns(header, _MATRIX_COLUMNS))
+    strokePositions = []
+    strokeCodes = []
+    for i, name in enumerate(header):
+        code = config.strokeLookup.get(_normalize(name))
+        if code is not None:
+            strokePositions.append(i)
+            strokeCodes.append(code)
+    if not strokePositions:
+        raise ValueError("Event matrix has no stroke columns matching the league config")
+    marks = itemgetter(*strokePositions, *_columns(header, _MATRIX_RELAYS))
+    width = max(strokePositions + _columns(header, _MATRIX_COLUMNS + _MATRIX_RELAYS)) + 1
+    numStrokes = len(strokeCodes)
+    registrations = {} # name key -> registrations of swimmers with that name
+    for registration in (roster or {}).values():
+        registrations.setdefault(_nameKey(registration["first"], registration["last"]), []).append(registration)
+
+    swimmers = []
+    skipped = []
+    warnings = []
+    for row in rows:
+        if len(row) < width or not row[0].strip():
+            continue
+        participant, age, gender = project(row)
+        last, _, first = participant.partition(",")
+        flags = [mark.strip().lower() in _MARKED for mark in marks(row)]
+        events = list(compress(strokeCodes, flags[:numStrokes]))
+        medley, free = flags[numStrokes:]
+        if not events and not medley and not free:
+            continue # not entered in this meet
+
+        candidates = registrations.get(_nameKey(first, last), [])
+        if len(candidates) > 1 and team:
+            candidates = [registration for registration in candidates if registration["team"] == team]
+        if len(candidates) > 1:
+            skipped.append((participant.strip(), f"{len(candidates)} registrations share this name"))
+            continue
+        registration = candidates[0] if candidates else None
+        swimmerTeam = registration["team"] if registration and registration["team"] else team
+        if not swimmerTeam:
+            skipped.append((participant.strip(), "no team, not in the registration export"))
+            continue
+        if len(events) > _MAX_EVENTS:
+            warnings.append(f"{participant.strip()} is entered in {len(events)} events, only {', '.join(events[:_MAX_EVENTS])} kept")
+        events = (events + [""] * _MAX_EVENTS)[:_MAX_EVENTS]
+        entry = [first.strip(), last.strip(), age.strip(), gender.strip(), swimmerTeam, *events,
+                 "yes" if medley else "no", "yes" if free else "no"]
+        if registration and registration["birth_date"]:
+            entry.append(registration["birth_date"])
+        swimmers.append(entry)
+    return {"swimmers": swimmers, "skipped": skipped, "warnings": warnings}
+
+
+def loadEntries(sources : list, config, team : str = None, branch : str = None) -> dict:
+    """
+    Reads entry files in any supported format, detected from each file's header
+    Template files are passed through, registration exports supply teams for event matrices,
+    and event matrices are converted to template rows
+
+    Args:
+        sources (list): .csv paths, text streams or iterables of rows (header included)
+        config (CompiledConfig): League config
+        team (str, optional): Team ID for matrix swimmers missing from every registration export
+        branch (str, optional): Only read registrations from this branch
+
+    Returns:
+        dict: '{"swimmers": template rows in file order, "formats": [(source, format)],
+        "skipped": [(name, reason)], "warnings": [str]}'
+    """
+    roster = {}
+    parts = [] # template rows, or (header, rows) of a matrix converted once every roster is read
+    formats = []
+    for source in sources:
+        with openTable(source) as (header, rows):
+            fileFormat = detectFormat(header)
+            formats.append((source, fileFormat))
+            if fileFormat == REGISTRATION:
+                roster.update(readRegistrations(header, rows, config, branch))
+            elif fileFormat == MATRIX:
+                parts.append((header, list(rows)))
+            else:
+                parts.append([row for row in rows if row])
+
+    result = {"swimmers": [], "formats": formats, "skipped": [], "warnings": []}
+    for part in parts:
+        if isinstance(part, tuple):
+            converted = matrixEntries(part[0], part[1], config, roster, team)
+            result["swimmers"].extend(converted["swimmers"])
+            result["skipped"].extend(converted["skipped"])
+            result["warnings"].extend(converted["warnings"])
+        else:
+            result["swimmers"].extend(part)
+    return result
+
+
+def testIngest():
+    from leagueConfig import compileConfig
+    import json
+    with open("config.json", "r") as f:
+        config = compileConfig(json.load(f))
+    registrations = "../Coach App/2023 Islands Swim Team Roster.csv"
+    matrix = "../Coach App/outputFile.csv"
+
+    with openTable(registrations) as (header, rows):
+        test.testEqual(detectFormat(header), REGISTRATION)
+        roster = readRegistrations(header, rows, config)
+    test.testEqual(roster[identityKey("Nina", "Donovan", "isl", "11/07/2015")]["team"], "isl")
+    with openTable(matrix) as (header, rows):
+        test.testEqual(detectFormat(header), MATRIX)
+
+    entries = loadEntries([matrix, registrations], config)
+    test.testEqual(entries["swimmers"][0], ["Nina", "Donovan", "7", "Female", "isl", "free", "breast", "back", "no", "no", "11/07/2015"])
+    test.testEqual(len(entries["swimmers"]), 3)
+    test.testEqual(loadEntries([matrix], config)["skipped"][0][0], "Donovan, Nina")
+    test.testEqual(loadEntries([matrix], config, team="isl")["swimmers"][1][5:8], ["breast", "im", "fly"])
+
+    with openTable(registrations) as (header, rows):
+        rows = list(rows)
+    namesake = list(rows[0])
+    namesake[header.index("Branch")] = "Liberty"
+    roster = readRegistrations(header, [rows[0], namesake], config)
+    test.testEqual(sorted(registration["team"] for registration in roster.values()), ["isl", "lib"])
+    entries = loadEntries([matrix, [header, rows[0], namesake]], config)
+    test.testEqual(entries["skipped"][0], ("Donovan, Nina", "2 registrations share this name"))
+    test.testEqual(loadEntries([matrix, [header, rows[0], namesake]], config, team="lib")["swimmers"][0][4], "lib")
+
+
+if __name__ == "__main__":
+    testIngest()
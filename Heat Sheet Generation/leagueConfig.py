@@ -0,0 +1,383 @@
+# Validated, precompiled league configurations and a registry serving several leagues
+# Last modified 10/18/2026
+
+import hashlib, json, os, re
+import test
+from seeding import METHODS, RANDOM
+from combineEvents import DEFAULT_RULES, SHARE_FIELDS, STRATEGIES
+
+DEFAULT_LEAGUE = "default"
+
+
+class ConfigError(ValueError):
+    """
+    Raised when a league configuration is missing required settings or is inconsistent
+    """
+
+
+class CompiledConfig:
+    """
+    League configuration validated and compiled once into lookup tables
+    Meet and Event objects read these tables instead of indexing into the raw dict
+    The raw dict is still available as 'raw' for optional settings
+    """
+
+    def __init__(self, config : dict, league : str = DEFAULT_LEAGUE, digest : str = None) -> None:
+        """
+        Validates and compiles a configuration dictionary.
+
+        Args:
+            config (dict): The configuration dictionary loaded from a league's .json file
+            league (str): Name of the league the config belongs to
+            digest (str, optional): sha256 of the config file, computed from the dict if not given
+
+        Raises:
+            ConfigError: If required settings are missing or inconsistent
+        """
+        _validate(config, league)
+        self.raw = config
+        self.league = league
+        if digest is None:
+            digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+        self.digest = digest
+
+        events = config["events"]
+        ageGroups = config["age_groups"]
+
+        # Stroke code -> display name, and any code or name (lowercase) -> code
+        self.strokeCodes = list(events["order"])
+        self.strokeNames = dict(zip(self.strokeCodes, events["stroke_names"]))
+        self.strokeLookup = {code.lower(): code for code in self.strokeCodes}
+        for code, name in self.strokeNames.items():
+            self.strokeLookup.setdefault(name.lower(), code)
+
+        # Age -> effective age, ages past the end of the table compete at max_age
+        effectiveAge = ageGroups["effective_age"]
+        self.minAge = effectiveAge["min_age"]
+        self.maxAge = effectiveAge["max_age"]
+        groupBy = effectiveAge.get("group_by", 2)
+        self._effectiveAges = []
+        for age in range(self.maxAge + 1):
+            if age <= self.minAge:
+                self._effectiveAges.append(self.minAge)
+            elif age < self.maxAge and age % groupBy == 0:
+                self._effectiveAges.append(age - 1)
+            elif age < self.maxAge:
+                self._effectiveAges.append(age)
+            else:
+                self._effectiveAges.append(self.maxAge)
+
+        self.teamIDs = {t["name"].lower(): t["id"] for t in config.get("teams", [])}
+        self._teamIDsByID = {t["id"].lower(): t["id"] for t in config.get("teams", [])}
+
+        self.girlsStartOdd = events.get("girls_start_odd", True)
+        self.combineSmallEvents = events.get("combine_small_events", False)
+        self.combineRules = {**DEFAULT_RULES, **events.get("combine", {})}
+        self.printEmptyEvents = events.get("print_empty_events", False)
+        self.seeding = events.get("seeding", RANDOM)
+        self.circleSeedHeats = events.get("circle_seed_heats", 3)
+        self._seedingByEvent = {int(number): method for number, method in events.get("seeding_by_event", {}).items()}
+
+        distances = events["distances"]
+        self._threshold = distances["age_threshold"]
+        self._standard = distances["standard"]
+        self._short = distances["short"]
+        self._im = distances["im"]
+        relayDistances = events.get("relay_distances", {})
+        self._relayThreshold = relayDistances.get("age_threshold")
+        self._relayStandard = relayDistances.get("standard")
+        self._relayShort = relayDistances.get("short")
+
+        scoring = config.get("scoring", {})
+        self.individualPoints = list(scoring.get("individual", [6, 4, 3, 2, 1]))
+        self.relayPoints = list(scoring.get("relay", [8, 4, 2]))
+
+        self.individualAgeGroups = list(ageGroups["individual"])
+        self.relayAgeGroups = list(ageGroups.get("relay", []))
+        self.eventPlan = self._buildEventPlan()
+
+
+    def effectiveAge(self, age : int) -> int:
+        """
+        Returns the age a swimmer competes at
+        """
+        if age < 0:
+            return self.minAge
+        if age < len(self._effectiveAges):
+            return self._effectiveAges[age]
+        return self.maxAge
+
+
+    def teamID(self, team : str) -> str:
+        """
+        Returns the canonical ID of a team given by name or ID (ignoring case), teams missing
+        from the config keep their own name, lowercased
+        """
+        team = team.lower().strip()
+        return self.teamIDs.get(team) or self._teamIDsByID.get(team, team)
+
+
+    def seedingFor(self, eventNumber : int, default : str = None) -> str:
+        """
+        Returns the seeding method of an event, its own if the config gives one, else default
+        (or the meet-wide 'seeding' setting)
+        """
+        return self._seedingByEvent.get(int(eventNumber), default or self.seeding)
+
+
+    def genderForEvent(self, eventNumber : int) -> str:
+        """
+        Returns 'girls' or 'boys' for an event number
+        """
+        if self.girlsStartOdd and int(eventNumber) % 2 == 1:
+            return "girls"
+        elif not self.girlsStartOdd and int(eventNumber) % 2 == 0:
+            return "girls"
+        return "boys"
+
+
+    def distanceFor(self, age, stroke : str, relay : bool) -> str:
+        """
+        Returns the race distance for an event's age and stroke
+        """
+        if relay:
+            if int(age) < self._relayThreshold:
+                return self._relayShort
+            return self._relayStandard
+        isIM = stroke.lower().strip() == "im"
+        if int(age) >= self._threshold and not isIM:
+            return self._standard
+        elif isIM:
+            return self._im
+        return self._short
+
+
+    def _buildEventPlan(self) -> list:
+        """
+        Lays out every event in meet order
+
+        Returns:
+            list: One dict per event formatted as
+            '{number, age, ageGroup, stroke, strokeName, relay, gender, distance}'
+        """
+        plan = []
+        eventNumber = 1
+        relays = self.raw["events"].get("relays", [])
+
+        def addRelays(stroke):
+            nonlocal eventNumber
+            ageIndex = -1
+            for event in range(len(self.relayAgeGroups) * 2):
+                if eventNumber % 2 == 1:
+                    ageIndex += 1
+                ageGroup = self.relayAgeGroups[ageIndex]
+                age = ageGroup.split()[0]
+                plan.append({
+                    "number": eventNumber,
+                    "age": age,
+                    "ageGroup": ageGroup,
+                    "stroke": stroke,
+                    "strokeName": f"{stroke} Relay",
+                    "relay": True,
+                    "gender": self.genderForEvent(eventNumber),
+                    "distance": self.distanceFor(age, stroke, True),
+                })
+                eventNumber += 1
+
+        for relay in relays:
+            if relay.get("position") == "start":
+                addRelays(relay.get("stroke"))
+
+        for stroke in self.strokeCodes:
+            ageIndex = -1
+            for event in range(len(self.individualAgeGroups) * 2):
+                if eventNumber % 2 == 1:
+                    ageIndex += 1
+                ageGroup = self.individualAgeGroups[ageIndex]
+                age = ageGroup.split()[0]
+                plan.append({
+                    "number": eventNumber,
+                    "age": age,
+                    "ageGroup": ageGroup,
+                    "stroke": stroke,
+                    "strokeName": self.strokeNames[stroke],
+                    "relay": False,
+                    "gender": self.genderForEvent(eventNumber),
+                    "distance": self.distanceFor(age, stroke, False),
+                })
+                eventNumber += 1
+
+        for relay in relays:
+            if relay.get("position") == "end":
+                addRelays(relay.get("stroke"))
+
+        return plan
+
+
+def _validate(config : dict, league : str) -> None:
+    """
+    Checks that every setting the meet needs is present and consistent
+    """
+    def require(section : dict, key : str, path : str):
+        if not isinstance(section, dict) or key not in section:
+            raise ConfigError(f"League '{league}' config is missing '{path}'")
+        return section[key]
+
+    events = require(config, "events", "events")
+    order = require(events, "order", "events.order")
+    strokeNames = require(events, "stroke_names", "events.stroke_names")
+    if len(order) != len(strokeNames):
+        raise ConfigError(f"League '{league}' config has {len(order)} strokes in events.order but {len(strokeNames)} stroke_names")
+    distances = require(events, "distances", "events.distances")
+    for key in ("standard", "short", "im", "age_threshold"):
+        require(distances, key, f"events.distances.{key}")
+
+    ageGroups = require(config, "age_groups", "age_groups")
+    if not require(ageGroups, "individual", "age_groups.individual"):
+        raise ConfigError(f"League '{league}' config has no individual age groups")
+    effectiveAge = require(ageGroups, "effective_age", "age_groups.effective_age")
+    require(effectiveAge, "min_age", "age_groups.effective_age.min_age")
+    require(effectiveAge, "max_age", "age_groups.effective_age.max_age")
+
+    relays = events.get("relays", [])
+    if relays:
+        if not require(ageGroups, "relay", "age_groups.relay"):
+            raise ConfigError(f"League '{league}' config has relays but no relay age groups")
+        relayDistances = require(events, "relay_distances", "events.relay_distances")
+        for key in ("standard", "short", "age_threshold"):
+            require(relayDistances, key, f"events.relay_distances.{key}")
+        for relay in relays:
+            if relay.get("position") not in ("start", "end"):
+                raise ConfigError(f"League '{league}' relay {relay.get('stroke')} needs a position of 'start' or 'end'")
+
+    methods = [events.get("seeding", RANDOM)] + list(events.get("seeding_by_event", {}).values())
+    for method in methods:
+        if method not in METHODS:
+            raise ConfigError(f"League '{league}' seeding '{method}' is not one of {', '.join(METHODS)}")
+
+    combine = {**DEFAULT_RULES, **events.get("combine", {})}
+    if combine["strategy"] not in STRATEGIES:
+        raise ConfigError(f"League '{league}' combine strategy '{combine['strategy']}' is not one of {', '.join(STRATEGIES)}")
+    for field in combine["share_by"]:
+        if field not in SHARE_FIELDS:
+            raise ConfigError(f"League '{league}' combine share_by '{field}' is not one of {', '.join(SHARE_FIELDS)}")
+    if not isinstance(combine["buffer_lanes"], int) or combine["buffer_lanes"] < 0:
+        raise ConfigError(f"League '{league}' combine buffer_lanes must be a whole number of lanes")
+    if not isinstance(combine["max_events"], int) or combine["max_events"] < 2:
+        raise ConfigError(f"League '{league}' combine max_events must be at least 2")
+
+    for team in config.get("teams", []):
+        require(team, "name", "teams[].name")
+        require(team, "id", "teams[].id")
+
+
+def compileConfig(config, league : str = DEFAULT_LEAGUE) -> CompiledConfig:
+    """
+    Returns a compiled config, passing already compiled ones through unchanged
+    """
+    if isinstance(config, CompiledConfig):
+        return config
+    return CompiledConfig(config, league)
+
+
+class ConfigRegistry:
+    """
+    Serves compiled configs for several leagues from one process
+    The default league lives in config.json, others in leagues/<league>.json
+    Configs are compiled once and recompiled only when their file changes
+    """
+
+    def __init__(self, directory : str = ".") -> None:
+        """
+        Args:
+            directory (str): Directory holding config.json and the leagues/ folder
+        """
+        self._directory = directory
+        self._compiled = {} # league -> (mtime, CompiledConfig)
+
+
+    def _path(self, league : str) -> str:
+        """
+        Returns the config file path for a league
+        """
+        if league == DEFAULT_LEAGUE:
+            return os.path.join(self._directory, "config.json")
+        if not re.fullmatch(r"[A-Za-z0-9_\-]+", league):
+            raise KeyError(league)
+        return os.path.join(self._directory, "leagues", f"{league}.json")
+
+
+    def get(self, league : str = None) -> CompiledConfig:
+        """
+        Returns the compiled config for a league, reloading it if its file has changed
+
+        Raises:
+            KeyError: If the league has no config file
+            ConfigError: If the league's config is invalid
+        """
+        league = league or DEFAULT_LEAGUE
+        path = self._path(league)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            raise KeyError(league)
+
+        cached = self._compiled.get(league)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if cached is not None and cached[1].digest == digest:
+            # File was touched but not changed
+            self._compiled[league] = (mtime, cached[1])
+            return cached[1]
+
+        compiled = CompiledConfig(json.loads(data), league, digest)
+        self._compiled[league] = (mtime, compiled)
+        return compiled
+
+
+    def leagues(self) -> list:
+        """
+        Returns the names of every league with a config file
+        """
+        names = []
+        if os.path.exists(self._path(DEFAULT_LEAGUE)):
+            names.append(DEFAULT_LEAGUE)
+        leagueDir = os.path.join(self._directory, "leagues")
+        if os.path.isdir(leagueDir):
+            for filename in sorted(os.listdir(leagueDir)):
+                if filename.endswith(".json"):
+                    names.append(filename[:-len(".json")])
+        return names
+
+
+def testLeagueConfig():
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    compiled = compileConfig(config)
+    test.testEqual(compiled.effectiveAge(5), 6)
+    test.testEqual(compiled.effectiveAge(8), 7)
+    test.testEqual(compiled.effectiveAge(11), 11)
+    test.testEqual(compiled.effectiveAge(17), 13)
+    test.testEqual(compiled.strokeLookup["freestyle"], "free")
+    test.testEqual(compiled.teamIDs["west chatham"], "wc")
+    test.testEqual((compiled.teamID(" Islands"), compiled.teamID("ISL"), compiled.teamID("Nowhere")), ("isl", "isl", "nowhere"))
+    test.testEqual(compiled.eventPlan[0]["ageGroup"], "8 & under")
+    test.testEqual(compiled.eventPlan[8]["strokeName"], "freestyle")
+    test.testEqual(compiled.combineRules["strategy"], "pairs")
+    try:
+        CompiledConfig({**config, "events": {**config["events"], "combine": {"share_by": ["team"]}}})
+        test.testEqual("no error", "ConfigError")
+    except ConfigError:
+        test.testEqual(True, True)
+
+    registry = ConfigRegistry()
+    test.testEqual(registry.get() is registry.get(), True)
+    test.testEqual(registry.leagues()[0], DEFAULT_LEAGUE)
+
+
+if __name__ == "__main__":
+    testLeagueConfig()
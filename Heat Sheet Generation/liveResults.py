@@ -0,0 +1,235 @@
+# In-process fan-out of live heat results to spectators over Server-Sent Events
+# Last modified 10/18/2026
+
+import asyncio, json, time
+from collections import deque
+import test
+
+HEARTBEAT_SECONDS = 15
+_HEARTBEAT = b": heartbeat\n\n"
+
+
+def _frame(sequence : int, kind : str, data : dict) -> bytes:
+    """
+    Encodes one Server-Sent Events message, without an id when sequence is None so the
+    client keeps the id of the last message it received
+    """
+    idLine = f"id: {sequence}\n" if sequence is not None else ""
+    return f"{idLine}event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class Subscriber:
+    """
+    One connected spectator, a bounded queue of encoded messages waiting to be sent
+    """
+
+    def __init__(self, hub : "ResultHub", backlog : list, bufferSize : int) -> None:
+        self._hub = hub
+        self._backlog = deque(backlog) # messages replayed on resume, sent before anything queued
+        self._queue = asyncio.Queue(bufferSize)
+        self.dropped = False
+
+
+    def offer(self, message : bytes) -> bool:
+        """
+        Queues a message, returns False (and drops the subscriber) if its buffer is full
+        """
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self._drop()
+            return False
+
+
+    def idle(self) -> bool:
+        """
+        Returns True if nothing is waiting to be sent to the subscriber
+        """
+        return self._queue.empty() and not self._backlog
+
+
+    def _drop(self) -> None:
+        """
+        Frees a slow subscriber's buffer and leaves only a message asking it to reconnect,
+        it resumes from the last sequence it received
+        """
+        self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_frame(None, "dropped", {"reason": "client too slow, reconnect to resume"}))
+
+
+    async def messages(self):
+        """
+        Yields encoded messages until the subscriber is dropped
+        """
+        try:
+            while self._backlog:
+                yield self._backlog.popleft()
+            while True:
+                message = await self._queue.get()
+                yield message
+                if self.dropped and self._queue.empty():
+                    return
+        finally:
+            self._hub.unsubscribe(self)
+
+
+class ResultHub:
+    """
+    Single fan-out point for live results. Each delta is encoded once and the same bytes are
+    queued for every subscriber, a recent history allows reconnecting clients to resume from
+    their last sequence number instead of reloading the meet
+    All methods must be called from the event loop thread
+    """
+
+    def __init__(self, historySize : int = 2048, bufferSize : int = 256) -> None:
+        """
+        Args:
+            historySize (int): Number of recent messages kept for resuming clients
+            bufferSize (int): Messages queued per client before it is dropped as too slow
+        """
+        self.sequence = 0
+        self._history = deque(maxlen=historySize) # (sequence, encoded message)
+        self._bufferSize = bufferSize
+        self._subscribers = set()
+        self._published = 0
+        self._dropped = 0
+        self._fanoutSeconds = 0.0
+
+
+    def publish(self, delta : dict, kind : str = "result") -> int:
+        """
+        Sends a result delta to every subscriber
+
+        Args:
+            delta (dict): Typically '{event, heat, results: [{lane, name, team, time, place}]}'
+            kind (str): SSE event name
+
+        Returns:
+            int: The delta's sequence number
+        """
+        start = time.perf_counter()
+        self.sequence += 1
+        message = _frame(self.sequence, kind, delta)
+        self._history.append((self.sequence, message))
+        for subscriber in list(self._subscribers):
+            if not subscriber.offer(message):
+                self._subscribers.discard(subscriber)
+                self._dropped += 1
+        self._published += 1
+        self._fanoutSeconds += time.perf_counter() - start
+        return self.sequence
+
+
+    def heartbeat(self) -> None:
+        """
+        Queues an SSE comment for every idle subscriber so proxies keep quiet connections open
+        One call covers every connection, instead of a timeout per client
+        """
+        for subscriber in self._subscribers:
+            if subscriber.idle():
+                subscriber.offer(_HEARTBEAT)
+
+
+    async def runHeartbeat(self, interval : float = HEARTBEAT_SECONDS) -> None:
+        """
+        Sends a heartbeat every interval seconds until cancelled
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.heartbeat()
+
+
+    def subscribe(self, lastSequence : int = None) -> Subscriber:
+        """
+        Connects a subscriber, replaying every message after lastSequence when given
+        A client too far behind for the history gets a 'reset' message asking it to reload
+        """
+        backlog = []
+        if lastSequence is not None and lastSequence != self.sequence:
+            oldest = self._history[0][0] if self._history else self.sequence + 1
+            if lastSequence + 1 < oldest or lastSequence > self.sequence: # behind the history, or from before a restart
+                backlog.append(_frame(self.sequence, "reset", {"reason": "too far behind, reload the meet"}))
+            else:
+                # History is in sequence order, so the messages to replay are its tail
+                start = len(self._history) - (self.sequence - lastSequence)
+                backlog.extend(message for sequence, message in list(self._history)[start:])
+        subscriber = Subscriber(self, backlog, self._bufferSize)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+
+    def unsubscribe(self, subscriber : Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+
+    async def stream(self, lastSequence : int = None):
+        """
+        Yields a new subscriber's messages, see subscribe. The subscriber is only connected once
+        the stream is first iterated and is disconnected however the stream ends, so a client
+        that leaves before its response starts never stays subscribed
+        """
+        subscriber = self.subscribe(lastSequence)
+        try:
+            async for message in subscriber.messages():
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+    def stats(self) -> dict:
+        """
+        Returns connection and fan-out counters
+        """
+        fanout = self._fanoutSeconds / self._published if self._published else 0.0
+        return {
+            "subscribers": len(self._subscribers),
+            "sequence": self.sequence,
+            "published": self._published,
+            "dropped": self._dropped,
+            "history": len(self._history),
+            "fanout_ms_per_message": fanout * 1000,
+        }
+
+
+def testResultHub():
+    async def run():
+        hub = ResultHub(historySize=3, bufferSize=2)
+        fast = hub.subscribe()
+        slow = hub.subscribe()
+        stream = fast.messages()
+        hub.publish({"event": 1, "heat": 1})
+        test.testEqual((await stream.__anext__()).startswith(b"id: 1\nevent: result\n"), True)
+        hub.publish({"event": 1, "heat": 2})
+        hub.publish({"event": 1, "heat": 3})
+        test.testEqual(slow.dropped, True)
+        test.testEqual(hub.stats()["subscribers"], 1)
+
+        resumed = hub.subscribe(lastSequence=1)
+        test.testEqual([message[:5] for message in resumed._backlog], [b"id: 2", b"id: 3"])
+        test.testEqual(b"event: reset" in hub.subscribe(lastSequence=-5)._backlog[0], True)
+        test.testEqual(b"event: reset" in hub.subscribe(lastSequence=50)._backlog[0], True)
+        idle = hub.subscribe()
+        hub.heartbeat() # only idle subscribers get one
+        test.testEqual(await idle.messages().__anext__(), _HEARTBEAT)
+        test.testEqual((await stream.__anext__())[:5], b"id: 2")
+        await stream.aclose()
+        test.testEqual(fast in hub._subscribers, False)
+
+        hub = ResultHub()
+        unstarted = hub.stream()
+        await unstarted.aclose() # client gone before the response started
+        test.testEqual(hub.stats()["subscribers"], 0)
+        hub.publish({"event": 2, "heat": 1})
+        started = hub.stream(lastSequence=0)
+        test.testEqual((await started.__anext__())[:5], b"id: 1")
+        test.testEqual(hub.stats()["subscribers"], 1)
+        await started.aclose()
+        test.testEqual(hub.stats()["subscribers"], 0)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    testResultHub()
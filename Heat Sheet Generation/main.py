@@ -2,13 +2,32 @@
 # by Aiden Gray
 # Last modified 6/3/2024
 
-import json
-from pdfGen import generateHeatSheet
+import os
+import threading
 from meet import Meet
+from leagueConfig import ConfigRegistry, CompiledConfig
+from ingest import loadEntries
+from timesDB import TimesDatabase
+from metrics import StageTimer, stageTimer, profileCall
+from meetSnapshot import MeetSnapshot, packMeet
 from os import listdir
+# pdfGen, sectionedPdf and cards load reportlab, which takes longer to import than everything
+# else here, so they are imported where a PDF is rendered and ahead of time by warm_up
 
 LINE_WIDTH = 100
 
+# League configs are compiled once per process and reloaded when their file changes
+config_registry = ConfigRegistry(os.environ.get("MEET_CONFIG_DIR", "."))
+
+# Past results database used for seed times, entries print 'NT' when not set
+TIMES_DB = os.environ.get("MEET_TIMES_DB")
+
+# PDF renderer, 'flowable' (reportlab's layout) or 'canvas' (the fast fixed-pitch renderer)
+PDF_RENDERER = os.environ.get("MEET_PDF_RENDERER", "flowable")
+
+# Processes rendering the sections of one heat sheet in parallel, 0 renders it in one pass
+SECTION_WORKERS = int(os.environ.get("MEET_SECTION_WORKERS", 0))
+
 
 def main():
     """
@@ -37,39 +56,237 @@ def title():
     print("Review each .csv file to ensure compliance with required formatting (see 'READ Me.txt')".center(LINE_WIDTH), end= '\n\n')
 
 
+def load_config(league: str = None) -> CompiledConfig:
+    """
+    Returns the compiled configuration for a league (config.json when league is None).
+    Raises KeyError for an unknown league and leagueConfig.ConfigError for an invalid one.
+    """
+    return config_registry.get(league)
+
+
+def _sourceName(source) -> str:
+    """
+    Returns a printable name for an entry file given as a path, stream or parsed rows.
+    """
+    if isinstance(source, str):
+        return source
+    return getattr(source, "name", "Uploaded file")
+
+
+def applyTimes(meetObject: Meet, times_db: str = None) -> None:
+    """
+    Fills in seed times from the times database at times_db (MEET_TIMES_DB when None), if any.
+    """
+    times_db = times_db or TIMES_DB
+    if not times_db:
+        return
+    timesDatabase = TimesDatabase(times_db, readOnly=True)
+    try:
+        meetObject.applySeedTimes(timesDatabase)
+    finally:
+        timesDatabase.close()
+
+
+def _buildMeet(meetName: str, numLanes: int, emptyLanes: bool, swimmer_files: list, relay_files: list, seed=None, league=None, times_db=None, seeding=None, timer=None) -> Meet:
+    """
+    Loads the league config, imports every entry file and generates the meet's events.
+    Entry files may be paths, open text streams or lists of parsed rows (header included),
+    swimmer files in any format ingest.loadEntries detects.
+    A metrics.StageTimer records the config_load, csv_parse, event_assignment and seed_times stages.
+    """
+    timer = stageTimer(timer)
+    with timer.stage("config_load"):
+        config = load_config(league)
+        
+    meetObject = Meet(meetName, config, numLanes, emptyLanes, seed=seed, seeding=seeding)
+
+    with timer.stage("csv_parse"):
+        for filename in relay_files:
+            meetObject.importRelays(filename)
+            print(f"{_sourceName(filename)} (Relays) imported")
+            
+        # Swimmer files may be entry templates, registration exports or Coach App event matrices
+        entries = loadEntries(swimmer_files, config)
+        imported = meetObject.importSwimmerRows(entries["swimmers"])
+    for filename, fileFormat in entries["formats"]:
+        print(f"{_sourceName(filename)} (Swimmers, {fileFormat}) imported")
+    for name, reason in entries["skipped"]:
+        print(f"Skipped {name}: {reason}")
+    for warning in entries["warnings"]:
+        print(warning)
+    if imported["duplicates"]:
+        print(f"Skipped {imported['duplicates']} repeated swimmer entries")
+    for conflict in imported["conflicts"]:
+        print(f"Conflicting entries for {conflict['name']} ({conflict['team']}) differ in {', '.join(conflict['fields'])}, kept the first")
+
+    print(f"Generating events for {meetName}...")
+    with timer.stage("event_assignment"):
+        meetObject.generateEvents()
+    with timer.stage("seed_times"):
+        applyTimes(meetObject, times_db)
+    return meetObject
+
+
 def generate_meet_pdf(
     meetName: str,
     numLanes: int,
     emptyLanes: bool,
     swimmer_files: list[str],
     relay_files: list[str],
-    temp_dir: str = "Event Outputs/",
-    pdf_out_dir: str = "pdf Outputs/"
+    pdf_out_dir: str = "pdf Outputs/",
+    league: str = None,
+    times_db: str = None,
+    seeding: str = None
 ) -> str:
     """
     Programmatic entry point for generating a meet pdf.
-    Returns the absolute path to the generated PDF.
+    Events are passed to the PDF builder in memory, no intermediate text files are written.
+    Returns the path to the generated PDF.
     """
-    import os
-    with open("config.json", "r") as f:
-        config = json.load(f)
-        
-    meetObject = Meet(meetName, config, numLanes, emptyLanes)
+    meetObject = _buildMeet(meetName, numLanes, emptyLanes, swimmer_files, relay_files, league=league, times_db=times_db, seeding=seeding)
+    if SECTION_WORKERS:
+        from sectionedPdf import buildSectionedHeatSheetBytes, meetSections
+        os.makedirs(pdf_out_dir, exist_ok=True)
+        pdf_path = os.path.join(pdf_out_dir, f"{meetName}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(buildSectionedHeatSheetBytes(meetName, meetSections(meetObject), SECTION_WORKERS, PDF_RENDERER))
+        return pdf_path
+    from pdfGen import buildHeatSheet
+    pdf_path = buildHeatSheet(meetName, meetObject.getRenderModels(), output_dir=pdf_out_dir, renderer=PDF_RENDERER)
+    return pdf_path
 
-    for filename in relay_files:
-        meetObject.importRelays(filename)
-        print(f"{filename} (Relays) imported")
-        
-    for filename in swimmer_files:
-        meetObject.importFile(filename)
-        print(f"{filename} (Swimmers) imported")
 
-    print(f"Generating events for {meetName}...")
-    meetObject.generateEvents()
-    meetObject.generateTxtFiles(output_dir=temp_dir)
-    
-    pdf_path = generateHeatSheet(meetName, input_dir=temp_dir, output_dir=pdf_out_dir)
-    return pdf_path
+def generate_meet_pdf_bytes(
+    meetName: str,
+    numLanes: int,
+    emptyLanes: bool,
+    swimmer_files: list,
+    relay_files: list,
+    seed=None,
+    league: str = None,
+    times_db: str = None,
+    seeding: str = None,
+    timer: StageTimer = None
+) -> bytes:
+    """
+    Programmatic entry point for generating a meet pdf entirely in memory.
+    Entry files may be paths, open text streams or lists of parsed rows, nothing is written to disk.
+    A seed makes the heats repeatable for identical entries, league selects the config and
+    times_db the past results used for seed times, seeding the seeding method ('random',
+    'standard' or 'circle', the config's setting when None). A metrics.StageTimer, if given,
+    records how long each stage took and the PDF's size and page count.
+    With MEET_SECTION_WORKERS set, the heat sheet's sections are rendered in parallel processes.
+    Returns the contents of the PDF.
+    """
+    meetObject = _buildMeet(meetName, numLanes, emptyLanes, swimmer_files, relay_files, seed, league, times_db, seeding, timer)
+    timer = stageTimer(timer)
+    with timer.stage("heat_organization"):
+        meetObject.organizeHeats()
+    if SECTION_WORKERS:
+        from sectionedPdf import buildSectionedHeatSheetBytes, meetSections
+        with timer.stage("rendering"):
+            sections = meetSections(meetObject)
+        return buildSectionedHeatSheetBytes(meetName, sections, SECTION_WORKERS, PDF_RENDERER, timer)
+    from pdfGen import buildHeatSheetBytes
+    with timer.stage("rendering"):
+        models = meetObject.getRenderModels()
+    return buildHeatSheetBytes(meetName, models, timer, PDF_RENDERER)
+
+
+def generate_meet_pdf_timed(*args, profile: str = None, profile_path: str = None, **kwargs) -> tuple:
+    """
+    Runs generate_meet_pdf_bytes with a StageTimer, for callers in another process.
+    profile ('cprofile' or 'tracemalloc') captures a profile of the whole build to profile_path.
+    Returns the contents of the PDF and the timer's stages and values (see StageTimer.asDict).
+    """
+    timer = StageTimer()
+    if profile:
+        pdf_bytes = profileCall(profile, profile_path, generate_meet_pdf_bytes, *args, timer=timer, **kwargs)
+    else:
+        pdf_bytes = generate_meet_pdf_bytes(*args, timer=timer, **kwargs)
+    return pdf_bytes, timer.asDict()
+
+def generate_meet_snapshot(
+    meetName: str,
+    numLanes: int,
+    emptyLanes: bool,
+    swimmer_files: list,
+    relay_files: list,
+    seed=None,
+    league: str = None,
+    times_db: str = None,
+    seeding: str = None,
+    meet_id: str = None
+) -> bytes:
+    """
+    Builds a meet like generate_meet_pdf_bytes and returns its binary snapshot instead of
+    a PDF (see meetSnapshot.packMeet). The same inputs and seed give the same heats as the PDF.
+    """
+    meetObject = _buildMeet(meetName, numLanes, emptyLanes, swimmer_files, relay_files, seed, league, times_db, seeding)
+    return packMeet(meetObject, meet_id)
+
+
+def generate_snapshot_pdf_timed(snapshot_path: str) -> tuple:
+    """
+    Renders the heat sheet of a meet snapshot written by generate_meet_snapshot, skipping
+    every stage before rendering. The heats are exactly those the meet was published with.
+    Returns '(pdf bytes, StageTimer.asDict())' like generate_meet_pdf_timed.
+    """
+    from pdfGen import buildHeatSheetBytes
+    timer = StageTimer()
+    with timer.stage("snapshot_load"):
+        with MeetSnapshot(snapshot_path) as snapshot:
+            meetName = snapshot.meetName
+            models = snapshot.getRenderModels()
+    pdf = buildHeatSheetBytes(meetName, models, timer, PDF_RENDERER)
+    return pdf, timer.asDict()
+
+
+def generate_snapshot_cards(snapshot_path: str, kind: str, output_path: str) -> int:
+    """
+    Streams timer or entry cards (see cards.py) for a meet snapshot into output_path, one
+    event at a time. Returns the number of pages written.
+    """
+    from cards import writeCards
+    with MeetSnapshot(snapshot_path) as snapshot:
+        return writeCards(kind, snapshot.meetName, snapshot, output_path)
+
+
+def warm_up() -> dict:
+    """
+    Does the one-time work of a process's first heat sheet ahead of it: compiles the default
+    league config, imports the PDF renderers and renders a one-event heat sheet so reportlab's
+    fonts and the heat sheet styles are loaded.
+    Returns the time each step took (see StageTimer.asDict).
+    """
+    timer = StageTimer()
+    with timer.stage("config_load"):
+        load_config()
+    with timer.stage("imports"):
+        import pdfGen, cards
+        if SECTION_WORKERS:
+            import sectionedPdf
+    with timer.stage("templates"):
+        lane = {"lane": 1, "name": "Warm Up", "age": "", "team": "", "seed": "NT", "relaySwimmers": []}
+        model = {"number": 1, "title": "Warm Up", "combinedWith": None, "heats": [{"label": "Heat 1 of 1", "lanes": [lane]}]}
+        pdfGen.buildHeatSheetBytes("Warm Up", [model], renderer=PDF_RENDERER)
+    return timer.asDict()
+
+
+def warm_up_in_background() -> threading.Thread:
+    """
+    Runs warm_up on a daemon thread, so the CLI's prompts show at once and the renderers are
+    loaded by the time the user has answered them. A failure is left for generation to report.
+    """
+    def run():
+        try:
+            warm_up()
+        except Exception:
+            pass
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
 
 def inputsAndGeneration():
     """
@@ -111,19 +328,8 @@ def inputsAndGeneration():
     pdf_path = generate_meet_pdf(meetName, numLanes, emptyLanes, swimmer_files, relay_files)
     print(f"{meetName}.pdf successfully generated in 'pdf Outputs' directory", end= '\n\n')
     
-    with open("config.json", "r") as f:
-        config = json.load(f)
-    if config.get("output", {}).get("cleanup_text_files", False):
-        import os
-        try:
-            for filename in os.listdir("Event Outputs"):
-                if filename.startswith(meetName) and filename.endswith(".txt"):
-                    os.remove(os.path.join("Event Outputs", filename))
-            print("Temporary text files have been cleaned up.\n")
-        except Exception as e:
-            print(f"Failed to clean up text files: {e}\n")
-    
 
 if __name__ == "__main__":
+    warm_up_in_background()
     title()
     main()
\ No newline at end of file
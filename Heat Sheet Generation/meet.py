@@ -2,9 +2,63 @@
 # by Aiden Gray
 # Last modified 5/28/2024
 
-import csv, random, string
-from swimmer import Swimmer, Relay
+import csv
+import test
+from contextlib import contextmanager
+from swimmer import BIRTH_DATE, Swimmer, Relay, identityKey, swimmerID
 from event import Event
+from leagueConfig import compileConfig
+from seeding import METHODS
+from combineEvents import OPTIMAL, combinationReport, combineItem, groupStartLanes, optimalGroups, pairGroups
+
+
+@contextmanager
+def openSource(source):
+    """
+    Opens a .csv path for reading, or passes an already open text stream through unchanged
+    """
+    if isinstance(source, str):
+        with open(source, 'r') as file:
+            yield file
+    else:
+        yield source
+
+
+@contextmanager
+def openTable(source):
+    """
+    Yields the header row and an iterator over the remaining rows of a .csv path, an open text
+    stream, or an iterable of already split rows (e.g. an upload decoded as it is read)
+    """
+    with openSource(source) as file:
+        rows = csv.reader(file) if isinstance(source, str) or hasattr(source, "read") else iter(file)
+        yield next(rows, []), rows
+
+
+@contextmanager
+def openRows(source):
+    """
+    Yields the entry rows of a .csv path, text stream or iterable of rows, see openTable
+    The first row is the header and is skipped
+    """
+    with openTable(source) as (header, rows):
+        yield rows
+
+
+def _differingFields(first : Swimmer, second : Swimmer) -> list:
+    """
+    Returns the entry fields two imports of the same swimmer disagree on
+    """
+    fields = []
+    if first.getAgeNumber() != second.getAgeNumber():
+        fields.append("age")
+    if first.getGender() != second.getGender():
+        fields.append("gender")
+    if sorted(filter(None, first.getEvents())) != sorted(filter(None, second.getEvents())):
+        fields.append("events")
+    if (first.checkMedleyRelay(), first.checkFreeRelay()) != (second.checkMedleyRelay(), second.checkFreeRelay()):
+        fields.append("relays")
+    return fields
 
 
 class Meet:
@@ -13,232 +67,500 @@ class Meet:
     Aggregates swimmers, organizes events, and handles the creation of output files.
     """
 
-    def __init__(self, meetName : str, config : dict, numLanes : int = 6, emptyLanes : bool = False) -> None:
+    def __init__(self, meetName : str, config, numLanes : int = 6, emptyLanes : bool = False, seed = None, seeding : str = None) -> None:
         """
         Initializes a Meet object.
 
         Args:
             meetName (str): Name of the meet.
-            config (dict): The configuration dictionary loaded from config.json.
+            config (dict | CompiledConfig): The league configuration, either the dictionary loaded
+                from config.json or a config already compiled by leagueConfig.
             numLanes (int): The number of lanes available for the meet.
             emptyLanes (bool): Whether to include empty lanes in the output.
+            seed (optional): Seed for heat randomization. The same seed and entries always
+                produce the same heats. None uses the global RNG.
+            seeding (str, optional): Seeding method for every event without its own in the config
+                ('random', 'standard' or 'circle', see seeding.py). None uses the config's setting.
         """
         self.MEET_NAME = meetName
-        self._config = config
+        self._compiled = compileConfig(config)
+        self._config = self._compiled.raw
         self._idToSwimmer = {} # dictionary of swimmers mapped to ID
+        self._identities = {} # swimmer ID -> ('name|team', birth date or ''), see swimmer.identityKey
+        self._namesakes = {} # 'name|team' -> IDs of the swimmers sharing it
+        self._conflicts = [] # entries dropped for disagreeing with an already imported swimmer
         self._numToEvent = {} # dictionary of event numbers to event objects
         self._numLanes = numLanes
         self._emptyLanes = emptyLanes
+        self._seed = seed
+        if seeding is not None and seeding not in METHODS:
+            raise ValueError(f"Seeding '{seeding}' is not one of {', '.join(METHODS)}")
+        self._seeding = seeding
         self._importedRelays = [] # List of parsed relay dicts
 
+        # Lookup tables built once so events can be filled without rescanning every swimmer
+        self._entryIndex = {} # (gender, effective age, stroke) -> list of swimmer objects
+        self._relayIndex = {} # (age group, gender, stroke) -> list of relay dicts
+
 
     def __str__(self) -> str:
         pass
 
 
-    def importFile(self, filename : str) -> None:
+    def importFile(self, filename) -> dict:
         """
         Takes a .csv file and generates a swimmer object for each entry
+        filename may be a path, an open text stream or an iterable of rows, see openRows
+        Returns the import summary of importSwimmerRows
+        """
+        with openRows(filename) as rows:
+            return self.importSwimmerRows(rows)
+
+    def importSwimmerRows(self, rows) -> dict:
+        """
+        Generates a swimmer object for each already parsed entry row (header excluded)
+        Rows follow the same format as the .csv files read by importFile, optionally followed
+        by a birth date
+
+        Each swimmer's ID is derived from their name, team and birth date, so the same swimmer
+        gets the same ID in every import and is only added once however many files list them.
+        An entry without a birth date matches the one swimmer of its name and team, and an entry
+        with one matches that swimmer if their birth date is not known yet, filling it in (the
+        swimmer keeps the ID they were first given). A repeated entry that disagrees with the
+        first one (age, gender, events or relays) is a conflict: the first entry is kept and the
+        conflict reported. So is an entry without a birth date that could be any of several
+        swimmers sharing its name and team, its swimmer_id is then None
+
+        Returns:
+            dict: '{added, duplicates, conflicts}' where each conflict is
+            '{swimmer_id, name, team, fields}' naming the fields that disagree
+        """
+        added = duplicates = 0
+        conflicts = []
+        for row in rows:
+            if not row:
+                continue
+            key = identityKey(row[0], row[1], self._compiled.teamID(row[4]), row[BIRTH_DATE] if len(row) > BIRTH_DATE else "")
+            name, birthDate = key.rsplit("|", 1)
+            matches = self._matchIdentity(name, birthDate)
+            if not matches:
+                newID = swimmerID(key)
+                attempt = 0
+                while newID in self._idToSwimmer: # never overwrite another swimmer
+                    attempt += 1
+                    newID = swimmerID(key, attempt)
+                self._registerIdentity(newID, name, birthDate)
+                self._addSwimmer(Swimmer(newID, row))
+                added += 1
+                continue
+
+            swimmerObject = Swimmer(matches[0], row)
+            if len(matches) > 1:
+                conflicts.append({"swimmer_id": None, "name": swimmerObject.getName(), "team": swimmerObject.getTeam(), "fields": ["birth_date"]})
+                continue
+            existing = self._idToSwimmer[matches[0]]
+            if birthDate and not self._identities[matches[0]][1]:
+                self._identities[matches[0]] = (name, birthDate)
+            fields = _differingFields(existing, swimmerObject)
+            if fields:
+                conflicts.append({"swimmer_id": matches[0], "name": existing.getName(), "team": existing.getTeam(), "fields": fields})
+            else:
+                duplicates += 1
+        self._conflicts.extend(conflicts)
+        return {"added": added, "duplicates": duplicates, "conflicts": conflicts}
+
+    def _matchIdentity(self, name : str, birthDate : str) -> list:
+        """
+        Returns the IDs of the imported swimmers an entry could be, given its 'name|team' and
+        birth date (empty if unknown), see importSwimmerRows
+        """
+        namesakes = self._namesakes.get(name, [])
+        exact = [swimmerID for swimmerID in namesakes if self._identities[swimmerID][1] == birthDate]
+        if exact or not birthDate:
+            return exact or namesakes
+        return [swimmerID for swimmerID in namesakes if not self._identities[swimmerID][1]]
+
+    def _registerIdentity(self, swimmerID : str, name : str, birthDate : str) -> None:
+        self._identities[swimmerID] = (name, birthDate)
+        self._namesakes.setdefault(name, []).append(swimmerID)
+
+    def getConflicts(self) -> list:
+        """
+        Returns every conflict reported by importSwimmerRows so far
+        """
+        return list(self._conflicts)
+
+    def _addSwimmer(self, swimmerObject : Swimmer) -> None:
         """
-        with open(filename, 'r') as file:
-            csvReader = csv.reader(file)
-            next(csvReader) # skips header
-            for row in csvReader:
-                if row:
-                    swimmerID = "".join(random.choices(string.ascii_letters, k=5))
-                    newSwimmer = Swimmer(swimmerID, row)
-                    self._idToSwimmer.update({swimmerID:newSwimmer})
+        Registers a swimmer under its ID and in the entry index
+        """
+        self._idToSwimmer.update({swimmerObject.getSwimID():swimmerObject})
+        self._indexSwimmer(swimmerObject)
+
+    def removeSwimmers(self, swimmerIDs : list) -> list:
+        """
+        Scratches swimmers from the meet before events are generated
+        Returns the IDs that were actually removed
+        """
+        removed = []
+        for swimmerID in swimmerIDs:
+            swimmerObject = self._idToSwimmer.pop(swimmerID, None)
+            if swimmerObject is None:
+                continue
+            name, birthDate = self._identities.pop(swimmerID, (None, None))
+            if name is not None:
+                self._namesakes[name].remove(swimmerID)
+            for entries in self._entryIndex.values():
+                if swimmerObject in entries:
+                    entries.remove(swimmerObject)
+            removed.append(swimmerID)
+        return removed
+
+    def getSwimmer(self, swimmerID : str) -> Swimmer:
+        """
+        Returns the swimmer object with the given ID, or None
+        """
+        return self._idToSwimmer.get(swimmerID)
+
+    def findSwimmers(self, name : str, team : str = None) -> list:
+        """
+        Returns the IDs of swimmers with the given full name (and team, if given), ignoring case
+        """
+        name = name.lower().strip()
+        matches = []
+        for swimmerID, swimmerObject in self._idToSwimmer.items():
+            if swimmerObject.getName().lower() != name:
+                continue
+            if team is not None and swimmerObject.getTeam().lower() != team.lower().strip():
+                continue
+            matches.append(swimmerID)
+        return matches
+
+    def _indexSwimmer(self, swimmerObject : object) -> None:
+        """
+        Adds a swimmer to the entry index under each stroke they are registered for
+        """
+        if swimmerObject.getGender() == 'm':
+            gender = 'boys'
+        else:
+            gender = 'girls'
+        effectiveAge = str(self._compiled.effectiveAge(swimmerObject.getAgeNumber()))
+
+        strokes = []
+        for entry in swimmerObject.getEvents():
+            stroke = self._compiled.strokeLookup.get(entry)
+            if stroke is not None and stroke not in strokes:
+                strokes.append(stroke)
+
+        for stroke in strokes:
+            self._entryIndex.setdefault((gender, effectiveAge, stroke), []).append(swimmerObject)
 
-    def importRelays(self, filename: str) -> None:
+    def importRelays(self, filename) -> None:
         """
         Takes a .csv file and imports relay entries.
+        filename may be a path, an open text stream or an iterable of rows, see openRows
         Format: Team,Age Group,Gender,Stroke,Relay Identifier,Swimmer 1,Swimmer 2,Swimmer 3,Swimmer 4
         """
-        with open(filename, 'r') as file:
-            csvReader = csv.reader(file)
-            next(csvReader) # Skip header
-            for row in csvReader:
-                if not row or not row[0]: continue
-                team_name = row[0].strip()
-                age_group = row[1].strip()
-                gender = row[2].strip()
-                stroke = row[3].strip()
-                identifier = row[4].strip()
-                swimmers = [s.strip() for s in row[5:] if s.strip()]
-                
-                # Look up teamID from config
-                team_id = "unknown"
-                for t in self._config.get("teams", []):
-                    if t["name"].lower() == team_name.lower():
-                        team_id = t["id"]
-                        break
-                
-                relay_data = {
-                    "team": team_name,
-                    "teamID": team_id,
-                    "age_group": age_group,
-                    "gender": gender,
-                    "stroke": stroke,
-                    "identifier": identifier,
-                    "swimmers": swimmers
-                }
-                self._importedRelays.append(relay_data)
+        with openRows(filename) as rows:
+            self.importRelayRows(rows)
+
+    def importRelayRows(self, rows) -> None:
+        """
+        Imports already parsed relay entry rows (header excluded)
+        Rows follow the same format as the .csv files read by importRelays
+        """
+        for row in rows:
+            if not row or not row[0]: continue
+            team_name = row[0].strip()
+            age_group = row[1].strip()
+            gender = row[2].strip()
+            stroke = row[3].strip()
+            identifier = row[4].strip()
+            swimmers = [s.strip() for s in row[5:] if s.strip()]
+            
+            # Look up teamID from config
+            team_id = self._compiled.teamIDs.get(team_name.lower(), "unknown")
+            
+            relay_data = {
+                "team": team_name,
+                "teamID": team_id,
+                "age_group": age_group,
+                "gender": gender,
+                "stroke": stroke,
+                "identifier": identifier,
+                "swimmers": swimmers
+            }
+            self._addRelay(relay_data)
+
+    def _addRelay(self, relay_data : dict) -> None:
+        """
+        Registers a parsed relay dict and adds it to the relay index
+        """
+        self._importedRelays.append(relay_data)
+        relayKey = (relay_data["age_group"].lower(), relay_data["gender"].lower(), relay_data["stroke"].lower())
+        self._relayIndex.setdefault(relayKey, []).append(relay_data)
 
-        #print(f"There are {len(self._idToSwimmer)} swimmers imported")
+    def removeRelays(self, match : dict) -> int:
+        """
+        Scratches every relay whose fields equal all of the given ones (ignoring case),
+        e.g. '{"team": "Islands", "identifier": "B"}'. Returns the number removed.
+        """
+        def matches(relay_data):
+            return all(str(relay_data.get(key, "")).lower() == str(value).lower() for key, value in match.items())
+
+        kept = [r for r in self._importedRelays if not matches(r)]
+        removed = len(self._importedRelays) - len(kept)
+        self._importedRelays = []
+        self._relayIndex = {}
+        for relay_data in kept:
+            self._addRelay(relay_data)
+        return removed
 
 
     def generateEvents(self) -> None:
         """
-        Generates event objects for each event based on parameters
-        """
-        orderOfEvents = self._config["events"]["order"]
-        strokeNames = self._config["events"]["stroke_names"]
-        self.ageGroups = self._config["age_groups"]["individual"]
-        eventNumber = 1
-
-        relays = self._config["events"].get("relays", [])
-
-        for relay in relays:
-            if relay.get("position") == "start":
-                eventNumber = self._generateRelays(eventNumber, relay.get("stroke"))
-
-        for strokeIndex in range(len(orderOfEvents)):
-            numEvents = len(self.ageGroups) * 2
-            ageIndex = -1
-            for event in range(numEvents):
-                if eventNumber % 2 == 1:
-                    ageIndex += 1
-                ageList = self.ageGroups[ageIndex].split()
-                age = ageList[0]
-                eventData = [eventNumber,age,orderOfEvents[strokeIndex]]
-                # TODO: Determine which swimmer objects need to go in this event
-                # Probably write a function for this for clarity
-                newEvent = Event(eventData, self.MEET_NAME, False, self._config, numLanes=self._numLanes, emptyLanes=self._emptyLanes)
-                newEvent.setAgeGroup(self.ageGroups[ageIndex])
-                self._checkSwimmers(newEvent, orderOfEvents[strokeIndex], strokeNames[strokeIndex])
-                self._numToEvent.update({eventNumber:newEvent})
-                eventNumber += 1
-
-        for relay in relays:
-            if relay.get("position") == "end":
-                eventNumber = self._generateRelays(eventNumber, relay.get("stroke"))
-                
-        self._combineSmallEvents()
+        Generates event objects for each event in the config's precompiled event plan
+        """
+        self.ageGroups = self._compiled.individualAgeGroups
+        self._relayAgeGroups = self._compiled.relayAgeGroups
 
-    def _generateRelays(self, startNumber : int, stroke : str) -> int:
-        """
-        Generates relay events based on teams in config.
-        """
-        self._relayAgeGroups = self._config["age_groups"]["relay"]
-        numEvents = len(self._relayAgeGroups) * 2
-        eventNumber = startNumber
-        ageIndex = -1
-        
-        girls_start_odd = self._config["events"].get("girls_start_odd", True)
-        
-        for event in range(numEvents):
-            if eventNumber % 2 == 1:
-                ageIndex += 1
-            ageList = self._relayAgeGroups[ageIndex].split()
-            age = ageList[0]
-            
-            if girls_start_odd:
-                gender_str = "Girls" if eventNumber % 2 == 1 else "Boys"
+        for plan in self._compiled.eventPlan:
+            eventNumber = plan["number"]
+            if plan["relay"]:
+                newEvent = self._generateRelay(plan)
             else:
-                gender_str = "Boys" if eventNumber % 2 == 1 else "Girls"
-                
-            relayObjects = []
-            for r in self._importedRelays:
-                if (r["age_group"].lower() == self._relayAgeGroups[ageIndex].lower() and 
-                    r["gender"].lower() == gender_str.lower() and 
-                    r["stroke"].lower() == stroke.lower()):
-                    
-                    newRelay = Relay(r["team"], r["teamID"], r["identifier"], r["swimmers"])
-                    relayObjects.append(newRelay)
-                    
-            eventData = [eventNumber,age,f"{stroke} Relay"]
-            newEvent = Event(eventData, self.MEET_NAME, True, self._config, relayObjects, numLanes=self._numLanes, emptyLanes=self._emptyLanes)
-            newEvent.setAgeGroup(self._relayAgeGroups[ageIndex])
+                eventData = [eventNumber, plan["age"], plan["stroke"]]
+                newEvent = Event(eventData, self.MEET_NAME, False, self._compiled, numLanes=self._numLanes, emptyLanes=self._emptyLanes)
+                newEvent.setAgeGroup(plan["ageGroup"])
+                self._checkSwimmers(newEvent, plan["stroke"], plan["strokeName"])
             self._numToEvent.update({eventNumber:newEvent})
-            eventNumber += 1
 
-        return eventNumber
+        for number, event in self._numToEvent.items():
+            event.setSeeding(self._compiled.seedingFor(number, self._seeding), self._compiled.circleSeedHeats)
+            # Give each event its own repeatable seed so heats don't depend on render order
+            if self._seed is not None:
+                event.setSeed(f"{self._seed}-{number}")
+                
+        self._combineSmallEvents()
+
+    def applySeedTimes(self, timesDatabase, course : str = "SCY") -> int:
+        """
+        Looks up every individual entry's best time with one batched query and prints it as
+        the entry's seed time
+
+        Args:
+            timesDatabase (TimesDatabase): Past results, see timesDB.py
+            course (str): Course the seed times must have been swum in
+
+        Returns:
+            int: Number of entries given a seed time
+        """
+        eventEntries = []
+        for event in self._numToEvent.values():
+            if event.isRelay():
+                continue
+            number, gender, age, distance, stroke = event.getEventData()
+            # Results are stored under the config's team IDs (see TimesDatabase.importResults)
+            entries = [(swimmer.getSwimID(), (swimmer.getName(), self._compiled.teamID(swimmer.getTeam()), stroke, distance))
+                       for swimmer in event.getSwimmers().values()]
+            eventEntries.append((event, entries))
+
+        best = timesDatabase.bestTimes((entry for event, entries in eventEntries for swimID, entry in entries), course)
+        for event, entries in eventEntries:
+            event.setSeedTimes({swimID: best[entry] for swimID, entry in entries if entry in best})
+        return len(best)
+
+    def _generateRelay(self, plan : dict) -> Event:
+        """
+        Generates a relay event from its event plan entry, filled with the teams entered in it
+        """
+        stroke = plan["stroke"]
+        relayObjects = []
+        relayKey = (plan["ageGroup"].lower(), plan["gender"], stroke.lower())
+        for r in self._relayIndex.get(relayKey, []):
+            newRelay = Relay(r["team"], r["teamID"], r["identifier"], r["swimmers"])
+            relayObjects.append(newRelay)
+
+        eventData = [plan["number"], plan["age"], f"{stroke} Relay"]
+        newEvent = Event(eventData, self.MEET_NAME, True, self._compiled, relayObjects, numLanes=self._numLanes, emptyLanes=self._emptyLanes)
+        newEvent.setAgeGroup(plan["ageGroup"])
+        return newEvent
+
+    def _combineItems(self) -> list:
+        """
+        Returns every event in event order as the combine solver sees it (see combineEvents.py)
+        """
+        rules = self._compiled.combineRules
+        return [combineItem(plan, len(self._numToEvent[plan["number"]].getSwimmers()), rules)
+                for plan in self._compiled.eventPlan if plan["number"] in self._numToEvent]
 
     def _combineSmallEvents(self) -> None:
         """
-        Loops through events in pairs and combines them into a single heat
-        if their total number of swimmers + 1 <= numLanes.
+        Combines small events into shared heats using the league's combine strategy
+        'pairs' combines events 2n-1 and 2n if their total number of swimmers + 1 <= numLanes,
+        'optimal' chooses the groups leaving the fewest heats (see combineEvents.optimalGroups)
         """
-        if not self._config.get("events", {}).get("combine_small_events", False):
+        if not self._compiled.combineSmallEvents:
             return
-            
-        maxEvent = max(self._numToEvent.keys()) if self._numToEvent else 0
-        for i in range(1, maxEvent, 2):
-            event1 = self._numToEvent.get(i)
-            event2 = self._numToEvent.get(i + 1)
-            if not event1 or not event2:
-                continue
-                
-            swimmers1 = len(event1.getSwimmerIDs())
-            swimmers2 = len(event2.getSwimmerIDs())
-            
-            if swimmers1 == 0 or swimmers2 == 0:
-                continue
-                
-            if swimmers1 + swimmers2 <= self._numLanes - 1:
-                total_lanes = swimmers1 + 1 + swimmers2
-                middle_lane = self._numLanes // 2
-                start_lane1 = middle_lane - (total_lanes - 1) // 2
-                start_lane2 = start_lane1 + swimmers1 + 1
-                
-                event1.setCombinedLanes(start_lane1, i + 1)
-                event2.setCombinedLanes(start_lane2, i)
+
+        for event in self._numToEvent.values():
+            event.setCombinedLanes(None, None)
+        rules = self._compiled.combineRules
+        items = self._combineItems()
+        if rules["strategy"] == OPTIMAL:
+            groups, bufferLanes = optimalGroups(items, self._numLanes, rules), rules["buffer_lanes"]
+        else:
+            groups, bufferLanes = pairGroups(items, self._numLanes), 1
+
+        for group in groups:
+            events = [self._numToEvent[number] for number in group]
+            startLanes = groupStartLanes([len(event.getSwimmers()) for event in events], self._numLanes, bufferLanes)
+            for number, event, startLane in zip(group, events, startLanes):
+                event.setCombinedLanes(startLane, [other for other in group if other != number])
+
+    def combinationReport(self) -> dict:
+        """
+        Reports the heats the optimal combine strategy saves over the original pairs, whichever
+        strategy the league uses, see combineEvents.combinationReport
+        """
+        return combinationReport(self._combineItems(), self._numLanes, self._compiled.combineRules)
 
     def _checkSwimmers(self, eventObject : object, stroke : str, strokeName : str) -> None:
         """
-        returns list of swimmer objects that should be in a given event object
+        Adds the swimmer objects that should be in a given event object using the entry index
         eventData is returned as '[event number, gender, age, distance, stroke]'
-        swimmer data is returned as '[full name, gender, age]'
         """
         eventData = eventObject.getEventData()
-        #print("Event data: ", eventData)
-        for key in self._idToSwimmer:
-            swimmerObject = self._idToSwimmer[key]
-            swimmerData = swimmerObject.getSwimmerData()
-            if swimmerData[1] == 'm':
-                gender = 'boys'
-            else:
-                gender = 'girls'
+        strokeLookup = self._compiled.strokeLookup
+        strokeCode = strokeLookup.get(stroke.lower(), strokeLookup.get(strokeName.lower(), stroke))
+        eventObject.addSwimmers(self._entryIndex.get((eventData[1], str(eventData[2]), strokeCode), []))
 
-            age = int(swimmerData[2]) # This was a design oversight
-            min_age = self._config["age_groups"]["effective_age"]["min_age"]
-            max_age = self._config["age_groups"]["effective_age"]["max_age"]
-            group_by = self._config["age_groups"]["effective_age"].get("group_by", 2)
-            
-            if age <= min_age:
-                effectiveAge = min_age
-            elif min_age < age < max_age:
-                if age % group_by == 0:
-                    effectiveAge = age - 1
-                else:
-                    effectiveAge = age
-            else:
-                effectiveAge = max_age
 
-            #print("Swimmer data:", swimmerData)
-            if eventData[1] == gender and eventData[2] == str(effectiveAge):
-                #print("Level 1")
-                if swimmerObject.checkEvent(stroke, strokeName):
-                    #print(swimmerObject)
-                    eventObject.addSwimmer(swimmerObject)
+    def getConfig(self):
+        """
+        Returns the meet's compiled league config
+        """
+        return self._compiled
 
+    def getEvent(self, eventNumber : int) -> Event:
+        """
+        Returns the event object for an event number, or None
+        """
+        return self._numToEvent.get(eventNumber)
 
-    def generateTxtFiles(self, output_dir: str = "Event Outputs/") -> None:
-        print_empty_events = self._config.get("events", {}).get("print_empty_events", False)
-        for key in self._numToEvent:
-            event = self._numToEvent[key]
-            if not print_empty_events and len(event.getSwimmers()) == 0:
+    def getEventNumbers(self) -> list:
+        """
+        Returns every generated event number in order
+        """
+        return sorted(self._numToEvent)
+
+    def isPrinted(self, eventObject : Event) -> bool:
+        """
+        Returns True if the event appears on the heat sheet
+        """
+        return self._compiled.printEmptyEvents or len(eventObject.getSwimmers()) > 0
+
+    def exportState(self) -> dict:
+        """
+        Returns a JSON-friendly snapshot of the computed meet: settings, swimmers, relays and
+        every event's heats, combined lanes and seed times. Meet.fromState rebuilds a meet from it.
+        """
+        events = {}
+        for number in self.getEventNumbers():
+            event = self._numToEvent[number]
+            events[str(number)] = {
+                "heats": event.getHeatIDs(),
+                "combined": list(event.getCombinedLanes()),
+                "seed_times": event.getSeedTimes(),
+            }
+        return {
+            "meet_name": self.MEET_NAME,
+            "num_lanes": self._numLanes,
+            "empty_lanes": self._emptyLanes,
+            "seed": self._seed,
+            "seeding": self._seeding,
+            "league": self._compiled.league,
+            "config_digest": self._compiled.digest,
+            "swimmers": {swimmerID: swimmer.toRecord() for swimmerID, swimmer in self._idToSwimmer.items()},
+            "identities": {swimmerID: list(identity) for swimmerID, identity in self._identities.items()},
+            "relays": [dict(r) for r in self._importedRelays],
+            "events": events,
+        }
+
+    @classmethod
+    def fromState(cls, state : dict, config) -> "Meet":
+        """
+        Rebuilds a meet's swimmers and relays from exportState, keeping swimmer IDs and their
+        identities, so rows imported afterwards are still deduplicated against them
+        Events are not generated, call generateEvents (and restoreHeats) afterwards
+        """
+        meetObject = cls(state["meet_name"], config, state["num_lanes"], state["empty_lanes"], seed=state.get("seed"),
+                         seeding=state.get("seeding"))
+        identities = state.get("identities", {})
+        for swimmerID, record in state["swimmers"].items():
+            swimmerObject = Swimmer.fromRecord(swimmerID, record)
+            # States saved before identities were kept only know each swimmer's name and team
+            name, birthDate = identities.get(swimmerID) or identityKey(
+                swimmerObject.getName(), "", meetObject._compiled.teamID(swimmerObject.getTeam())).rsplit("|", 1)
+            meetObject._registerIdentity(swimmerID, name, birthDate)
+            meetObject._addSwimmer(swimmerObject)
+        for relay_data in state["relays"]:
+            meetObject._addRelay(dict(relay_data))
+        return meetObject
+
+    def restoreHeats(self, state : dict) -> list:
+        """
+        Gives every individual event back the seed times saved in state for its remaining
+        swimmers, on top of any already applied, then reuses the saved heats of each one whose
+        entries are unchanged
+        Returns the event numbers whose heats were restored
+        """
+        restored = []
+        for number, event in self._numToEvent.items():
+            saved = state["events"].get(str(number))
+            if saved is None or event.isRelay():
                 continue
+            swimmerIDs = set(event.getSwimmerIDs())
+            seedTimes = event.getSeedTimes()
+            seedTimes.update((swimID, seconds) for swimID, seconds in saved.get("seed_times", {}).items() if swimID in swimmerIDs)
+            event.setSeedTimes(seedTimes)
+            savedIDs = [swimID for heat in saved["heats"] for swimID in heat]
+            if sorted(savedIDs) == sorted(event.getSwimmerIDs()):
+                event.setHeats(saved["heats"])
+                restored.append(number)
+        return restored
+
+    def _eventsToPrint(self) -> list:
+        """
+        Returns event objects in event number order, leaving off empty events unless configured
+        """
+        return [self._numToEvent[key] for key in sorted(self._numToEvent) if self.isPrinted(self._numToEvent[key])]
+
+    def organizeHeats(self) -> None:
+        """
+        Organizes the heats of every printed event, in the order getRenderModels renders them,
+        so heat organization can be timed apart from rendering
+        """
+        for event in self._eventsToPrint():
+            event.getHeats()
+
+    def getRenderModels(self) -> list:
+        """
+        Returns the render model of each printed event in event number order
+        See Event.buildRenderModel for the model format
+        """
+        return [event.buildRenderModel() for event in self._eventsToPrint()]
+
+    def iterRenderModels(self):
+        """
+        Yields the render model of each printed event in event number order, building each
+        only when it is reached so callers can stream a meet one event at a time
+        """
+        for event in self._eventsToPrint():
+            yield event.buildRenderModel()
+
+    def generateTxtFiles(self, output_dir: str = "Event Outputs/") -> None:
+        for event in self._eventsToPrint():
             event.exportEvent(output_dir=output_dir)
 
 
@@ -252,5 +574,38 @@ def testMeet():
     testMeet.generateTxtFiles()
 
 
+def testSwimmerIdentity():
+    import json
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    testMeet = Meet("Test Meet", config)
+    first = testMeet.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"],
+    ])
+    second = testMeet.importSwimmerRows([
+        ["ANN ", "ash", "9", "f", "Islands", "back", "free", "", "yes", "no"], # same swimmer, another file
+        ["Bea", "Birch", "11", "f", "lib", "free", "fly", "", "no", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no", "11/07/2015"], # her birth date filled in
+        ["Bea", "Birch", "8", "f", "lib", "free", "", "", "no", "no", "2017-03-01"], # a different Bea
+    ])
+    test.testEqual((first["added"], second["added"], second["duplicates"]), (2, 1, 2))
+    test.testEqual([(c["name"], c["fields"]) for c in testMeet.getConflicts()], [("Bea Birch", ["age"])])
+    test.testEqual(testMeet.findSwimmers("ann ash"), [swimmerID("ann ash|isl|")])
+    third = testMeet.importSwimmerRows([
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no", "2015-11-07"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"], # either Bea
+    ])
+    test.testEqual((third["duplicates"], third["conflicts"][0]["fields"]), (1, ["birth_date"]))
+
+    state = json.loads(json.dumps(testMeet.exportState()))
+    restored = Meet.fromState(state, config)
+    ann = ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "no"]
+    test.testEqual(restored.importSwimmerRows([ann])["duplicates"], 1)
+    test.testEqual(restored.importSwimmerRows([["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"]])["conflicts"][0]["swimmer_id"], None)
+    del state["identities"] # saved before identities were kept
+    test.testEqual(Meet.fromState(state, config).importSwimmerRows([ann + ["2016-01-01"]])["duplicates"], 1)
+
 if __name__ == "__main__":
+    testSwimmerIdentity()
     testMeet()
\ No newline at end of file
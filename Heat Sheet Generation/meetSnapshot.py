@@ -0,0 +1,303 @@
+# Compact binary snapshots of computed meets, read in place through a read-only memory map
+# Last modified 10/18/2026
+
+import mmap, struct, sys
+from array import array
+from event import combinedLabel
+import test
+
+MAGIC = b"MEETSNAP"
+VERSION = 2
+NONE = 0xFFFFFFFF # stands in for None (combined start lane, empty lane) in the uint32 tables
+
+# Header: magic, version, meet ID and meet name string indexes, then the row count of each table
+_HEADER = struct.Struct("<8s3I7I")
+# Columns of each table, every cell a little endian uint32
+EVENT_COLUMNS = 6  # number, title, combined start lane, first and count of combined events, first heat (heat count from the next row)
+HEAT_COLUMNS = 1   # first lane
+LANE_COLUMNS = 3   # lane, entry, seed
+ENTRY_COLUMNS = 5  # name, age, team, first relay swimmer, relay swimmer count
+FIRST_HEAT = 5     # column of an event's first heat
+
+
+def _u32(values : list) -> bytes:
+    table = array("I", values)
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table.tobytes()
+
+
+class _Interner:
+    """
+    Assigns each distinct value an index in insertion order
+    """
+
+    def __init__(self) -> None:
+        self.index = {}
+        self.values = []
+
+
+    def add(self, value) -> int:
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def packMeet(meetObject, meetID : str) -> bytes:
+    """
+    Packs a computed meet's printed events, with their heats, lanes and combined event
+    metadata, into the snapshot format MeetSnapshot reads
+
+    Every string (names, teams, ages, seed times, titles) is stored once in a string table and
+    each swimmer or relay team once in an entry table, lanes only refer to them by index
+
+    Args:
+        meetObject (Meet): A meet whose events have been generated
+        meetID (str): ID the snapshot is published under
+
+    Returns:
+        bytes: Contents of the snapshot file
+    """
+    strings = _Interner()
+    entries = _Interner()
+    events = []
+    heatRows = []
+    laneRows = []
+    relayNames = []
+    combined = []
+    for number in meetObject.getEventNumbers():
+        event = meetObject.getEvent(number)
+        if not meetObject.isPrinted(event):
+            continue
+        model = event.buildRenderModel()
+        startLane, combinedWith = event.getCombinedLanes()
+        partners = [] if combinedWith is None else combinedWith if isinstance(combinedWith, list) else [combinedWith]
+        events += [model["number"], strings.add(model["title"]), NONE if startLane is None else startLane,
+                   len(combined), len(partners), len(heatRows)]
+        combined += partners
+        for heat in model["heats"]:
+            heatRows.append(len(laneRows) // LANE_COLUMNS)
+            for lane in heat["lanes"]:
+                if lane["name"] is None:
+                    laneRows += [lane["lane"], NONE, NONE]
+                    continue
+                entry = (lane["name"], lane["age"], lane["team"], tuple(lane["relaySwimmers"]))
+                laneRows += [lane["lane"], entries.add(entry), strings.add(lane["seed"])]
+
+    entryRows = []
+    for name, age, team, swimmers in entries.values:
+        entryRows += [strings.add(name), strings.add(age), strings.add(team), len(relayNames), len(swimmers)]
+        relayNames += [strings.add(swimmer) for swimmer in swimmers]
+    idIndex = strings.add(meetID)
+    nameIndex = strings.add(meetObject.MEET_NAME)
+
+    encoded = [value.encode("utf-8") for value in strings.values]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    data = b"".join(encoded)
+    data += b"\0" * (-len(data) % 4) # keeps the tables after it aligned for memoryview.cast
+
+    header = _HEADER.pack(MAGIC, VERSION, idIndex, nameIndex, len(strings.values),
+                          len(events) // EVENT_COLUMNS, len(heatRows), len(laneRows) // LANE_COLUMNS,
+                          len(entries.values), len(relayNames), len(combined))
+    return b"".join([header, _u32(offsets), data, _u32(events), _u32(heatRows),
+                     _u32(laneRows), _u32(entryRows), _u32(relayNames), _u32(combined)])
+
+
+class MeetSnapshot:
+    """
+    A packed meet read straight from its file's pages: nothing is parsed when it is opened and
+    every worker process maps the same page cache, so opening a snapshot takes microseconds
+    and costs each worker next to no memory. Render models are rebuilt on demand and match
+    Event.buildRenderModel exactly
+    Call close (or use the snapshot as a context manager) to unmap the file once done with it
+    """
+
+    def __init__(self, path : str) -> None:
+        """
+        Maps a snapshot file read-only
+
+        Raises:
+            ValueError: If the file is not a snapshot of this version
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, version, idIndex, nameIndex, *counts = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} meet snapshot")
+        numStrings, numEvents, numHeats, numLanes, numEntries, numRelayNames, numCombined = counts
+
+        position = _HEADER.size
+        self._offsets, position = self._table(view, position, numStrings + 1)
+        self._data = view[position:position + self._offsets[numStrings]]
+        position += self._offsets[numStrings] + (-self._offsets[numStrings] % 4)
+        self._events, position = self._table(view, position, numEvents * EVENT_COLUMNS)
+        self._heats, position = self._table(view, position, numHeats)
+        self._lanes, position = self._table(view, position, numLanes * LANE_COLUMNS)
+        self._entries, position = self._table(view, position, numEntries * ENTRY_COLUMNS)
+        self._relayNames, position = self._table(view, position, numRelayNames)
+        self._combined, position = self._table(view, position, numCombined)
+        self._numHeats = numHeats
+        self._numLanes = numLanes
+        self.meetID = self._string(idIndex)
+        self.meetName = self._string(nameIndex)
+        self.eventNumbers = self._events[0::EVENT_COLUMNS] if numEvents else []
+        self._view = view
+
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot's file, the snapshot can't be read afterwards
+        Closing a closed snapshot does nothing
+        """
+        if self._map.closed:
+            return
+        # Every view into the map must be released before it can be unmapped
+        for table in (self.eventNumbers, self._offsets, self._data, self._events, self._heats, self._lanes,
+                      self._entries, self._relayNames, self._combined, self._view):
+            if isinstance(table, memoryview):
+                table.release()
+        self._map.close()
+
+
+    def __enter__(self) -> "MeetSnapshot":
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+    @staticmethod
+    def _table(view : memoryview, position : int, length : int) -> tuple:
+        end = position + length * 4
+        if sys.byteorder == "little":
+            table = view[position:end].cast("I")
+        else:
+            table = array("I", view[position:end])
+            table.byteswap()
+        return table, end
+
+
+    def _string(self, index : int) -> str:
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+
+    def __len__(self) -> int:
+        return len(self.eventNumbers)
+
+
+    def renderModel(self, index : int) -> dict:
+        """
+        Returns the render model of the index-th printed event (see Event.buildRenderModel)
+        """
+        row = index * EVENT_COLUMNS
+        number, title = self._events[row:row + 2]
+        firstHeat = self._events[row + FIRST_HEAT]
+        lastHeat = self._events[row + EVENT_COLUMNS + FIRST_HEAT] if index + 1 < len(self) else self._numHeats
+        combinedWith = self._combinedWith(row)
+        model = {
+            "number": number,
+            "title": self._string(title),
+            "combinedWith": combinedWith,
+            "heats": [],
+        }
+        for heat in range(firstHeat, lastHeat):
+            label = f"Heat {heat - firstHeat + 1} of {lastHeat - firstHeat}"
+            if combinedWith is not None:
+                label += f" ({combinedLabel(combinedWith)})"
+            lastLane = self._heats[heat + 1] if heat + 1 < self._numHeats else self._numLanes
+            lanes = []
+            for lane in range(self._heats[heat], lastLane):
+                laneNumber, entry, seed = self._lanes[lane * LANE_COLUMNS:(lane + 1) * LANE_COLUMNS]
+                if entry == NONE:
+                    lanes.append({"lane": laneNumber, "name": None, "age": "", "team": "", "seed": "", "relaySwimmers": []})
+                    continue
+                name, age, team, firstSwimmer, swimmers = self._entries[entry * ENTRY_COLUMNS:(entry + 1) * ENTRY_COLUMNS]
+                lanes.append({
+                    "lane": laneNumber,
+                    "name": self._string(name),
+                    "age": self._string(age),
+                    "team": self._string(team),
+                    "seed": self._string(seed),
+                    "relaySwimmers": [self._string(s) for s in self._relayNames[firstSwimmer:firstSwimmer + swimmers]],
+                })
+            model["heats"].append({"label": label, "lanes": lanes})
+        return model
+
+
+    def _combinedWith(self, row : int):
+        first, count = self._events[row + 3:row + 5]
+        if count == 0:
+            return None
+        return self._combined[first] if count == 1 else list(self._combined[first:first + count])
+
+
+    def getCombinedLanes(self, index : int) -> tuple:
+        """
+        Returns the index-th event's '(start lane, combined event number or numbers)', as Event.getCombinedLanes
+        """
+        row = index * EVENT_COLUMNS
+        startLane = self._events[row + 2]
+        return (None if startLane == NONE else startLane, self._combinedWith(row))
+
+
+    def getRenderModels(self, start : int = 0, stop : int = None) -> list:
+        """
+        Returns the render models of printed events start to stop, all of them by default,
+        as Meet.getRenderModels does
+        """
+        return [self.renderModel(index) for index in range(*slice(start, stop).indices(len(self)))]
+
+
+    def iterRenderModels(self):
+        """
+        Yields the render model of each printed event in turn, as Meet.iterRenderModels does
+        """
+        for index in range(len(self)):
+            yield self.renderModel(index)
+
+
+def testMeetSnapshot():
+    import json, os, tempfile
+    from meet import Meet
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    config["events"]["combine"] = {"strategy": "optimal"}
+    meetObject = Meet("Test Meet", config, emptyLanes=True, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "yes"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"],
+        ["Zoë", "Ång", "12", "f", "lib", "free", "", "", "no", "no"],
+        ["Cal", "Cole", "10", "m", "isl", "free", "", "", "no", "no"],
+    ])
+    meetObject.importRelayRows([["Islands", "9 & 10", "girls", "free", "A", "a", "b", "c", "d"]])
+    meetObject.generateEvents()
+    models = meetObject.getRenderModels()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "meet.snap")
+        with open(path, "wb") as f:
+            f.write(packMeet(meetObject, "abc123"))
+        with MeetSnapshot(path) as snapshot:
+            test.testEqual(snapshot.getRenderModels() == models, True)
+        test.testEqual(snapshot._map.closed, True)
+        snapshot.close()
+        snapshot = MeetSnapshot(path)
+        test.testEqual((snapshot.meetID, snapshot.meetName, len(snapshot)), ("abc123", "Test Meet", len(models)))
+        test.testEqual(snapshot.getRenderModels() == models, True)
+        test.testEqual(snapshot.getRenderModels(1, 2) == models[1:2], True)
+        test.testEqual(list(snapshot.eventNumbers), [model["number"] for model in models])
+        combined = [i for i, model in enumerate(models) if isinstance(model["combinedWith"], list)]
+        test.testEqual(len(combined), 3) # the three 50 free events share a heat
+        event = meetObject.getEvent(models[combined[0]]["number"])
+        test.testEqual(snapshot.getCombinedLanes(combined[0]), event.getCombinedLanes())
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    testMeetSnapshot()
@@ -0,0 +1,264 @@
+# Published snapshots of computed meets, served one page of events at a time
+# Last modified 10/18/2026
+
+import html, os, tempfile, threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from event import combinedLabel
+from meetSnapshot import MeetSnapshot
+import test
+
+MAX_PAGE_EVENTS = 20
+
+
+def _laneView(lane : dict) -> dict:
+    view = {"lane": lane["lane"], "name": lane["name"], "age": lane["age"], "team": lane["team"], "seed": lane["seed"]}
+    if lane["relaySwimmers"]:
+        view["relay_swimmers"] = lane["relaySwimmers"]
+    return view
+
+
+def eventView(model : dict) -> dict:
+    """
+    Returns the compact public form of an event render model (see Event.buildRenderModel)
+    Empty lanes are left out, the combined event note is kept once per event instead of in
+    every heat label
+    """
+    combined = model["combinedWith"]
+    heats = []
+    for number, heat in enumerate(model["heats"], start=1):
+        heats.append({"heat": number, "of": len(model["heats"]),
+                      "lanes": [_laneView(lane) for lane in heat["lanes"] if lane["name"] is not None]})
+    return {
+        "number": model["number"],
+        "title": model["title"],
+        "combined_with": combined,
+        "note": combinedLabel(combined) if combined is not None else None,
+        "heats": heats,
+    }
+
+
+class MeetStore:
+    """
+    Published meets kept as one binary snapshot each (see meetSnapshot.py), with the most
+    recently read snapshots left memory mapped, older ones are closed. A snapshot never changes once published, since
+    its ID is derived from everything it was built from, so every page of it can be cached
+    indefinitely, and the worker processes of a server all share its pages
+    """
+
+    def __init__(self, directory : str, maxCached : int = 32) -> None:
+        self._directory = directory
+        self._maxCached = maxCached
+        self._cache = OrderedDict() # meet ID -> MeetSnapshot
+        self._readers = {} # MeetSnapshot -> threads reading it
+        self._evicted = set() # snapshots to close once their last reader is done
+        self._lock = threading.Lock()
+
+
+    def _path(self, meetID : str) -> str:
+        if not meetID.isalnum():
+            raise KeyError(meetID)
+        return os.path.join(self._directory, f"{meetID}.meet")
+
+
+    def path(self, meetID : str) -> str:
+        """
+        Returns the snapshot file of a published meet
+
+        Raises:
+            KeyError: If no meet is published under meetID
+        """
+        path = self._path(meetID)
+        if not os.path.isfile(path):
+            raise KeyError(meetID)
+        return path
+
+
+    def exists(self, meetID : str) -> bool:
+        try:
+            return os.path.isfile(self._path(meetID))
+        except KeyError:
+            return False
+
+
+    def save(self, meetID : str, data : bytes) -> None:
+        """
+        Writes a snapshot from meetSnapshot.packMeet atomically, readers never see a partly
+        written file
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        path = self._path(meetID)
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+
+    @contextmanager
+    def snapshot(self, meetID : str):
+        """
+        Yields a published meet's snapshot, mapping its file on first use
+        The snapshot stays open until the block exits, even if it is evicted from the cache meanwhile
+
+        Raises:
+            KeyError: If no meet is published under meetID
+        """
+        with self._lock:
+            snapshot = self._cache.get(meetID)
+            if snapshot is not None:
+                self._cache.move_to_end(meetID)
+                self._readers[snapshot] = self._readers.get(snapshot, 0) + 1
+        if snapshot is None:
+            try:
+                opened = MeetSnapshot(self._path(meetID))
+            except FileNotFoundError:
+                raise KeyError(meetID)
+            with self._lock:
+                snapshot = self._cache.get(meetID)
+                if snapshot is None: # another thread may have mapped it first
+                    snapshot = self._cache[meetID] = opened
+                    while len(self._cache) > self._maxCached:
+                        self._evict(self._cache.popitem(last=False)[1])
+                self._readers[snapshot] = self._readers.get(snapshot, 0) + 1
+            if snapshot is not opened:
+                opened.close()
+        try:
+            yield snapshot
+        finally:
+            with self._lock:
+                self._readers[snapshot] -= 1
+                if not self._readers[snapshot]:
+                    del self._readers[snapshot]
+                    if snapshot in self._evicted:
+                        self._evicted.discard(snapshot)
+                        snapshot.close()
+
+
+    def _evict(self, snapshot : MeetSnapshot) -> None:
+        """
+        Closes a snapshot dropped from the cache, or leaves it to its last reader, called holding the lock
+        """
+        if snapshot in self._readers:
+            self._evicted.add(snapshot)
+        else:
+            snapshot.close()
+
+
+    def page(self, meetID : str, cursor : int = None, limit : int = 1) -> dict:
+        """
+        Returns one page of a published meet's events
+
+        Args:
+            meetID (str): Published meet
+            cursor (int): Event number the page starts at (or the next event after it), the first event if None
+            limit (int): Events per page, at most MAX_PAGE_EVENTS
+
+        Returns:
+            dict: '{meet_id, meet_name, events, cursor, next, prev}' where next and prev are the
+            cursors of the neighbouring pages, None at either end
+
+        Raises:
+            KeyError: If no meet is published under meetID
+            ValueError: If limit is out of range
+        """
+        if not 1 <= limit <= MAX_PAGE_EVENTS:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_EVENTS}")
+        with self.snapshot(meetID) as snapshot:
+            numbers = snapshot.eventNumbers
+            start = bisect_left(numbers, cursor) if cursor is not None else 0
+            end = min(start + limit, len(numbers))
+            return {
+                "meet_id": meetID,
+                "meet_name": snapshot.meetName,
+                "events": [eventView(model) for model in snapshot.getRenderModels(start, end)],
+                "cursor": numbers[start] if start < len(numbers) else None,
+                "next": numbers[end] if end < len(numbers) else None,
+                "prev": numbers[max(start - limit, 0)] if start > 0 else None,
+            }
+
+
+def renderPageHtml(page : dict, link) -> str:
+    """
+    Renders a page of events as a small standalone HTML document for phones
+
+    Args:
+        page (dict): Output of MeetStore.page
+        link: Function of a cursor returning the URL of that page
+    """
+    escape = html.escape
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        "<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">",
+        f"<title>{escape(page['meet_name'])}</title>",
+        "<style>body{font:14px sans-serif;margin:8px}table{border-collapse:collapse;width:100%}"
+        "td,th{padding:2px 4px;text-align:left}tr:nth-child(even){background:#eee}"
+        "small{color:#555}nav{display:flex;justify-content:space-between;margin:12px 0}</style>",
+        f"</head><body><h1>{escape(page['meet_name'])}</h1>",
+    ]
+    for event in page["events"]:
+        parts.append(f"<h2 id=\"e{event['number']}\">{escape(event['title'])}</h2>")
+        if event["note"]:
+            parts.append(f"<p><small>{escape(event['note'])}</small></p>")
+        for heat in event["heats"]:
+            parts.append(f"<h3>Heat {heat['heat']} of {heat['of']}</h3><table>"
+                         "<tr><th>Lane</th><th>Name</th><th>Age</th><th>Team</th><th>Seed</th></tr>")
+            for lane in heat["lanes"]:
+                name = escape(lane["name"])
+                if "relay_swimmers" in lane:
+                    name += f"<br><small>{escape(', '.join(lane['relay_swimmers']))}</small>"
+                parts.append(f"<tr><td>{lane['lane']}</td><td>{name}</td><td>{escape(str(lane['age']))}</td>"
+                             f"<td>{escape(lane['team'])}</td><td>{escape(lane['seed'])}</td></tr>")
+            parts.append("</table>")
+    parts.append("<nav>")
+    parts.append(f"<a href=\"{escape(link(page['prev']))}\">&larr; Previous</a>" if page["prev"] is not None else "<span></span>")
+    parts.append(f"<a href=\"{escape(link(page['next']))}\">Next &rarr;</a>" if page["next"] is not None else "<span></span>")
+    parts.append("</nav></body></html>")
+    return "".join(parts)
+
+
+def testMeetStore():
+    import json
+    from meet import Meet
+    from meetSnapshot import packMeet
+    model = eventView({"number": 3, "title": "Event 3", "combinedWith": 4, "heats": [
+        {"label": "Heat 1 of 1 (Combined with Event 4)", "lanes": [
+            {"lane": 1, "name": None, "age": "", "team": "", "seed": "", "relaySwimmers": []},
+            {"lane": 2, "name": "Ann Ash", "age": "9", "team": "ISL", "seed": "NT", "relaySwimmers": []},
+        ]}]})
+    test.testEqual(model["heats"][0]["lanes"], [{"lane": 2, "name": "Ann Ash", "age": "9", "team": "ISL", "seed": "NT"}])
+    test.testEqual(model["note"], "Combined with Event 4")
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "no", "no"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"],
+    ])
+    meetObject.generateEvents()
+    numbers = [model["number"] for model in meetObject.getRenderModels()] # three events
+
+    with tempfile.TemporaryDirectory() as directory:
+        MeetStore(directory).save("abc123", packMeet(meetObject, "abc123"))
+        store = MeetStore(directory) # reads the file back
+        first = store.page("abc123", limit=2)
+        test.testEqual(([event["number"] for event in first["events"]], first["prev"], first["next"]), (numbers[:2], None, numbers[2]))
+        middle = store.page("abc123", cursor=numbers[2] - 1, limit=2)
+        test.testEqual(([event["number"] for event in middle["events"]], middle["prev"], middle["next"]), (numbers[2:4], numbers[0], None))
+        test.testEqual(store.exists("../abc123"), False)
+        page = renderPageHtml(store.page("abc123", cursor=numbers[1]), lambda cursor: f"?cursor={cursor}")
+        test.testEqual("Ann Ash" in page and f"?cursor={numbers[2]}" in page, True)
+
+        store = MeetStore(directory, maxCached=1)
+        store.save("def456", packMeet(meetObject, "def456"))
+        with store.snapshot("abc123") as snapshot:
+            store.page("def456") # evicts abc123, which stays open until this block exits
+            test.testEqual((snapshot.meetID, len(snapshot)), ("abc123", len(numbers)))
+        test.testEqual(snapshot._map.closed, True)
+        store.page("abc123") # evicts def456, which no one is reading
+        test.testEqual(list(store._cache), ["abc123"])
+
+
+if __name__ == "__main__":
+    testMeetStore()
@@ -0,0 +1,261 @@
+# Stage timing spans, Prometheus metrics and an opt-in per-request profiler
+# Last modified 10/18/2026
+
+import cProfile, io, os, pstats, threading, time, tracemalloc
+from contextlib import contextmanager
+import test
+
+# Stages of building a heat sheet, in pipeline order
+STAGES = ("config_load", "csv_parse", "event_assignment", "seed_times", "heat_organization", "rendering", "pdf_build")
+# Histogram buckets in seconds, from a cached small meet up to a very large league
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+class StageTimer:
+    """
+    Collects the duration of each stage of one heat sheet build, plus values such as the
+    PDF's size and page count. Plain data only, so it can be returned from a worker process
+    """
+
+    def __init__(self) -> None:
+        self.stages = {} # stage -> seconds, in the order stages first ran
+        self.values = {}
+
+
+    @contextmanager
+    def stage(self, name : str):
+        """
+        Times the body of a with block as a stage, repeated stages add up
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+    def record(self, name : str, value) -> None:
+        self.values[name] = value
+
+
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+
+    def asDict(self) -> dict:
+        """
+        Returns '{"stages": {stage: seconds}, "total": seconds, **values}'
+        """
+        return {"stages": dict(self.stages), "total": self.total(), **self.values}
+
+
+def stageTimer(timer : StageTimer = None) -> StageTimer:
+    """
+    Returns timer, or a throwaway one when None so callers can time stages unconditionally
+    """
+    return timer if timer is not None else StageTimer()
+
+
+def serverTiming(timings : dict) -> str:
+    """
+    Returns the stages of StageTimer.asDict() as a Server-Timing header value, in milliseconds
+    """
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings["stages"].items())
+
+
+def _labelText(labels : tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in labels) + "}"
+
+
+class _Histogram:
+
+    def __init__(self, buckets : tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets) # per bucket, made cumulative when rendered
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, value : float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus registry of counters and histograms, rendered in the text exposition
+    format so no client library is needed. Safe to update from several threads
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help = {} # metric name -> (type, help text, buckets)
+        self._counters = {} # (name, labels) -> value
+        self._histograms = {} # (name, labels) -> _Histogram
+
+
+    def counter(self, name : str, helpText : str) -> None:
+        self._help[name] = ("counter", helpText, None)
+
+
+    def histogram(self, name : str, helpText : str, buckets : tuple = LATENCY_BUCKETS) -> None:
+        self._help[name] = ("histogram", helpText, buckets)
+
+
+    def increment(self, name : str, amount : float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+
+    def observe(self, name : str, value : float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self._help[name][2])
+            histogram.observe(value)
+
+
+    def observeTimings(self, timings : dict, **labels) -> None:
+        """
+        Records a build's stage durations, PDF size and page count from StageTimer.asDict()
+        """
+        for stage, seconds in timings["stages"].items():
+            self.observe("heat_sheet_stage_seconds", seconds, stage=stage, **labels)
+        if "pdf_bytes" in timings:
+            self.observe("heat_sheet_pdf_bytes", timings["pdf_bytes"], **labels)
+        if "pdf_pages" in timings:
+            self.observe("heat_sheet_pdf_pages", timings["pdf_pages"], **labels)
+
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(((key, (h.buckets, list(h.counts), h.sum, h.count)) for key, h in self._histograms.items()))
+
+        lines = []
+        for name, (kind, helpText, buckets) in sorted(self._help.items()):
+            lines.append(f"# HELP {name} {helpText}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in counters:
+                    if metric == name:
+                        lines.append(f"{name}{_labelText(labels)} {value:g}")
+                continue
+            for (metric, labels), (bounds, counts, total, count) in histograms:
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucketCount in zip(bounds, counts):
+                    cumulative += bucketCount
+                    lines.append(f"{name}_bucket{_labelText(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labelText(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labelText(labels)} {total:g}")
+                lines.append(f"{name}_count{_labelText(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def defaultRegistry() -> MetricsRegistry:
+    """
+    Returns a registry with the heat sheet server's metrics declared
+    """
+    registry = MetricsRegistry()
+    registry.histogram("http_request_duration_seconds", "Request latency by route, method and status")
+    registry.counter("http_requests_total", "Requests by route, method and status")
+    registry.histogram("heat_sheet_stage_seconds", "Duration of each heat sheet build stage")
+    registry.histogram("heat_sheet_pdf_bytes", "Size of generated heat sheet PDFs", SIZE_BUCKETS)
+    registry.histogram("heat_sheet_pdf_pages", "Pages in generated heat sheet PDFs", PAGE_BUCKETS)
+    registry.counter("heat_sheet_cache_total", "Heat sheet cache lookups by result")
+    return registry
+
+
+def profileCall(mode : str, path : str, func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) under a profiler and writes the report to path
+
+    Args:
+        mode (str): 'cprofile' dumps pstats data (open with pstats or snakeviz), 'tracemalloc'
+            writes the 50 lines allocating the most memory still held when func returned
+        path (str): File the report is written to, its directory is created if needed
+
+    Returns:
+        The result of func
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Profile mode must be one of {', '.join(PROFILE_MODES)}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            profiler.dump_stats(path)
+
+    tracemalloc.start(25)
+    try:
+        result = func(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    with open(path, "w") as f:
+        f.write(f"Current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+        for stat in snapshot.statistics("lineno")[:50]:
+            f.write(f"{stat}\n")
+    return result
+
+
+def profileSummary(path : str, lines : int = 20) -> str:
+    """
+    Returns the top cumulative-time lines of a cProfile dump written by profileCall
+    """
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats("cumulative").print_stats(lines)
+    return output.getvalue()
+
+
+def testMetrics():
+    import tempfile
+    timer = StageTimer()
+    with timer.stage("csv_parse"):
+        pass
+    with timer.stage("csv_parse"):
+        pass
+    timer.record("pdf_pages", 3)
+    test.testEqual(list(timer.asDict()["stages"]), ["csv_parse"])
+    test.testEqual(serverTiming(timer.asDict()).startswith("csv_parse;dur="), True)
+
+    registry = defaultRegistry()
+    registry.observe("http_request_duration_seconds", 0.02, route="/generate", status=200)
+    registry.observe("http_request_duration_seconds", 3.0, route="/generate", status=200)
+    registry.increment("heat_sheet_cache_total", result="hit")
+    registry.observeTimings(timer.asDict())
+    text = registry.render()
+    test.testEqual('http_request_duration_seconds_bucket{route="/generate",status="200",le="0.025"} 1' in text, True)
+    test.testEqual('http_request_duration_seconds_bucket{route="/generate",status="200",le="+Inf"} 2' in text, True)
+    test.testEqual('heat_sheet_cache_total{result="hit"} 1' in text, True)
+    test.testEqual('heat_sheet_pdf_pages_bucket{le="5"} 1' in text, True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run.prof")
+        test.testEqual(profileCall("cprofile", path, sorted, [3, 1, 2]), [1, 2, 3])
+        test.testEqual("sorted" in profileSummary(path), True)
+        test.testEqual(profileCall("tracemalloc", os.path.join(directory, "run.txt"), sum, [1, 2]), 3)
+
+
+if __name__ == "__main__":
+    testMetrics()
@@ -1,14 +1,37 @@
-# Generates heat sheet report from directory of txt files
+# Generates heat sheet report from event render models or a directory of txt files
 # by Aiden Gray
 # Last modified 5/29/2024
 
+import io
 import os
 import re
+import threading
+from reportlab import rl_config
 from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.rl_accel import escapePDF, fp_str
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import Paragraph, Frame, PageTemplate, BaseDocTemplate, XPreformatted, Spacer, KeepTogether
+from event import formatEventBlocks
+from metrics import stageTimer
+
+# Renderers: reportlab's flowable layout, or fixed-pitch blocks packed and drawn on the canvas
+FLOWABLE = "flowable"
+CANVAS = "canvas"
+RENDERERS = (FLOWABLE, CANVAS)
+
+# Page geometry shared by both renderers, two 3.8 inch columns on a letter page
+FONT_SIZE = 7.5
+LEADING = 9
+TEXT_INDENT = 36 # left indent of the 'Code' style the text is set in
+EVENT_GAP = 10
+COLUMN_X = (0.3*inch, 4.4*inch)
+COLUMN_BOTTOM = 0.5*inch
+COLUMN_HEIGHT = 10*inch
+_FUZZ = 1e-6 # reportlab's frame tolerance, so blocks that fit exactly are placed the same way
+# rl_config is shared by the whole process, canvas builds take turns switching ASCII85 off
+_A85_LOCK = threading.Lock()
 
 def readTextFile(input_dir: str, filename : str) -> list:
     """
@@ -29,7 +52,7 @@ def readTextFile(input_dir: str, filename : str) -> list:
 
 class standardHeatSheet(BaseDocTemplate):
 
-    def __init__(self, filename, meetName="Test Meet", **kw):
+    def __init__(self, filename, meetName="Test Meet", firstPage=1, **kw):
         super().__init__(
             filename, 
             leftMargin=0.3*inch, 
@@ -39,6 +62,7 @@ class standardHeatSheet(BaseDocTemplate):
             **kw
         )
         self.meetName = meetName
+        self.firstPage = firstPage # number of the first page, for sections of a longer heat sheet
     
         # Perfectly center two 3.8-inch columns on an 8.5-inch page (0.3" margins, 0.3" gap)
         self.leftFrame = Frame(0.3*inch, .5*inch, 3.8*inch, 10*inch, showBoundary=0, id='left', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
@@ -66,27 +90,282 @@ class standardHeatSheet(BaseDocTemplate):
         
         # Footer: Centered page number at the bottom
         canvas.setFont('Helvetica', 10)
-        canvas.drawCentredString(letter[0] / 2.0, 0.25 * inch, f"Page {doc.page}")
+        canvas.drawCentredString(letter[0] / 2.0, 0.25 * inch, f"Page {doc.page + self.firstPage - 1}")
         
         canvas.restoreState()
 
 
-def generateHeatSheet(meetName : str = 'Test Meet', input_dir: str = 'Event Outputs/', output_dir: str = 'pdf Outputs/'):
+_CODE_STYLE = None
+
+def _codeStyle():
     """
-    Generates a PDF heat sheet from the text files in the input directory.
+    Returns the monospaced paragraph style used for heat sheet text, built once per process
+    """
+    global _CODE_STYLE
+    if _CODE_STYLE is None:
+        # Explicitly set font to Courier and reduce size so long event titles fit in the frames
+        # without overflowing and spilling off the page. A copy keeps the shared 'Code' style untouched
+        _CODE_STYLE = ParagraphStyle('HeatSheetCode', parent=getSampleStyleSheet()['Code'],
+                                     fontName='Courier', fontSize=FONT_SIZE, leading=LEADING)
+    return _CODE_STYLE
+
+
+def _buildDocument(meetName : str, eventBlocks : list, target, renderer : str = FLOWABLE, firstPage : int = 1) -> int:
     """
-    styles = getSampleStyleSheet()
-    styleN = styles['Code']
-    # Explicitly set font to Courier and reduce size so long event titles fit in the frames
-    # without overflowing and spilling off the page
-    styleN.fontName = 'Courier'
-    styleN.fontSize = 7.5
-    styleN.leading = 9
+    Lays out events in the two column template and writes the PDF
+
+    Args:
+        meetName (str): Name of the meet, used for the header
+        eventBlocks (list): One entry per event, each a list of heat blocks with lines ending in '\n'
+        target: File path or writable binary buffer the PDF is written to
+        renderer (str): FLOWABLE or CANVAS, see _drawPages
+        firstPage (int): Page number printed on the first page
+
+    Returns:
+        int: Number of pages in the PDF
+    """
+    if renderer == CANVAS:
+        return _drawPages(meetName, packBlocks(eventBlocks), target, firstPage)
+    if renderer != FLOWABLE:
+        raise ValueError(f"Renderer must be one of {', '.join(RENDERERS)}")
+
+    styleN = _codeStyle()
     meetData = []
 
+    for blocks in eventBlocks:
+        # Add blocks to document as KeepTogether flowables
+        for block in blocks:
+            text = "".join(block)
+            meetData.append(KeepTogether([XPreformatted(text, styleN)]))
+            
+        meetData.append(Spacer(1, 10))
+
+    pdf_doc = standardHeatSheet(target, meetName=meetName, firstPage=firstPage)
+    pdf_doc.build(meetData)
+    return pdf_doc.page
+
+
+def packBlocks(eventBlocks : list) -> list:
+    """
+    Packs heat blocks into the two columns of each page. Every line is LEADING points tall, so
+    a block's height is known from its line count and no flowable has to be measured. Follows
+    the flowable layout: a heat that does not fit in what is left of a column moves to the next
+    one, events are followed by an EVENT_GAP that also moves on when it does not fit, and a heat
+    taller than a whole column is split across columns
+
+    Args:
+        eventBlocks (list): One entry per event, each a list of heat blocks (lists of lines)
+
+    Returns:
+        list: One list per page of '(x, top y, lines)' for each block drawn on it
+    """
+    pages = [[]]
+    column = 0
+    top = COLUMN_BOTTOM + COLUMN_HEIGHT
+    y = top
+
+    def nextColumn():
+        nonlocal column, y
+        column += 1
+        if column == len(COLUMN_X):
+            column = 0
+            pages.append([])
+        y = top
+
+    for blocks in eventBlocks:
+        for block in blocks:
+            lines = [line.rstrip("\n") for line in block]
+            if len(lines) * LEADING > y - COLUMN_BOTTOM and y < top:
+                nextColumn()
+            while lines:
+                fits = len(lines) if len(lines) * LEADING <= y - COLUMN_BOTTOM + _FUZZ else int((y - COLUMN_BOTTOM + _FUZZ) // LEADING)
+                pages[-1].append((COLUMN_X[column] + TEXT_INDENT, y, lines[:fits]))
+                y -= fits * LEADING
+                lines = lines[fits:]
+                if lines:
+                    nextColumn()
+
+        if EVENT_GAP > y - COLUMN_BOTTOM + _FUZZ:
+            nextColumn()
+        y -= EVENT_GAP
+    return pages
+
+
+_PDF_ESCAPES = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)"})
+
+def _pdfString(text : str) -> str:
+    """
+    Returns text as a PDF string literal in the standard fonts' WinAnsi encoding
+    """
+    if text.isascii():
+        return f"({text.translate(_PDF_ESCAPES)})"
+    return f"({escapePDF(text.encode('cp1252', 'replace'))})"
+
+
+def _drawPages(meetName : str, pages : list, target, firstPage : int = 1) -> int:
+    """
+    Draws packed pages straight onto a canvas with the same fonts and positions as the
+    flowable layout. The meet name header is drawn once as a form and reused on every page,
+    and each heat is written as one text object without going through reportlab's per-string
+    text handling
+
+    Args:
+        meetName (str): Name of the meet, used for the header
+        pages (list): Output of packBlocks
+        target: File path or writable binary buffer the PDF is written to
+        firstPage (int): Page number printed on the first page
+
+    Returns:
+        int: Number of pages in the PDF
+    """
+    canvas = Canvas(target, pagesize=letter)
+    canvas.beginForm("header")
+    canvas.setFont('Helvetica-Bold', 12)
+    canvas.drawCentredString(letter[0] / 2.0, 10.5 * inch, meetName)
+    canvas.endForm()
+
+    regular = _fontOperator(canvas, 'Courier')
+    bold = _fontOperator(canvas, 'Courier-Bold')
+    leading = f"{fp_str(LEADING)} TL"
+
+    for number, blocks in enumerate(pages, start=firstPage):
+        canvas.doForm("header")
+        canvas.setFont('Helvetica', 10)
+        canvas.drawCentredString(letter[0] / 2.0, 0.25 * inch, f"Page {number}")
+
+        for x, y, lines in blocks:
+            code = [f"BT 1 0 0 1 {fp_str(x, y - FONT_SIZE)} Tm {leading}"]
+            font = None
+            for line in lines:
+                # Heat sheet lines are either bold throughout or plain
+                if line.startswith("<b>") and line.endswith("</b>"):
+                    line = line[3:-4]
+                    if font is not bold:
+                        font = bold
+                        code.append(bold)
+                elif font is not regular:
+                    font = regular
+                    code.append(regular)
+                code.append(f"{_pdfString(line)} Tj T*")
+            code.append("ET")
+            canvas.addLiteral(" ".join(code))
+        canvas.showPage()
+
+    # Page streams are written as binary rather than ASCII85, whose pure Python encoder would
+    # otherwise take half the build. reportlab only offers this as a process wide setting, so it
+    # is not thread safe: canvas builds hold _A85_LOCK while it is off, and a flowable build
+    # saving at the same time may write binary streams too, which are just as valid
+    with _A85_LOCK:
+        useA85 = rl_config.useA85
+        rl_config.useA85 = 0
+        try:
+            canvas.save()
+        finally:
+            rl_config.useA85 = useA85
+    return len(pages)
+
+
+def _fontOperator(canvas : Canvas, fontName : str) -> str:
+    """
+    Returns the operator selecting a standard font at FONT_SIZE in the canvas's page streams,
+    read from a text object so the font resource is named as reportlab itself names it
+    """
+    text = canvas.beginText()
+    text.setFont(fontName, FONT_SIZE)
+    return re.search(r"\S+ \S+ Tf", text.getCode()).group()
+
+
+def _eventBlocksFromModels(events : list) -> list:
+    """
+    Formats render models into the per-event heat blocks used by _buildDocument
+    """
+    return [_withNewlines(formatEventBlocks(model)) for model in events]
+
+
+def _withNewlines(blocks : list) -> list:
+    """
+    Terminates each line of an event's heat blocks with '\n' like the exported text files
+    """
+    return [[f"{line}\n" for line in block] for block in blocks]
+
+
+def _writeDocument(meetName : str, eventBlocks : list, output_dir : str, renderer : str = FLOWABLE) -> str:
+    """
+    Builds the PDF into output_dir and returns its path
+    """
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
+    pdf_path = os.path.join(output_dir, f"{meetName}.pdf")
+    _buildDocument(meetName, eventBlocks, pdf_path, renderer)
+    print(f"Successfully generated PDF: {pdf_path}")
+    return pdf_path
+
+
+def buildHeatSheet(meetName : str, events : list, output_dir : str = 'pdf Outputs/', renderer : str = FLOWABLE) -> str:
+    """
+    Generates a PDF heat sheet directly from event render models, without text files
+
+    Args:
+        meetName (str): Name of the meet
+        events (list): Render models in event order (see Meet.getRenderModels)
+        output_dir (str): Directory the PDF is written to
+        renderer (str): FLOWABLE, or CANVAS for the fast fixed-pitch renderer
+
+    Returns:
+        str: Path to the generated PDF
+    """
+    return _writeDocument(meetName, _eventBlocksFromModels(events), output_dir, renderer)
+
+
+def buildHeatSheetBytes(meetName : str, events : list, timer = None, renderer : str = FLOWABLE) -> bytes:
+    """
+    Generates a PDF heat sheet from event render models into an in-memory buffer
+
+    Args:
+        meetName (str): Name of the meet
+        events (list): Render models in event order (see Meet.getRenderModels)
+        timer (StageTimer, optional): Records the 'rendering' and 'pdf_build' stages and the
+            PDF's size and page count
+        renderer (str): FLOWABLE, or CANVAS for the fast fixed-pitch renderer
+
+    Returns:
+        bytes: Contents of the PDF
+    """
+    timer = stageTimer(timer)
+    with timer.stage("rendering"):
+        eventBlocks = _eventBlocksFromModels(events)
+    buffer = io.BytesIO()
+    with timer.stage("pdf_build"):
+        pages = _buildDocument(meetName, eventBlocks, buffer, renderer)
+    pdf = buffer.getvalue()
+    timer.record("pdf_pages", pages)
+    timer.record("pdf_bytes", len(pdf))
+    return pdf
+
+
+def buildHeatSheetBytesFromBlocks(meetName : str, eventBlocks : list, renderer : str = FLOWABLE) -> bytes:
+    """
+    Generates a PDF heat sheet into memory from already formatted events, so cached
+    event text can be reused without rebuilding render models
+
+    Args:
+        meetName (str): Name of the meet
+        eventBlocks (list): Output of event.formatEventBlocks for each event, in event order
+        renderer (str): FLOWABLE, or CANVAS for the fast fixed-pitch renderer
+
+    Returns:
+        bytes: Contents of the PDF
+    """
+    buffer = io.BytesIO()
+    _buildDocument(meetName, [_withNewlines(blocks) for blocks in eventBlocks], buffer, renderer)
+    return buffer.getvalue()
+
+
+def generateHeatSheet(meetName : str = 'Test Meet', input_dir: str = 'Event Outputs/', output_dir: str = 'pdf Outputs/', renderer : str = FLOWABLE):
+    """
+    Generates a PDF heat sheet from the text files in the input directory.
+    """
     # Get all event files for this meet and sort them by event number
     try:
         files = [f for f in os.listdir(input_dir) if f.startswith(meetName) and f.endswith(".txt")]
@@ -100,6 +379,7 @@ def generateHeatSheet(meetName : str = 'Test Meet', input_dir: str = 'Event Outp
 
     files.sort(key=get_event_num)
 
+    eventBlocks = []
     for filename in files:
         eventInfo = readTextFile(input_dir, filename)
         
@@ -119,19 +399,9 @@ def generateHeatSheet(meetName : str = 'Test Meet', input_dir: str = 'Event Outp
             
         if current_block:
             blocks.append(current_block)
-            
-        # Add blocks to document as KeepTogether flowables
-        for block in blocks:
-            text = "".join(block)
-            meetData.append(KeepTogether([XPreformatted(text, styleN)]))
-            
-        meetData.append(Spacer(1, 10))
+        eventBlocks.append(blocks)
 
-    pdf_path = os.path.join(output_dir, f"{meetName}.pdf")
-    pdf_doc = standardHeatSheet(pdf_path, meetName=meetName)
-    pdf_doc.build(meetData)
-    print(f"Successfully generated PDF: {pdf_path}")
-    return pdf_path
+    return _writeDocument(meetName, eventBlocks, output_dir, renderer)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+# Incremental team, individual high point and relay scoring for a meet
+# Last modified 10/18/2026
+
+from bisect import bisect_left, insort
+import test
+
+
+class _EventScore:
+    """
+    Results of one event: entries ranked by time and the points each currently holds
+    """
+
+    def __init__(self, event, points : list, config) -> None:
+        number, gender, age, distance, stroke = event.getEventData()
+        self.number = number
+        self.relay = event.isRelay()
+        self.ageGroup = event.getAgeGroup()
+        self.gender = gender
+        self.points = points
+        self.event = event
+        # Entry key -> (team ID, swimmer ID or None for relays, name)
+        # Swimmers and relays are both resolved to the config's team IDs, so a team's points
+        # add up in one total whether its entry files named it 'Islands' or 'isl'
+        self.entries = {}
+        for key, entry in event.getSwimmers().items():
+            team = config.teamID(entry.getTeamName() if self.relay else entry.getTeam())
+            self.entries[key] = (team, None if self.relay else key, entry.getName())
+        self.ranking = [] # sorted (seconds, entry key)
+        self.times = {} # entry key -> seconds
+        self.awarded = {} # entry key -> points
+
+
+    def award(self) -> dict:
+        """
+        Returns the points earned by the top of the ranking, tied entries share the points of
+        the places they tie for. Only the scoring places are walked
+        """
+        awarded = {}
+        place = 0
+        i = 0
+        while i < len(self.ranking) and place < len(self.points):
+            j = i
+            while j < len(self.ranking) and self.ranking[j][0] == self.ranking[i][0]:
+                j += 1
+            share = sum(self.points[place:place + j - i]) / (j - i)
+            for seconds, key in self.ranking[i:j]:
+                awarded[key] = share
+            place += j - i
+            i = j
+        return awarded
+
+
+class MeetScorer:
+    """
+    Keeps team totals, relay points and individual high point standings up to date as
+    results are entered or corrected. Each result touches only its own event's scoring places:
+    an update binary searches the event's ranking and the standings of the swimmers whose
+    points change, then inserts into those sorted lists, O(n) in the worst case but a single
+    memmove of the list. Standings are kept sorted so queries never recompute the meet
+    """
+
+    def __init__(self, meetObject) -> None:
+        """
+        Args:
+            meetObject (Meet): A meet whose events have been generated
+        """
+        config = meetObject.getConfig()
+        self._events = {}
+        for number in meetObject.getEventNumbers():
+            event = meetObject.getEvent(number)
+            points = config.relayPoints if event.isRelay() else config.individualPoints
+            self._events[number] = _EventScore(event, points, config)
+
+        self._teamTotals = {} # team ID -> points
+        self._relayTotals = {} # team ID -> relay points
+        self._swimmerTotals = {} # swimmer ID -> points
+        self._swimmerInfo = {} # swimmer ID -> (name, team, (age group, gender))
+        self._standings = {} # (age group, gender) -> sorted [(-points, name, swimmer ID)]
+
+
+    def recordResult(self, eventNumber : int, entry, seconds : float) -> None:
+        """
+        Enters or corrects one entry's time, None removes it (DQ, scratch or no show)
+
+        Raises:
+            KeyError: If the entry is not in the event
+        """
+        score = self._events[int(eventNumber)]
+        if entry not in score.entries:
+            raise KeyError(f"{entry} is not entered in event {eventNumber}")
+        old = score.times.pop(entry, None)
+        if old is not None:
+            del score.ranking[bisect_left(score.ranking, (old, entry))]
+        if seconds is not None:
+            insort(score.ranking, (seconds, entry))
+            score.times[entry] = seconds
+
+        awarded = score.award()
+        for key in set(awarded) | set(score.awarded):
+            delta = awarded.get(key, 0) - score.awarded.get(key, 0)
+            if delta:
+                self._addPoints(score, key, delta)
+        score.awarded = awarded
+
+
+    def recordLane(self, eventNumber : int, heatNumber : int, lane : int, seconds : float) -> None:
+        """
+        Enters a time by heat and lane as read off the timer's sheet
+        """
+        assignments = self._events[int(eventNumber)].event.getLaneAssignments()
+        self.recordResult(eventNumber, assignments[heatNumber - 1][lane], seconds)
+
+
+    def _addPoints(self, score : _EventScore, key, delta : float) -> None:
+        """
+        Applies a change in an entry's points to its team and, for individual events, its swimmer
+        """
+        team, swimmerID, name = score.entries[key]
+        self._teamTotals[team] = self._teamTotals.get(team, 0) + delta
+        if score.relay:
+            self._relayTotals[team] = self._relayTotals.get(team, 0) + delta
+            return
+
+        group = (score.ageGroup, score.gender)
+        standings = self._standings.setdefault(group, [])
+        old = self._swimmerTotals.get(swimmerID, 0)
+        if old:
+            del standings[bisect_left(standings, (-old, name, swimmerID))]
+        new = round(old + delta, 6) # tie shares such as 1/3 must not leave float residue behind
+        self._swimmerTotals[swimmerID] = new
+        self._swimmerInfo[swimmerID] = (name, team, group)
+        if new:
+            insort(standings, (-new, name, swimmerID))
+
+
+    def teamScores(self) -> list:
+        """
+        Returns '[{team, points, relay_points}]', highest first
+        """
+        scores = [{"team": team, "points": round(points, 2), "relay_points": round(self._relayTotals.get(team, 0), 2)}
+                  for team, points in self._teamTotals.items()]
+        return sorted(scores, key=lambda score: -score["points"])
+
+
+    def highPoint(self, ageGroup : str, gender : str, top : int = 3) -> list:
+        """
+        Returns the individual high point leaders of an age group and gender ('girls' or 'boys')
+        as '[{name, team, points}]', highest first
+        """
+        leaders = []
+        for points, name, swimmerID in self._standings.get((ageGroup, gender), [])[:top]:
+            leaders.append({"name": name, "team": self._swimmerInfo[swimmerID][1], "points": round(-points, 2)})
+        return leaders
+
+
+    def eventResults(self, eventNumber : int) -> list:
+        """
+        Returns an event's results as '[{place, name, team, seconds, points}]', fastest first
+        """
+        score = self._events[int(eventNumber)]
+        results = []
+        for place, (seconds, key) in enumerate(score.ranking, start=1):
+            team, swimmerID, name = score.entries[key]
+            results.append({"place": place, "name": name, "team": team, "seconds": seconds,
+                            "points": round(score.awarded.get(key, 0), 2)})
+        return results
+
+
+def testScoring():
+    import json
+    from meet import Meet
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "Islands", "free", "back", "", "no", "no"], # team by name, the relay by its ID
+        ["Bea", "Birch", "10", "f", "lib", "free", "back", "", "no", "no"],
+        ["Cat", "Cedar", "9", "f", "eff", "free", "", "", "no", "no"],
+    ])
+    meetObject.importRelayRows([["Islands", "9 & 10", "girls", "free", "A", "a", "b", "c", "d"]])
+    meetObject.generateEvents()
+    freeNumber = next(n for n in meetObject.getEventNumbers() if len(meetObject.getEvent(n).getSwimmers()) == 3)
+    ids = {meetObject.getSwimmer(key).getName(): key for key in meetObject.getEvent(freeNumber).getSwimmers()}
+
+    scorer = MeetScorer(meetObject)
+    scorer.recordResult(freeNumber, ids["Ann Ash"], 40.1)
+    scorer.recordResult(freeNumber, ids["Bea Birch"], 38.5)
+    scorer.recordResult(freeNumber, ids["Cat Cedar"], 41.0)
+    test.testEqual([r["points"] for r in scorer.eventResults(freeNumber)], [6, 4, 3])
+    scorer.recordResult(freeNumber, ids["Ann Ash"], 38.5) # correction ties for first
+    test.testEqual(scorer.highPoint("9 & 10", "girls")[0]["points"], 5)
+    scorer.recordResult(freeNumber, ids["Cat Cedar"], None) # disqualified
+    test.testEqual(scorer.teamScores()[0]["points"], 5)
+    test.testEqual(scorer.teamScores()[-1], {"team": "eff", "points": 0, "relay_points": 0})
+
+    relayNumber = next(n for n in meetObject.getEventNumbers()
+                       if meetObject.getEvent(n).isRelay() and meetObject.getEvent(n).getSwimmers())
+    scorer.recordLane(relayNumber, 1, 3, 95.3)
+    test.testEqual(scorer.teamScores()[0], {"team": "isl", "points": 13, "relay_points": 8})
+    test.testEqual(sorted(score["team"] for score in scorer.teamScores()), ["eff", "isl", "lib"])
+
+
+if __name__ == "__main__":
+    testScoring()
@@ -0,0 +1,142 @@
+# Renders a heat sheet as independent sections in parallel and merges them into one PDF
+# Last modified 10/18/2026
+
+import io, os
+from concurrent.futures import ProcessPoolExecutor
+from pdfGen import FLOWABLE, _buildDocument, _eventBlocksFromModels, packBlocks
+from metrics import stageTimer
+import test
+
+OPENING_RELAYS = "Opening Relays"
+CLOSING_RELAYS = "Closing Relays"
+
+
+def meetSections(meetObject) -> list:
+    """
+    Splits a meet's printed events into sections that each start on a fresh page: the opening
+    relays, one section per stroke in the config's event order and the closing relays
+
+    Args:
+        meetObject (Meet): A meet whose events have been generated
+
+    Returns:
+        list: '(section name, [render models in event order])', empty sections left out
+    """
+    sections = []
+    seenIndividual = False
+    for plan in meetObject.getConfig().eventPlan:
+        if plan["relay"]:
+            name = CLOSING_RELAYS if seenIndividual else OPENING_RELAYS
+        else:
+            name = plan["strokeName"].title()
+            seenIndividual = True
+        event = meetObject.getEvent(plan["number"])
+        if not meetObject.isPrinted(event):
+            continue
+        if not sections or sections[-1][0] != name:
+            sections.append((name, []))
+        sections[-1][1].append(event.buildRenderModel())
+    return sections
+
+
+def renderSection(meetName : str, eventBlocks : list, firstPage : int, renderer : str = FLOWABLE) -> tuple:
+    """
+    Renders one section into memory, meant to run in a worker process
+
+    Returns:
+        tuple: (PDF bytes, number of pages)
+    """
+    buffer = io.BytesIO()
+    pages = _buildDocument(meetName, eventBlocks, buffer, renderer, firstPage)
+    return buffer.getvalue(), pages
+
+
+def mergePdfs(parts : list) -> bytes:
+    """
+    Concatenates PDFs page by page into one document
+
+    Raises:
+        ImportError: If pypdf is not installed
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise ImportError("Sectioned heat sheets need pypdf to merge sections, install it with 'pip install pypdf'")
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(io.BytesIO(part))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def buildSectionedHeatSheetBytes(meetName : str, sections : list, maxWorkers : int = None, renderer : str = FLOWABLE, timer = None) -> bytes:
+    """
+    Renders each section in its own process and merges them with continuous page numbers
+    Page counts come from packBlocks, which lays out pages exactly as both renderers do, so
+    every section knows its first page number before any of them is rendered
+
+    Args:
+        meetName (str): Name of the meet, printed in every page's header
+        sections (list): Output of meetSections
+        maxWorkers (int): Worker processes, defaults to one per core
+        renderer (str): pdfGen.FLOWABLE or pdfGen.CANVAS
+        timer (StageTimer, optional): Records the 'rendering' and 'pdf_build' stages and the
+            merged PDF's size and page count
+
+    Returns:
+        bytes: Contents of the merged PDF
+    """
+    timer = stageTimer(timer)
+    with timer.stage("rendering"):
+        sectionBlocks = [_eventBlocksFromModels(models) for name, models in sections]
+        firstPages = []
+        nextPage = 1
+        for eventBlocks in sectionBlocks:
+            firstPages.append(nextPage)
+            nextPage += len(packBlocks(eventBlocks))
+
+    with timer.stage("pdf_build"):
+        workers = min(maxWorkers or os.cpu_count() or 1, len(sectionBlocks)) or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(renderSection, meetName, eventBlocks, firstPage, renderer)
+                       for eventBlocks, firstPage in zip(sectionBlocks, firstPages)]
+            results = [future.result() for future in futures]
+
+        # Should a section ever lay out differently than predicted, renumber the ones after it
+        nextPage = 1
+        for index, (eventBlocks, firstPage) in enumerate(zip(sectionBlocks, firstPages)):
+            if firstPage != nextPage:
+                results[index] = renderSection(meetName, eventBlocks, nextPage, renderer)
+            nextPage += results[index][1]
+
+        pdf = mergePdfs([part for part, pages in results])
+    timer.record("pdf_pages", nextPage - 1)
+    timer.record("pdf_bytes", len(pdf))
+    return pdf
+
+
+def testSectionedPdf():
+    import json, re
+    from meet import Meet
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([
+        ["Ann", "Ash", "9", "f", "isl", "free", "back", "", "yes", "yes"],
+        ["Bea", "Birch", "10", "f", "lib", "free", "fly", "", "no", "no"],
+    ])
+    meetObject.importRelayRows([["Islands", "9 & 10", "girls", "medley", "A", "a", "b", "c", "d"],
+                                ["Islands", "9 & 10", "girls", "free", "A", "a", "b", "c", "d"]])
+    meetObject.generateEvents()
+    sections = meetSections(meetObject)
+    test.testEqual([name for name, models in sections], [OPENING_RELAYS, "Freestyle", "Backstroke", "Butterfly", CLOSING_RELAYS])
+
+    from pypdf import PdfReader
+    pdf = buildSectionedHeatSheetBytes("Test Meet", sections, maxWorkers=2)
+    footers = [re.search(r"Page \d+", page.extract_text()).group(0) for page in PdfReader(io.BytesIO(pdf)).pages]
+    test.testEqual(footers, ["Page 1", "Page 2", "Page 3", "Page 4", "Page 5"])
+
+
+if __name__ == "__main__":
+    testSectionedPdf()
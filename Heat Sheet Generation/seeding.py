@@ -0,0 +1,122 @@
+# Seeding engine assigning an event's entries to heats and lanes
+# Last modified 10/18/2026
+
+import test
+
+RANDOM = "random"
+STANDARD = "standard"
+CIRCLE = "circle"
+METHODS = (RANDOM, STANDARD, CIRCLE)
+
+
+def heatSizes(numEntries : int, numLanes : int) -> list:
+    """
+    Returns the number of entries in each heat, first heat first
+    Every heat is full except the first two, which are balanced so the first has at least 3 entries
+    """
+    if numEntries <= 0:
+        return []
+    if numEntries <= numLanes:
+        return [numEntries]
+
+    numHeats = ((numEntries - 1) // numLanes) + 1
+    overflowEntries = numEntries % numLanes
+    if overflowEntries == 0:
+        sizes = [numLanes, numLanes]
+    elif overflowEntries < 3:
+        sizes = [3, numLanes - (3 - overflowEntries)]
+    else:
+        sizes = [overflowEntries, numLanes]
+    return sizes + [numLanes] * (numHeats - 2)
+
+
+def centerOutOrder(numLanes : int) -> list:
+    """
+    Returns lane positions (0 based) from the fastest to the slowest, starting in the center
+    and alternating outwards, e.g. 6 lanes give lanes 3, 4, 2, 5, 1, 6
+    """
+    center = (numLanes - 1) // 2
+    order = [center]
+    for offset in range(1, numLanes):
+        for position in (center + offset, center - offset):
+            if 0 <= position < numLanes and len(order) < numLanes:
+                order.append(position)
+    return order
+
+
+def _laneOrder(heat : list) -> list:
+    """
+    Places a heat's entries, given fastest first, into its lanes left to right
+    """
+    lanes = [None] * len(heat)
+    for entry, position in zip(heat, centerOutOrder(len(heat))):
+        lanes[position] = entry
+    return lanes
+
+
+def seedHeats(entries : list, times : dict, numLanes : int, method : str = STANDARD, circleHeats : int = 3, rng = None) -> list:
+    """
+    Seeds entries into heats, slowest heat first and fastest heat last, each heat's lanes
+    filled center-out from its fastest entry. Entries with no time (NT) go in the first heats
+    Runs in O(n log n), one sort of the timed entries
+
+    Args:
+        entries (list): Entry IDs in entry order
+        times (dict): Entry ID -> seed time in seconds, entries not in it are NT
+        numLanes (int): Lanes in the pool
+        method (str): STANDARD, or CIRCLE to circle seed the fastest circleHeats heats
+        circleHeats (int): Number of heats circle seeded
+        rng (optional): random.Random used to order NT entries, entry order if None
+
+    Returns:
+        list: Heats of entry IDs, each listed in lane order from the heat's first lane
+    """
+    noTime = [entry for entry in entries if entry not in times]
+    if rng is not None:
+        rng.shuffle(noTime)
+    timed = sorted((entry for entry in entries if entry in times), key=times.__getitem__)
+
+    sizes = heatSizes(len(entries), numLanes)
+    numHeats = len(sizes)
+    heats = [[] for size in sizes]
+
+    # Circle seeding deals the fastest entries round robin over the last heats, fastest heat first
+    fastest = 0
+    if method == CIRCLE and numHeats > 1:
+        circled = list(range(numHeats - 1, max(numHeats - circleHeats, 0) - 1, -1))
+        fastest = min(sum(sizes[heat] for heat in circled), len(timed))
+        turn = 0
+        for entry in timed[:fastest]:
+            while len(heats[circled[turn % len(circled)]]) >= sizes[circled[turn % len(circled)]]:
+                turn += 1
+            heats[circled[turn % len(circled)]].append(entry)
+            turn += 1
+
+    # Everything else fills the heats from the last, fastest first, with NT entries landing in the first heats
+    remaining = timed[fastest:] + noTime[::-1]
+    heat = numHeats - 1
+    for entry in remaining:
+        while len(heats[heat]) >= sizes[heat]:
+            heat -= 1
+        heats[heat].append(entry)
+
+    return [_laneOrder(heat) for heat in heats]
+
+
+def testSeeding():
+    test.testEqual(heatSizes(7, 6), [3, 4])
+    test.testEqual(heatSizes(12, 6), [6, 6])
+    test.testEqual(heatSizes(17, 6), [5, 6, 6])
+    test.testEqual([lane + 1 for lane in centerOutOrder(6)], [3, 4, 2, 5, 1, 6])
+    test.testEqual([lane + 1 for lane in centerOutOrder(8)], [4, 5, 3, 6, 2, 7, 1, 8])
+
+    times = {name: seconds for seconds, name in enumerate("abcdefghijkl")}
+    heats = seedHeats(list(times) + ["nt"], times, 6)
+    test.testEqual(heats, [["nt", "k", "l"], ["i", "g", "h", "j"], ["e", "c", "a", "b", "d", "f"]])
+
+    circled = seedHeats(list(times), times, 4, CIRCLE, 3)
+    test.testEqual(circled, [["i", "c", "f", "l"], ["h", "b", "e", "k"], ["g", "a", "d", "j"]])
+
+
+if __name__ == "__main__":
+    testSeeding()
@@ -3,7 +3,92 @@
 # Last modified 5/27/2024
 
 import test
-import random
+import hashlib, sys, unicodedata
+from datetime import datetime
+
+
+_GENDERS = ('f', 'm') # gender codes stored as an index into this tuple
+_MEDLEY = 1 # relay flag bits
+_FREE = 2
+
+# Raw .csv values seen so far mapped to their shared, already normalized form so
+# repeated teams, ages and event combinations are parsed once and stored once
+_CACHE_LIMIT = 4096
+_teamCache = {}
+_ageCache = {}
+_genderCache = {}
+_eventCache = {}
+_relayCache = {}
+
+BIRTH_DATE = 10 # optional column after the relays in an entry row
+_BIRTH_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+
+
+def _remember(cache : dict, raw, value):
+    """
+    Stores the parsed value for a raw .csv value, up to _CACHE_LIMIT entries, and returns it
+    """
+    if len(cache) < _CACHE_LIMIT:
+        cache[raw] = value
+    return value
+
+
+def _parseGender(raw : str) -> int:
+    return 1 if raw[:1].lower() == 'm' else 0
+
+
+def _parseEvents(raw : tuple) -> tuple:
+    return tuple(sys.intern(event.lower().strip()) for event in raw)
+
+
+def _parseRelays(raw : tuple) -> int:
+    medley, free = raw
+    flags = 0
+    if medley.lower().strip() in ("true", "yes"):
+        flags |= _MEDLEY
+    if free.lower().strip() in ("true", "yes"):
+        flags |= _FREE
+    return flags
+
+
+def normalizeName(text : str) -> str:
+    """
+    Returns a name with accents stripped, case folded and whitespace collapsed, so 'Zoë  Ång'
+    and 'zoe ang' compare equal
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+def normalizeBirthDate(text : str) -> str:
+    """
+    Returns a birth date as 'YYYY-MM-DD', or stripped as given if it is in no known format
+    """
+    text = text.strip()
+    for dateFormat in _BIRTH_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, dateFormat).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return text
+
+
+def identityKey(first : str, last : str, team : str, birthDate : str = "") -> str:
+    """
+    Returns what identifies a swimmer across entry files: normalized full name, team ID and
+    birth date when one is known
+    """
+    return f"{normalizeName(first + ' ' + last)}|{team.lower().strip()}|{normalizeBirthDate(birthDate)}"
+
+
+def swimmerID(key : str, attempt : int = 0) -> str:
+    """
+    Returns the stable ID of a swimmer's identityKey, the same in every import and process
+    A later attempt gives another ID for the practically impossible case of two keys colliding
+    """
+    if attempt:
+        key = f"{key}#{attempt}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
 
 
 class Swimmer:
@@ -12,25 +97,78 @@ class Swimmer:
     Stores name, age, team, events, and relay status
     Meant to be generated from .csv file formated as below:
     "first name,last name,gender,age,team,event 1,event 2,event 3,medley relay,free relay" 
+
+    Uses __slots__ with integer age/gender and relay flags, and shares team strings and
+    event tuples between swimmers, so season-sized rosters stay small in memory
     """
 
+    __slots__ = ('userID_', 'name_', 'age_', 'gender_', 'team_', 'events_', 'relays_')
+
     def __init__(self, swimID : str, infoLine : list):
         self.userID_ = swimID
         
-        self.firstName_ = infoLine[0].title()
-        self.lastName_ = infoLine[1].title()
-        self.age_ = infoLine[2]
-        self.gender_ = infoLine[3][0].lower()
-        self.team_ = infoLine[4]
-        self.event1_ = infoLine[5].lower().strip()
-        self.event2_ = infoLine[6].lower().strip()
-        self.event3_ = infoLine[7].lower().strip()
-        self.medley_ = infoLine[8]
-        self.free_ = infoLine[9]
+        self.name_ = infoLine[0].title() + " " + infoLine[1].title()
+
+        # Cache hits are plain dict lookups, misses parse the value once and remember it
+        raw = infoLine[2]
+        try:
+            self.age_ = _ageCache[raw]
+        except KeyError:
+            self.age_ = _remember(_ageCache, raw, int(raw))
+        raw = infoLine[3]
+        try:
+            self.gender_ = _genderCache[raw]
+        except KeyError:
+            self.gender_ = _remember(_genderCache, raw, _parseGender(raw))
+        raw = infoLine[4]
+        try:
+            self.team_ = _teamCache[raw]
+        except KeyError:
+            self.team_ = _remember(_teamCache, raw, sys.intern(raw))
+        raw = (infoLine[5], infoLine[6], infoLine[7])
+        try:
+            self.events_ = _eventCache[raw]
+        except KeyError:
+            self.events_ = _remember(_eventCache, raw, _parseEvents(raw))
+        raw = (infoLine[8], infoLine[9])
+        try:
+            self.relays_ = _relayCache[raw]
+        except KeyError:
+            self.relays_ = _remember(_relayCache, raw, _parseRelays(raw))
+
+
+    @classmethod
+    def fromRecord(cls, swimID : str, record : dict) -> "Swimmer":
+        """
+        Rebuilds a swimmer saved with toRecord without reparsing a .csv row
+        """
+        swimmer = cls.__new__(cls)
+        swimmer.userID_ = swimID
+        swimmer.name_ = record["name"]
+        swimmer.age_ = int(record["age"])
+        swimmer.gender_ = _GENDERS.index(record["gender"])
+        swimmer.team_ = sys.intern(record["team"])
+        swimmer.events_ = tuple(sys.intern(event) for event in record["events"])
+        swimmer.relays_ = int(record["relays"])
+        return swimmer
+
+
+    def toRecord(self) -> dict:
+        """
+        Returns the swimmer's data as a JSON-friendly dict (see fromRecord)
+        """
+        return {
+            "name": self.name_,
+            "age": self.age_,
+            "gender": _GENDERS[self.gender_],
+            "team": self.team_,
+            "events": list(self.events_),
+            "relays": self.relays_,
+        }
 
 
     def __str__(self) -> str:
-        return f"{self.firstName_} {self.lastName_} is registered for {self.event1_}, {self.event2_}, and {self.event3_}."
+        return f"{self.name_} is registered for {self.events_[0]}, {self.events_[1]}, and {self.events_[2]}."
     
 
     def getSwimID(self):
@@ -44,15 +182,28 @@ class Swimmer:
         """
         Returns swimmer's full name, first then last, as a string
         """
-        fullName = self.firstName_ + " " + self.lastName_
-        return fullName
+        return self.name_
     
 
     def getAge(self):
         """
         Returns swimmer's age as a string
         """
+        return str(self.age_)
+
+
+    def getAgeNumber(self) -> int:
+        """
+        Returns swimmer's age as an integer
+        """
         return self.age_
+
+
+    def getGender(self) -> str:
+        """
+        Returns swimmer's gender as 'm' or 'f'
+        """
+        return _GENDERS[self.gender_]
     
 
     def getTeam(self):
@@ -64,12 +215,9 @@ class Swimmer:
 
     def getEvents(self):
         """
-        Returns list of registered events
+        Returns tuple of registered events, lowercase and stripped
         """
-        eventList = [self.event1_.lower(), self.event2_, self.event3_]
-        for entry in range(len(eventList)):
-            eventList[entry] = eventList[entry].lower().strip()
-        return eventList
+        return self.events_
     
 
     def getSwimmerData(self) -> list:
@@ -79,7 +227,7 @@ class Swimmer:
         Returns:
             list: In format '[full name, gender, age]'
         """
-        outputList = [self.firstName_ + " " + self.lastName_, self.gender_, self.age_]
+        outputList = [self.name_, _GENDERS[self.gender_], self.getAge()]
         return outputList
 
 
@@ -87,13 +235,7 @@ class Swimmer:
         """
         Returns 'True' if registered for given event, else returns 'False'
         """
-        if self.event1_ == event or self.event1_ == strokeName:
-            return True
-        elif self.event2_ == event or self.event2_ == strokeName:
-            return True
-        elif self.event3_ == event or self.event3_ == strokeName:
-            return True
-        return False
+        return event in self.events_ or strokeName in self.events_
 
 
 
@@ -101,18 +243,14 @@ class Swimmer:
         """
         Returns 'True' if registered for medley relay, else returns 'False'
         """
-        if self.medley_.lower().strip() == "true" or self.medley_.lower().strip() == "yes":
-            return True
-        return False
+        return bool(self.relays_ & _MEDLEY)
 
 
     def checkFreeRelay(self):
         """
         Returns 'True' if registered for free relay, else returns 'False'
         """
-        if self.free_.lower().strip() == "true" or self.free_.lower().strip() == "yes":
-            return True
-        return False
+        return bool(self.relays_ & _FREE)
 
 
 class Relay:
@@ -158,6 +296,13 @@ class Relay:
         return self._teamID.upper()
     
 
+    def getTeamName(self) -> str:
+        """
+        Returns the team name the relay was entered under.
+        """
+        return self._team
+
+
     def getName(self) -> str:
         """
         Returns the full name of the relay team.
@@ -186,18 +331,23 @@ def testSwimmer():
     print(swimmerBoi)
 
     # Test checking event
-    test.testEqual(swimmerBoi.checkEvent("fly"),True)
-    test.testEqual(swimmerBoi.checkEvent("FlY"),True)
-    test.testEqual(swimmerBoi.checkEvent("fly "),True)
-    test.testEqual(swimmerBoi.checkEvent("breast"),False)
+    test.testEqual(swimmerBoi.checkEvent("fly", "butterfly"),True)
+    test.testEqual(swimmerBoi.checkEvent("free", "freestyle"),True)
+    test.testEqual(swimmerBoi.checkEvent("breast", "breaststroke"),False)
 
     # Test getting event list
-    test.testEqual(swimmerBoi.getEvents(),["fly","back","free"])
+    test.testEqual(swimmerBoi.getEvents(),("fly","back","free"))
+    test.testEqual(swimmerBoi.getSwimmerData(),["John Doe","m","8"])
 
     # Test relay booleans
     test.testEqual(swimmerBoi.checkMedleyRelay(),True)
     test.testEqual(swimmerBoi.checkFreeRelay(),False)
 
+    # Test stable identities
+    test.testEqual(identityKey(" Zoë", "Ång ", "ISL", "11/07/2015"), "zoe ang|isl|2015-11-07")
+    test.testEqual(swimmerID(identityKey("Zoe", "Ang", "isl", "2015-11-07")), swimmerID("zoe ang|isl|2015-11-07"))
+    test.testEqual(len(swimmerID("zoe ang|isl|")), 12)
+
 
 if __name__ == "__main__":
     testSwimmer()
\ No newline at end of file
@@ -0,0 +1,143 @@
+# Generates synthetic leagues (entry and relay .csv files) for testing and benchmarks
+# Last modified 10/18/2026
+
+import copy, csv, os, random, re
+import test
+
+SWIMMER_HEADER = ["first name", "last name", "age", "gender", "team", "event 1", "event 2", "event 3", "medley relay", "free relay"]
+RELAY_HEADER = ["Team", "Age Group", "Gender", "Stroke", "Relay Identifier", "Swimmer 1", "Swimmer 2", "Swimmer 3", "Swimmer 4"]
+
+# Summer league rosters skew towards 7-12 year olds
+AGE_WEIGHTS = {5: 3, 6: 6, 7: 9, 8: 10, 9: 11, 10: 11, 11: 10, 12: 9, 13: 7, 14: 6, 15: 4, 16: 3, 17: 2}
+# Relative popularity of each stroke, the IM is only swum from 9 up
+STROKE_WEIGHTS = {"free": 10, "back": 7, "breast": 6, "fly": 4, "im": 3}
+EVENT_COUNT_WEIGHTS = {1: 2, 2: 3, 3: 6}
+RELAY_SHARE = 0.6 # share of swimmers who want to swim relays
+
+
+def _weighted(rng : random.Random, weights : dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _inGroup(age : int, ageGroup : str) -> bool:
+    """
+    Returns True if an age falls in an age group label such as '8 & under', '9 & 10' or '13 & up'
+    """
+    numbers = [int(n) for n in re.findall(r"\d+", ageGroup)]
+    if "under" in ageGroup:
+        return age <= numbers[0]
+    if "up" in ageGroup or "over" in ageGroup:
+        return age >= numbers[0]
+    return numbers[0] <= age <= numbers[-1]
+
+
+def leagueConfig(config : dict, numTeams : int) -> dict:
+    """
+    Returns a copy of a league config with at least numTeams teams, adding 'Team N' (ID 'tN') as needed
+    """
+    config = copy.deepcopy(config)
+    teams = config.setdefault("teams", [])
+    for number in range(len(teams) + 1, numTeams + 1):
+        teams.append({"name": f"Team {number}", "id": f"t{number}"})
+    return config
+
+
+def generateLeague(config : dict, numTeams : int, swimmersPerTeam : int, seed = 0) -> dict:
+    """
+    Builds a synthetic league with realistic age, gender and event distributions
+
+    Args:
+        config (dict): League config, see leagueConfig for leagues with more teams than it lists
+        numTeams (int): Number of teams, taken from the config's teams in order
+        swimmersPerTeam (int): Swimmers on each team
+        seed: Seed for a repeatable league
+
+    Returns:
+        dict: '{"teams": [(name, ID)], "swimmers": {team ID: entry rows}, "relays": relay rows}'
+    """
+    rng = random.Random(seed)
+    teams = [(team["name"], team["id"]) for team in config["teams"][:numTeams]]
+    if len(teams) < numTeams:
+        raise ValueError(f"Config has {len(teams)} teams, use leagueConfig for {numTeams}")
+    relayGroups = config["age_groups"].get("relay", [])
+    relayStrokes = [relay["stroke"] for relay in config["events"].get("relays", [])]
+
+    swimmers = {}
+    relays = []
+    for teamName, teamID in teams:
+        rows = []
+        relayPool = {} # (age group, gender) -> names of swimmers available for relays
+        for number in range(swimmersPerTeam):
+            age = _weighted(rng, AGE_WEIGHTS)
+            gender = rng.choice(("f", "m"))
+            strokes = dict(STROKE_WEIGHTS) if age >= 9 else {s: w for s, w in STROKE_WEIGHTS.items() if s != "im"}
+            events = []
+            for event in range(_weighted(rng, EVENT_COUNT_WEIGHTS)):
+                stroke = _weighted(rng, strokes)
+                del strokes[stroke]
+                events.append(stroke)
+            events += [""] * (3 - len(events))
+            relay = rng.random() < RELAY_SHARE
+            first, last = f"Swimmer{number}", f"{teamID.upper()}{number}"
+            rows.append([first, last, str(age), gender, teamID, *events, "yes" if relay else "no", "yes" if relay else "no"])
+            if relay:
+                for ageGroup in relayGroups:
+                    if _inGroup(age, ageGroup):
+                        relayPool.setdefault((ageGroup, gender), []).append(f"{first} {last}")
+                        break
+        swimmers[teamID] = rows
+
+        # One relay per four available swimmers, lettered A, B, C...
+        for (ageGroup, gender), names in sorted(relayPool.items()):
+            for stroke in relayStrokes:
+                rng.shuffle(names)
+                for index in range(len(names) // 4):
+                    relays.append([teamName, ageGroup, "girls" if gender == "f" else "boys", stroke,
+                                   chr(ord("A") + index), *names[index * 4:index * 4 + 4]])
+
+    return {"teams": teams, "swimmers": swimmers, "relays": relays}
+
+
+def writeLeague(league : dict, directory : str) -> dict:
+    """
+    Writes a generated league as one entry .csv per team and a single Relays.csv
+
+    Returns:
+        dict: '{"swimmer_files": [paths], "relay_files": [path]}'
+    """
+    os.makedirs(directory, exist_ok=True)
+    swimmerFiles = []
+    for teamName, teamID in league["teams"]:
+        path = os.path.join(directory, f"{teamName}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(SWIMMER_HEADER)
+            writer.writerows(league["swimmers"][teamID])
+        swimmerFiles.append(path)
+
+    relayPath = os.path.join(directory, "Relays.csv")
+    with open(relayPath, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RELAY_HEADER)
+        writer.writerows(league["relays"])
+    return {"swimmer_files": swimmerFiles, "relay_files": [relayPath]}
+
+
+def testSyntheticLeague():
+    import json
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    test.testEqual(_inGroup(8, "8 & under"), True)
+    test.testEqual(_inGroup(11, "9 & 10"), False)
+    test.testEqual(_inGroup(15, "13 & up"), True)
+
+    bigConfig = leagueConfig(config, 8)
+    test.testEqual(bigConfig["teams"][7], {"name": "Team 8", "id": "t8"})
+    league = generateLeague(bigConfig, 8, 30, seed=1)
+    test.testEqual(len(league["swimmers"]["t8"]), 30)
+    test.testEqual(league == generateLeague(bigConfig, 8, 30, seed=1), True)
+    test.testEqual(all(len(row) == 9 for row in league["relays"]), True)
+
+
+if __name__ == "__main__":
+    testSyntheticLeague()
@@ -0,0 +1,199 @@
+# SQLite store of past results used to fill in seed times
+# Last modified 10/18/2026
+
+import sqlite3
+import test
+from meet import openRows
+from swimmer import normalizeName
+
+DEFAULT_COURSE = "SCY"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    swimmer TEXT NOT NULL,
+    stroke TEXT NOT NULL,
+    distance INTEGER NOT NULL,
+    course TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    date TEXT,
+    meet TEXT
+);
+CREATE INDEX IF NOT EXISTS results_best ON results (swimmer, stroke, distance, course, seconds);
+"""
+
+
+def swimmerKey(name : str, team : str) -> str:
+    """
+    Returns the key results are stored under, a swimmer's full name normalized as entries are
+    deduplicated (see swimmer.normalizeName) and team ID
+    """
+    return f"{normalizeName(name)}|{team.lower().strip()}"
+
+
+def parseTime(text : str) -> float:
+    """
+    Converts a time formatted as 'ss.hh' or 'm:ss.hh' into seconds
+
+    Raises:
+        ValueError: If the text is not a time
+    """
+    seconds = 0.0
+    for part in text.strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class TimesDatabase:
+    """
+    Past results indexed on (swimmer, stroke, distance, course, seconds) so a swimmer's best
+    time for an event is a single index seek, and a whole meet is answered with one query
+    """
+
+    def __init__(self, path : str = ":memory:", readOnly : bool = False) -> None:
+        """
+        Opens (and creates if needed) a times database
+
+        Args:
+            path (str): SQLite file, kept in memory if not given
+            readOnly (bool): Open an existing file without write access
+        """
+        if readOnly:
+            self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self._connection = sqlite3.connect(path)
+            self._connection.executescript(_SCHEMA)
+        self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (swimmer TEXT, stroke TEXT, distance INTEGER)")
+
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+    def addResults(self, results) -> int:
+        """
+        Stores results in one transaction
+
+        Args:
+            results: Iterable of '(swimmer key, stroke, distance, course, seconds, date, meet)'
+
+        Returns:
+            int: Number of results stored
+        """
+        with self._connection:
+            cursor = self._connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", results)
+        return cursor.rowcount
+
+
+    def importResults(self, source, config = None) -> int:
+        """
+        Bulk imports past results from a .csv path, text stream or iterable of rows formatted as
+        'first name,last name,team,stroke,distance,course,time,date,meet' (header included)
+        Strokes may be codes or names, and teams names or IDs. When a league config is given both
+        are resolved to the config's codes and team IDs, as Meet.applySeedTimes looks them up
+
+        Returns:
+            int: Number of results stored
+        """
+        strokeLookup = config.strokeLookup if config is not None else {}
+        teamID = config.teamID if config is not None else str
+
+        def results(rows):
+            for row in rows:
+                if len(row) < 7 or not row[0]:
+                    continue
+                first, last, team, stroke, distance, course, time = (value.strip() for value in row[:7])
+                stroke = stroke.lower()
+                yield (
+                    swimmerKey(f"{first} {last}", teamID(team)),
+                    strokeLookup.get(stroke, stroke),
+                    int(distance),
+                    (course or DEFAULT_COURSE).upper(),
+                    parseTime(time),
+                    row[7].strip() if len(row) > 7 else None,
+                    row[8].strip() if len(row) > 8 else None,
+                )
+
+        with openRows(source) as rows:
+            return self.addResults(results(rows))
+
+
+    def bestTimes(self, entries, course : str = DEFAULT_COURSE) -> dict:
+        """
+        Looks up the best time of every entry with a single query
+
+        Args:
+            entries: Iterable of '(name, team, stroke, distance)'
+            course (str): Course the times must have been swum in
+
+        Returns:
+            dict: '(name, team, stroke, distance)' -> best seconds, entries without a time are left out
+        """
+        keys = {}
+        for name, team, stroke, distance in entries:
+            keys.setdefault((swimmerKey(name, team), stroke, int(distance)), []).append((name, team, stroke, distance))
+        with self._connection:
+            self._connection.execute("DELETE FROM wanted")
+            self._connection.executemany("INSERT INTO wanted VALUES (?, ?, ?)", keys)
+            rows = self._connection.execute(
+                """
+                SELECT w.swimmer, w.stroke, w.distance,
+                    (SELECT MIN(r.seconds) FROM results r
+                     WHERE r.swimmer = w.swimmer AND r.stroke = w.stroke
+                     AND r.distance = w.distance AND r.course = ?)
+                FROM wanted w
+                """,
+                (course.upper(),)
+            ).fetchall()
+
+        best = {}
+        for swimmer, stroke, distance, seconds in rows:
+            if seconds is not None:
+                for entry in keys[(swimmer, stroke, distance)]:
+                    best[entry] = seconds
+        return best
+
+
+    def version(self) -> str:
+        """
+        Returns a value that changes whenever results are added, for cache keys
+        """
+        count, last = self._connection.execute("SELECT COUNT(*), MAX(rowid) FROM results").fetchone()
+        return f"{count}:{last}"
+
+
+def testTimesDatabase():
+    from leagueConfig import compileConfig
+    import json
+    with open("config.json", "r") as f:
+        config = compileConfig(json.load(f))
+
+    test.testEqual(parseTime("1:05.32"), 65.32)
+    test.testEqual(swimmerKey("John  Doe", "HAB"), "john doe|hab")
+    test.testEqual(swimmerKey("Zoë  Ång", "lib"), swimmerKey("zoe ang", "lib"))
+
+    database = TimesDatabase()
+    rows = [
+        ["First", "Last", "Team", "Stroke", "Distance", "Course", "Time", "Date", "Meet"],
+        ["John", "Doe", "hab", "freestyle", "25", "SCY", "20.95", "6/1/2024", "Opener"],
+        ["John", "Doe", "hab", "free", "25", "SCY", "21.40", "6/8/2024", "Dual"],
+        ["John", "Doe", "hab", "free", "25", "LCM", "19.00", "6/9/2024", "Long Course"],
+    ]
+    test.testEqual(database.importResults(rows, config), 3)
+    best = database.bestTimes([("John Doe", "hab", "free", "25"), ("Jane Roe", "eff", "free", "25")])
+    test.testEqual(best, {("John Doe", "hab", "free", "25"): 20.95})
+
+    # A result stored under the team's ID seeds an entry made under the team's name, and back
+    from meet import Meet
+    database.importResults([rows[0], ["Ann", "Ash", "isl", "free", "50", "SCY", "40.10"],
+                            ["Bea", "Birch", "Liberty", "free", "50", "SCY", "38.50"],
+                            ["Zoe", "Ang", "lib", "free", "50", "SCY", "41.00"]], config)
+    meetObject = Meet("Test Meet", config, seed=1)
+    meetObject.importSwimmerRows([["Ann", "Ash", "9", "f", "Islands", "free", "", "", "no", "no"],
+                                  ["Bea", "Birch", "10", "f", "lib", "free", "", "", "no", "no"],
+                                  ["Zoë", "Ång", "10", "f", "lib", "free", "", "", "no", "no"]])
+    meetObject.generateEvents()
+    test.testEqual(meetObject.applySeedTimes(database), 3)
+
+
+if __name__ == "__main__":
+    testTimesDatabase()